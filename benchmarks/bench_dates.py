@@ -0,0 +1,93 @@
+"""
+Benchmarks feed date parsing: dateutil against fetchers.dates.
+
+The corpus is a set of date strings as they appear in the configured feeds
+(RSS pubDate, Atom and YouTube published/updated), or the dates found in a
+directory of recorded fixtures (see benchmarks/replay.py). Each string is
+repeated, as in a backfill where many entries share a date format.
+
+Usage:
+    python benchmarks/bench_dates.py --repeat 200
+    python benchmarks/bench_dates.py --fixtures benchmarks/fixtures
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dateutil import parser
+from fetchers import dates
+
+CORPUS = [
+    # RSS 2.0 pubDate (RFC 822)
+    "Mon, 23 Oct 2023 10:00:00 GMT",
+    "Fri, 27 Oct 2023 16:30:12 +0000",
+    "Wed, 1 Nov 2023 08:05:00 -0700",
+    "Thu, 02 Nov 2023 19:00:00 PST",
+    "Tue, 07 Nov 2023 12:00:00 EDT",
+    "Sat, 4 Nov 2023 00:00:00 +0100",
+    # Atom and YouTube (ISO 8601)
+    "2023-10-27T00:00:00Z",
+    "2023-10-26T15:02:11+00:00",
+    "2023-10-25T09:30:00.000-07:00",
+    "2023-11-03T18:45:27.123456+05:30",
+    "2023-10-31",
+    "2023-10-30 14:00:00",
+    # Formats only dateutil handles
+    "October 27, 2023",
+    "27 Oct 2023",
+]
+
+DATE_TAG = re.compile(rb"<(pubDate|published|updated)>([^<]+)</\1>")
+
+def load_fixture_dates(path: str):
+    """Date strings found in the recorded feed bodies of a fixture directory."""
+    from replay import FixtureStore
+    store = FixtureStore(path)
+    found = []
+    for entry in store.index.values():
+        found += [m.group(2).decode("utf-8", "replace").strip() for m in DATE_TAG.finditer(store.body(entry))]
+    return found
+
+def time_parse(label: str, parse, values, clear=None):
+    if clear:
+        clear()
+    start = time.perf_counter()
+    for value in values:
+        try:
+            parse(value)
+        except (ValueError, OverflowError):
+            pass
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} parses={len(values)} time={elapsed:.3f}s rate={len(values) / elapsed:,.0f}/s")
+    return elapsed
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Feed date parsing benchmark")
+    arg_parser.add_argument("--repeat", type=int, default=200, help="Times each corpus string is parsed")
+    arg_parser.add_argument("--fixtures", default=None, help="Read dates from recorded fixtures instead of the built-in corpus")
+    args = arg_parser.parse_args()
+
+    corpus = load_fixture_dates(args.fixtures) if args.fixtures else CORPUS
+    if not corpus:
+        print("No dates found")
+        return
+    values = corpus * args.repeat
+    print(f"corpus={len(corpus)} distinct={len(set(corpus))}")
+
+    # dateutil ignores US zone names such as PST; email.utils understands them
+    warnings.simplefilter("ignore", parser.UnknownTimezoneWarning)
+
+    # Unmemoized, to show the per-string cost of each path
+    fast = dates.parse_timestamp.__wrapped__
+    baseline = time_parse("dateutil", parser.parse, values)
+    uncached = time_parse("fast path", fast, values)
+    cached = time_parse("memoized", dates.parse_timestamp, values, clear=dates.parse_timestamp.cache_clear)
+    print(f"speedup: fast path x{baseline / uncached:.1f}, memoized x{baseline / cached:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmarks Hacker News fetching against a local stub HN server.
+
+The stub serves topstories, items and article pages with an artificial
+per-request latency, so the serial and concurrent modes can be compared
+without touching the real API. Each run starts with an empty cache dir, so
+no run is served og:images cached by an earlier one.
+
+Usage:
+    python benchmarks/bench_news.py --latency 0.05 --concurrency 1 8 16
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetchers import cache, http_client, news
+
+KEYWORDS = ["AI", "LLM", "GPT"]
+
+def make_handler(latency: float, num_stories: int, match_every: int):
+    class StubHNHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            port = self.server.server_address[1]
+            if self.path == "/v0/topstories.json":
+                body = json.dumps(list(range(1, num_stories + 1))).encode()
+                ctype = "application/json"
+            elif self.path.startswith("/v0/item/"):
+                story_id = int(self.path.rsplit("/", 1)[-1].split(".")[0])
+                title = f"New LLM result #{story_id}" if story_id % match_every == 0 else f"Story #{story_id}"
+                body = json.dumps({
+                    "id": story_id,
+                    "title": title,
+                    "url": f"http://127.0.0.1:{port}/article/{story_id}",
+                    "score": story_id,
+                    "time": int(time.time()) - 3600,
+                }).encode()
+                ctype = "application/json"
+            else:
+                body = b'<html><head><meta property="og:image" content="http://img.example/x.png"></head></html>'
+                ctype = "text/html"
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHNHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="Hacker News fetch benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="Injected per-request latency in seconds")
+    parser.add_argument("--stories", type=int, default=100, help="Number of stories in topstories")
+    parser.add_argument("--match-every", type=int, default=10, help="Every Nth story matches the keywords")
+    parser.add_argument("--limit", type=int, default=5, help="Number of matches to collect")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 16])
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency, args.stories, args.match_every))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    news.HN_API_BASE = f"http://127.0.0.1:{server.server_address[1]}/v0"
+
+    try:
+        baseline = None
+        for concurrency in args.concurrency:
+            # Cold caches and connections for every run
+            os.environ["DIGEST_CACHE_DIR"] = tempfile.mkdtemp(prefix="digest-bench-")
+            cache.close_caches()
+            http_client.close_session()
+            start = time.perf_counter()
+            items = news.fetch_news(keywords=KEYWORDS, limit=args.limit, concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"concurrency={concurrency:<3} items={len(items)} time={elapsed:.3f}s speedup={baseline / elapsed:.1f}x")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+End-to-end pipeline benchmark against recorded fixtures.
+
+Starts a replay server (see replay.py) and runs each source, then the whole
+pipeline (`main.py --dry-run`), in a separate process pointed at it. Each run
+starts with an empty cache unless --warm is given. Reports wall time,
+requests and injected/missing responses seen by the server, peak RSS and
+item counts.
+
+Record fixtures first:
+    python benchmarks/replay.py record --fixtures benchmarks/fixtures
+
+Usage:
+    python benchmarks/bench_pipeline.py --fixtures benchmarks/fixtures --latency 0.05 --engine threads async
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import resource
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import replay
+
+ALL = "all"
+
+def run_worker(source: str, engine: str, config_path: str, base_url: str):
+    """Runs one source (or the whole pipeline) against the replay server and prints a JSON result."""
+    import main
+    import pipeline
+
+    logging.disable(logging.CRITICAL)
+    replay.install(replay.ReplayAdapter(base_url, **replay._adapter_kwargs()))
+    config = main.load_config(config_path)
+    start = time.perf_counter()
+
+    if source == ALL:
+        sys.argv = ["main.py", "--dry-run", "--config", config_path, "--engine", engine]
+        with redirect_stdout(open(os.devnull, "w")):
+            main.main()
+        items = None
+    else:
+        jobs = [job for job in pipeline.build_jobs(config) if job[0] == source]
+        if engine == "async":
+            results = asyncio.run(pipeline.fetch_all_async(jobs, config.get("engine", {})))
+        else:
+            results = pipeline.fetch_all_threaded(jobs)
+        items = sum(len(section) for section in results.values())
+
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mib = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    print(json.dumps({"time": elapsed, "items": items, "peak_mib": peak_mib}))
+
+def measure(server: replay.ReplayServer, source: str, engine: str, config_path: str, cache_dir: str) -> dict:
+    server.reset_counts()
+    env = {**os.environ, "DIGEST_CACHE_DIR": cache_dir}
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", source, "--engine", engine,
+         "--config", config_path, "--base-url", server.base_url],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["requests"] = sum(server.requests.values())
+    result["errors"] = sum(server.errors.values())
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against recorded fixtures")
+    parser.add_argument("--fixtures", default="benchmarks/fixtures", help="Fixture directory from replay.py record")
+    parser.add_argument("--config", default="config.yaml", help="Path to configuration file")
+    parser.add_argument("--latency", type=float, default=0.05, help="Injected per-request latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 503")
+    parser.add_argument("--engine", nargs="+", choices=["threads", "async"], default=["threads"])
+    parser.add_argument("--sources", nargs="+", help="Sources to run on their own (default: every job in the config)")
+    parser.add_argument("--warm", action="store_true", help="Keep the cache between runs")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.engine[0], args.config, args.base_url)
+        return
+
+    import main
+    import pipeline
+
+    store = replay.FixtureStore(args.fixtures)
+    if not store.index:
+        parser.error(f"No fixtures in {args.fixtures}; record them with benchmarks/replay.py record")
+
+    sources = args.sources or [job[0] for job in pipeline.build_jobs(main.load_config(args.config))]
+    server = replay.ReplayServer(store, latency=args.latency, error_rate=args.error_rate).start()
+    try:
+        for engine in args.engine:
+            print(f"engine={engine} latency={args.latency}s error_rate={args.error_rate}")
+            print(f"{'source':<12} {'time':>8} {'requests':>9} {'errors':>7} {'peak':>9} {'items':>6}")
+            shared_cache = tempfile.mkdtemp(prefix="digest-bench-")
+            for source in sources + [ALL]:
+                cache_dir = shared_cache if args.warm else tempfile.mkdtemp(prefix="digest-bench-")
+                r = measure(server, source, engine, args.config, cache_dir)
+                items = "-" if r["items"] is None else r["items"]
+                print(f"{source:<12} {r['time']:>7.2f}s {r['requests']:>9} {r['errors']:>7} {r['peak_mib']:>6.1f}MiB {items:>6}")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
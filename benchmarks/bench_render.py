@@ -0,0 +1,74 @@
+"""
+Benchmarks digest rendering, separately from fetching and SMTP.
+
+Renders a synthetic digest repeatedly through emailer.render_digest and
+reports renders per second, plus the cost of the first (compiling) render.
+"cold" renders every section from its template on each pass (section caches
+bypassed); "warm" reuses the rendered sections, as a digest whose items
+have not changed does. Caches live in a temporary dir, not the working tree's.
+
+Usage:
+    python benchmarks/bench_render.py --items 10 --renders 200
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import emailer
+from fetchers import registry
+
+def make_sections(num_items: int):
+    sections = {}
+    for section in registry.sections():
+        key, kind = section.key, section.kind
+        sections[key] = [
+            {
+                "title": f"{kind.title()} item {i}",
+                "link": f"https://example.com/{key}/{i}",
+                "published": "2023-10-27",
+                "summary": "Lorem ipsum dolor sit amet. " * 20,
+                "thumbnail": f"https://example.com/{key}/{i}.jpg",
+                "source": "Example",
+                "views": 1000 * i,
+                "comments": f"https://news.ycombinator.com/item?id={i}",
+                "score": i,
+            }
+            for i in range(num_items)
+        ]
+    return sections
+
+def main():
+    parser = argparse.ArgumentParser(description="Digest render benchmark")
+    parser.add_argument("--items", type=int, default=10, help="Items per section")
+    parser.add_argument("--renders", type=int, default=200, help="Number of renders to time")
+    args = parser.parse_args()
+
+    os.environ["DIGEST_CACHE_DIR"] = tempfile.mkdtemp(prefix="digest-bench-")
+    sections = make_sections(args.items)
+
+    start = time.perf_counter()
+    html = emailer.render_digest(sections)
+    first = time.perf_counter() - start
+    print(f"first render={first * 1000:.1f}ms size={len(html) / 1024:.0f}KiB")
+
+    def timed(label: str, before_each=None):
+        start = time.perf_counter()
+        for _ in range(args.renders):
+            if before_each is not None:
+                before_each()
+            emailer.build_message(emailer.render_digest(sections), "bench@example.com", "bench@example.com")
+        elapsed = time.perf_counter() - start
+        print(f"{label:<5} renders={args.renders} time={elapsed:.3f}s rate={args.renders / elapsed:.0f}/s "
+              f"per render={elapsed / args.renders * 1000:.2f}ms")
+
+    with patch.object(emailer.cache, "get_section_cache", return_value=None):
+        timed("cold", before_each=emailer._fragments.clear)
+    timed("warm")
+
+if __name__ == "__main__":
+    main()
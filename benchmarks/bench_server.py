@@ -0,0 +1,86 @@
+"""
+Benchmarks the digest HTTP API (server.py) under concurrent load.
+
+Serves a synthetic digest from a local DigestServer and hits it from
+several client threads, each on its own keep-alive connection. Runs once
+with plain GETs (200 from the response cache) and once revalidating with
+If-None-Match (304), and reports throughput and latency percentiles.
+
+Usage:
+    python benchmarks/bench_server.py --clients 8 --requests 500 --path /digest.html
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import http.client
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import emailer
+import server
+from bench_render import make_sections
+
+def run_clients(address, path: str, clients: int, requests: int, etag=None):
+    latencies = []
+    statuses = set()
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection(*address, timeout=30)
+        headers = {"If-None-Match": etag} if etag else {}
+        mine = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            mine.append(time.perf_counter() - start)
+            statuses.add(response.status)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sorted(latencies), statuses
+
+def report(label: str, elapsed: float, latencies, statuses):
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(f"{label:<12} status={','.join(map(str, sorted(statuses)))} requests={len(latencies)} "
+          f"rate={len(latencies) / elapsed:,.0f}/s p50={percentile(0.5):.2f}ms p99={percentile(0.99):.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Digest HTTP API benchmark")
+    parser.add_argument("--items", type=int, default=10, help="Items per section")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent client connections")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per client")
+    parser.add_argument("--path", default="/digest.html", help="Endpoint to request")
+    args = parser.parse_args()
+
+    # Synthetic items repeat titles across sections; keep them all
+    daemon = SimpleNamespace(config={"dedup": {"enabled": False}}, fetched_at={"bench": time.time()}, results=make_sections(args.items))
+    view = server.DigestView(daemon, emailer)
+    digest_server = server.DigestServer(view, port=0)
+    threading.Thread(target=digest_server.serve_forever, daemon=True).start()
+
+    try:
+        start = time.perf_counter()
+        response = view.get(args.path)
+        print(f"first render={(time.perf_counter() - start) * 1000:.1f}ms size={len(response.body) / 1024:.0f}KiB")
+
+        report("GET", *run_clients(digest_server.server_address, args.path, args.clients, args.requests))
+        report("conditional", *run_clients(digest_server.server_address, args.path, args.clients, args.requests, response.etag))
+    finally:
+        digest_server.shutdown()
+        digest_server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Records real HTTP responses to a fixture directory and replays them offline.
+
+Recording runs the pipeline once (a dry run, no email) with every response
+of the shared session saved to the fixture directory. Replaying serves those
+fixtures from a local HTTP server with optional injected latency and error
+rate. The shared session is pointed at that server, so the fetchers do real
+(local) I/O with their usual pooling, retries and conditional GETs.
+
+Usage:
+    python benchmarks/replay.py record --fixtures benchmarks/fixtures
+    python benchmarks/replay.py serve --fixtures benchmarks/fixtures --latency 0.05 --error-rate 0.02
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import collections
+import urllib.parse
+from contextlib import redirect_stdout
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional
+
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetchers import http_client
+
+FIXTURE_INDEX = "index.json"
+# Response headers worth replaying; the rest are hop-specific or irrelevant to the fetchers
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+class FixtureStore:
+    """
+    A directory of recorded responses: index.json maps each URL to its status,
+    headers and body file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.index: Dict[str, dict] = {}
+        index_path = os.path.join(path, FIXTURE_INDEX)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self.index = json.load(f)
+
+    def add(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        filename = hashlib.sha1(url.encode("utf-8")).hexdigest() + ".body"
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, filename), "wb") as f:
+            f.write(body)
+        with self._lock:
+            self.index[url] = {
+                "status": status,
+                "headers": {k: v for k, v in headers.items() if k in KEPT_HEADERS},
+                "body": filename,
+            }
+
+    def lookup(self, url: str) -> Optional[dict]:
+        return self.index.get(url)
+
+    def body(self, entry: dict) -> bytes:
+        with open(os.path.join(self.path, entry["body"]), "rb") as f:
+            return f.read()
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, FIXTURE_INDEX), "w") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+
+def _adapter_kwargs() -> dict:
+    """Pool and retry settings of the shared session, so the replacement adapter behaves the same."""
+    current = http_client.get_session().get_adapter("https://")
+    return {
+        "pool_connections": http_client.POOL_CONNECTIONS,
+        "pool_maxsize": http_client.POOL_MAXSIZE,
+        "max_retries": current.max_retries,
+    }
+
+class RecordingAdapter(HTTPAdapter):
+    """Sends requests normally and saves every response to a FixtureStore."""
+
+    def __init__(self, store: FixtureStore, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        # Reading the whole body here is fine for recording; streamed readers get it from memory
+        self.store.add(request.url, response.status_code, dict(response.headers), response.content)
+        return response
+
+class ReplayAdapter(HTTPAdapter):
+    """Sends every request to a ReplayServer instead of its real host."""
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    def send(self, request, **kwargs):
+        original_url = request.url
+        request.url = f"{self.base_url}/{urllib.parse.quote(original_url, safe='')}"
+        response = super().send(request, **kwargs)
+        response.url = original_url
+        request.url = original_url
+        return response
+
+def install(adapter: HTTPAdapter):
+    """Routes all requests of the shared session through the adapter."""
+    session = http_client.get_session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+def make_handler(store: FixtureStore, latency: float, error_rate: float, rng: random.Random):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            server = self.server
+            time.sleep(latency)
+            url = urllib.parse.unquote(self.path.lstrip("/"))
+            host = urllib.parse.urlsplit(url).netloc
+            with server.lock:
+                server.requests[host] += 1
+                fail = rng.random() < error_rate
+
+            entry = store.lookup(url)
+            if fail or entry is None:
+                with server.lock:
+                    server.errors[host] += 1
+                self.send_response(503 if fail else 404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            headers = entry["headers"]
+            if headers.get("ETag") and self.headers.get("If-None-Match") == headers["ETag"]:
+                self.send_response(304)
+                self.send_header("ETag", headers["ETag"])
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            body = store.body(entry)
+            self.send_response(entry["status"])
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Serves recorded fixtures, counting requests and injected errors per original host.
+
+    Unknown URLs get a 404. With `error_rate`, that fraction of requests get a 503.
+    """
+    daemon_threads = True
+
+    def __init__(self, store: FixtureStore, latency: float = 0.0, error_rate: float = 0.0,
+                 seed: int = 0, address=("127.0.0.1", 0)):
+        super().__init__(address, make_handler(store, latency, error_rate, random.Random(seed)))
+        self.lock = threading.Lock()
+        self.requests = collections.Counter()
+        self.errors = collections.Counter()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def reset_counts(self):
+        with self.lock:
+            self.requests.clear()
+            self.errors.clear()
+
+    def start(self) -> "ReplayServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+def record(fixtures: str, config_path: str = "config.yaml", engine: str = "threads"):
+    """Runs the pipeline once against the real network, saving every response to `fixtures`."""
+    import tempfile
+    import main
+
+    # A fresh cache and item store, so nothing is served from cache or skipped as delivered
+    os.environ["DIGEST_CACHE_DIR"] = tempfile.mkdtemp(prefix="digest-record-")
+    store = FixtureStore(fixtures)
+    install(RecordingAdapter(store, **_adapter_kwargs()))
+    argv = sys.argv
+    sys.argv = ["main.py", "--dry-run", "--config", config_path, "--engine", engine]
+    try:
+        with redirect_stdout(open(os.devnull, "w")):
+            main.main()
+    finally:
+        sys.argv = argv
+        store.save()
+    print(f"Recorded {len(store.index)} responses to {fixtures}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay HTTP fixtures")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Run the pipeline against the network and save responses")
+    record_parser.add_argument("--fixtures", default="benchmarks/fixtures", help="Fixture directory")
+    record_parser.add_argument("--config", default="config.yaml", help="Path to configuration file")
+    record_parser.add_argument("--engine", choices=["threads", "async"], default="threads")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve recorded fixtures")
+    serve_parser.add_argument("--fixtures", default="benchmarks/fixtures", help="Fixture directory")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--latency", type=float, default=0.0, help="Injected per-request latency in seconds")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 503")
+    serve_parser.add_argument("--seed", type=int, default=0, help="Seed for the injected errors")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.fixtures, args.config, args.engine)
+    else:
+        store = FixtureStore(args.fixtures)
+        server = ReplayServer(store, args.latency, args.error_rate, args.seed, address=("127.0.0.1", args.port))
+        print(f"Replaying {len(store.index)} responses on {server.base_url} (URLs are /<quoted original URL>)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
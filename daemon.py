@@ -0,0 +1,212 @@
+import os
+import time
+import pickle
+import signal
+import datetime
+import threading
+import logging
+from datetime import timezone
+from typing import Dict, List, Optional
+from fetchers import cache, metrics, registry, store
+import pipeline
+
+logger = logging.getLogger(__name__)
+
+# Send time (UTC) when `daemon.send_at` is not set; matches the GitHub Actions cron
+DEFAULT_SEND_AT = "02:00"
+SNAPSHOT_FILE = "daemon_snapshot.pickle"
+# Longest wait between checks of the schedule
+MAX_SLEEP = 3600
+# Items kept per section between sends when `daemon.max_items` is not set
+DEFAULT_MAX_ITEMS = 20
+
+def next_send_time(send_at: str, now: float) -> float:
+    """Returns the next time after `now` at which the clock (UTC) reads `send_at` ("HH:MM")."""
+    hour, minute = (int(part) for part in send_at.split(":"))
+    current = datetime.datetime.fromtimestamp(now, timezone.utc)
+    target = current.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target.timestamp() <= now:
+        target += datetime.timedelta(days=1)
+    return target.timestamp()
+
+class DigestDaemon:
+    """
+    Keeps the digest process running between sends.
+
+    Each fetch job is refreshed on its source's schedule (`refresh_minutes`
+    in fetchers/registry.py, overridable under `daemon.refresh_minutes`).
+    Refreshed items are merged into a pool of candidates from earlier
+    refreshes, newest first and up to `daemon.max_items` per section, so a
+    story that was matched in the morning and has since dropped out of its
+    feed can still make the digest. The pool is kept in memory and in a
+    snapshot under the cache dir. At `daemon.send_at` the digest is
+    assembled from the pool alone, so sending doesn't wait on any upstream:
+    each section is sorted and trimmed to its source's limit as a single
+    fetch would be (`select` in fetchers/registry.py), rendered, and the
+    pool of every section sent is then pruned. The HTTP session, caches and
+    compiled templates stay warm across refreshes.
+
+    A restarted daemon reloads the snapshot and only refetches sources whose
+    data is older than their interval. With `send=False` it only keeps the
+    items fresh (for `main.py --serve`); with `dry_run` the digest is printed
+    instead of sent.
+    """
+
+    def __init__(self, config: Dict, jobs: List[tuple], engine: str = "threads",
+                 recipient_entries: Optional[List] = None, item_store=None, emailer=None,
+                 send: bool = True, dry_run: bool = False):
+        self.config = config
+        self.jobs = jobs
+        self.engine = engine
+        self.recipient_entries = recipient_entries or []
+        self.item_store = item_store
+        self.emailer = emailer
+        self.send_enabled = send
+        self.dry_run = dry_run
+        self.skip_delivered = config.get("database", {}).get("skip_delivered", True)
+        self.stop_event = threading.Event()
+
+        daemon_conf = config.get("daemon", {})
+        self.send_at = daemon_conf.get("send_at", DEFAULT_SEND_AT)
+        self.max_items = daemon_conf.get("max_items", DEFAULT_MAX_ITEMS)
+        overrides = daemon_conf.get("refresh_minutes") or {}
+        self.intervals = {}
+        for name, *_ in jobs:
+            source = registry.find_source(name)
+            minutes = overrides.get(name, source.refresh_minutes if source else 180)
+            self.intervals[name] = minutes * 60
+
+        self.results = {section.key: [] for section in registry.sections()}
+        self.fetched_at: Dict[str, float] = {}
+        self.sent_at: Optional[float] = None
+        self._load_snapshot()
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(cache.cache_dir(), SNAPSHOT_FILE)
+
+    def _load_snapshot(self):
+        try:
+            with open(self._snapshot_path(), "rb") as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Discarding unreadable daemon snapshot: {e}")
+            return
+        self.results.update(snapshot.get("results", {}))
+        self.fetched_at.update(snapshot.get("fetched_at", {}))
+        logger.info(f"Loaded snapshot with {sum(len(items) for items in self.results.values())} items")
+
+    def _save_snapshot(self):
+        path = self._snapshot_path()
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"results": self.results, "fetched_at": self.fetched_at}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not save daemon snapshot: {e}")
+
+    def due_jobs(self, now: float) -> List[tuple]:
+        """Jobs whose data is older than their refresh interval (or missing)."""
+        return [job for job in self.jobs if now - self.fetched_at.get(job[0], 0) >= self.intervals[job[0]]]
+
+    def next_refresh_time(self) -> float:
+        """When the next job falls due."""
+        return min((self.fetched_at.get(name, 0) + self.intervals[name] for name, *_ in self.jobs), default=float("inf"))
+
+    def _merge(self, kept: List[Dict], fetched: List[Dict]) -> List[Dict]:
+        # The new fetch comes first and its copy of an item (fresher score, views...) wins
+        links = {store.normalize_link(item['link']) for item in fetched}
+        merged = fetched + [item for item in kept if store.normalize_link(item['link']) not in links]
+        return merged[:self.max_items]
+
+    def refresh(self, jobs: List[tuple], now: float):
+        """Fetches the given jobs and merges the new items into their sections."""
+        logger.info(f"Refreshing {', '.join(job[0] for job in jobs)}")
+        # Sections are rendered at send time, from the merged pool, not as each fetch completes
+        fetched = pipeline.fetch(self.config, jobs, self.engine, pipeline.make_section_handler(self.item_store, skip_delivered=self.skip_delivered))
+        for name, *_ in jobs:
+            source = registry.find_source(name)
+            keys = [section.key for section in source.sections] if source else [name]
+            for key in keys:
+                self.results[key] = self._merge(self.results.get(key, []), fetched.get(key, []))
+            self.fetched_at[name] = now
+        self._save_snapshot()
+
+    def _select(self, results: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+        # Orders and trims each section's pool the way one fetch with the job's kwargs would
+        selected = dict(results)
+        for name, _, _, kwargs in self.jobs:
+            source = registry.find_source(name)
+            if source is None or source.select is None:
+                continue
+            for section in source.sections:
+                if section.key in selected:
+                    selected[section.key] = source.select(kwargs, section.key, selected[section.key])
+        return selected
+
+    def _prune(self, covered: Dict[str, List[Dict]]):
+        # Whatever this digest covered (sent, already delivered or deduplicated) is not kept for the next one
+        links = {store.normalize_link(item['link']) for items in covered.values() for item in items}
+        for key, items in self.results.items():
+            self.results[key] = [item for item in items if store.normalize_link(item['link']) not in links]
+
+    def send(self):
+        """Assembles the digest from the items fetched so far and sends it (or prints it in dry-run mode)."""
+        logger.info("Assembling digest from prefetched items...")
+        covered = {key: list(items) for key, items in self.results.items()}
+        results = covered
+        if self.item_store is not None and self.skip_delivered:
+            # Items may have gone out in an earlier digest since they were fetched
+            results = {key: self.item_store.undelivered(items) for key, items in results.items()}
+        results = self._select(results)
+        results, duplicates = pipeline.remove_duplicates(self.config, results)
+
+        if self.dry_run or self.emailer is None:
+            pipeline.print_preview(results)
+            sent = True
+        else:
+            recipients = pipeline.deliver(self.emailer, self.config, results, duplicates, self.recipient_entries, self.item_store)
+            # Sections no recipient received are kept for the next digest
+            received = pipeline.sent_sections(results, recipients)
+            covered = {key: items for key, items in covered.items() if key in received}
+            sent = bool(recipients)
+
+        # A failed send keeps everything for the next attempt
+        if sent:
+            self._prune(covered)
+            self.sent_at = time.time()
+            self._save_snapshot()
+
+        pipeline.write_report(self.config.get("report", {}))
+        # Each report covers the refreshes since the previous send
+        metrics.reset()
+
+    def run_once(self, now: float, next_send: float) -> float:
+        """Does whatever is due at `now`; returns the next send time."""
+        # Send first: the digest never waits on a refresh that happens to be due too
+        if now >= next_send:
+            self.send()
+            next_send = next_send_time(self.send_at, now)
+        due = self.due_jobs(now)
+        if due:
+            self.refresh(due, now)
+        return next_send
+
+    def run(self):
+        """Runs until SIGINT/SIGTERM."""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: self.stop_event.set())
+
+        if self.send_enabled:
+            next_send = next_send_time(self.send_at, time.time())
+            logger.info(f"Daemon started; next digest at {datetime.datetime.fromtimestamp(next_send, timezone.utc):%Y-%m-%d %H:%M} UTC")
+        else:
+            next_send = float("inf")
+            logger.info("Daemon started; refreshing sources only")
+        while not self.stop_event.is_set():
+            next_send = self.run_once(time.time(), next_send)
+            wake_at = min(self.next_refresh_time(), next_send)
+            self.stop_event.wait(min(MAX_SLEEP, max(1.0, wake_at - time.time())))
+        logger.info("Daemon stopped")
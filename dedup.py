@@ -0,0 +1,120 @@
+import re
+import random
+import zlib
+import logging
+from typing import Dict, List, Optional, Tuple
+from fetchers import cache, store
+
+logger = logging.getLogger(__name__)
+
+# MinHash signature: NUM_BANDS bands of ROWS_PER_BAND hashes each.
+# Titles with Jaccard similarity around (1 / NUM_BANDS) ** (1 / ROWS_PER_BAND) ~ 0.5
+# or above share a band with high probability and become candidates; candidates
+# are then compared exactly.
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+NUM_HASHES = NUM_BANDS * ROWS_PER_BAND
+
+DEFAULT_TITLE_THRESHOLD = 0.6
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0)
+_HASH_PARAMS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_HASHES)]
+
+# Words, keeping versions and amounts whole: "gpt-4o", "3.5", "$2b"
+_WORD = re.compile(r"[a-z0-9$]+(?:[.\-][a-z0-9]+)*")
+
+def canonical_link(link: str) -> str:
+    """
+    Returns the key used to match links across sources.
+
+    Uses the canonical URL recorded when the page's og:image was fetched
+    (which covers redirects and <link rel="canonical">), then normalizes it.
+    """
+    metadata_cache = cache.get_metadata_cache()
+    if metadata_cache is not None:
+        link = metadata_cache.canonical(link) or link
+    return store.normalize_link(link)
+
+def title_shingles(title: str) -> set:
+    """
+    The words of a title, ignoring case and punctuation.
+
+    Words rather than character n-grams: headlines are short, and two
+    stories differing in one token ("GPT-5" vs "GPT-4o", "$2B" vs "$4B")
+    share most of their character n-grams but only most of their words.
+    """
+    return set(_WORD.findall(title.lower()))
+
+def minhash(shingles: set) -> Tuple[int, ...]:
+    """Computes the MinHash signature of a set of shingles."""
+    hashed = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashed) for a, b in _HASH_PARAMS)
+
+def jaccard(a: set, b: set) -> float:
+    """Exact Jaccard similarity of two shingle sets."""
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+def dedup_sections(sections: Dict[str, List[Dict]], title_threshold: float = DEFAULT_TITLE_THRESHOLD
+                   ) -> Tuple[Dict[str, List[Dict]], List[Dict], List[Dict]]:
+    """
+    Removes items that duplicate an earlier item, within and across sections.
+
+    Two items are duplicates if their links share a canonical form, or if
+    the Jaccard similarity of their titles' words is at least
+    `title_threshold`. The first occurrence wins, in section order then item
+    order. Similar titles are found through MinHash band buckets and then
+    compared exactly, so the cost grows linearly with the number of items.
+
+    Args:
+        sections (Dict[str, List[Dict]]): Items by section name, in priority order.
+        title_threshold (float): Minimum title similarity to treat items as duplicates (default: 0.6).
+
+    Returns:
+        Tuple[Dict[str, List[Dict]], List[Dict], List[Dict]]: The deduplicated sections, the
+            items removed for repeating a link, and the items removed for a similar title.
+    """
+    seen_links = set()
+    kept_shingles: List[set] = []
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    result = {}
+    same_link = []
+    similar_title = []
+
+    for name, items in sections.items():
+        result[name] = []
+        for item in items:
+            link_key = canonical_link(item['link'])
+            if link_key in seen_links:
+                same_link.append(item)
+                continue
+
+            duplicate_of: Optional[int] = None
+            shingles = title_shingles(item.get('title') or "")
+            signature = minhash(shingles) if shingles else None
+            bands = []
+            if signature is not None:
+                bands = [(band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]) for band in range(NUM_BANDS)]
+                for key in bands:
+                    for candidate in buckets.get(key, []):
+                        if jaccard(shingles, kept_shingles[candidate]) >= title_threshold:
+                            duplicate_of = candidate
+                            break
+                    if duplicate_of is not None:
+                        break
+
+            if duplicate_of is not None:
+                similar_title.append(item)
+                continue
+
+            seen_links.add(link_key)
+            result[name].append(item)
+            if signature is not None:
+                index = len(kept_shingles)
+                kept_shingles.append(shingles)
+                for key in bands:
+                    buckets.setdefault(key, []).append(index)
+
+    if same_link or similar_title:
+        logger.info(f"Removed {len(same_link)} items repeating a link and {len(similar_title)} with a similar title")
+    return result, same_link, similar_title
@@ -1,225 +1,330 @@
 import smtplib
 import os
+import json
+import time
+import hashlib
+import threading
+import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+from markupsafe import Markup
 from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+from fetchers import cache, metrics, registry
 
-def send_email(ai_papers, sys_papers, ai_videos, sys_videos, news, rss, eng_blogs, recipient_email):
+logger = logging.getLogger(__name__)
+
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 587
+SMTP_TIMEOUT = 30
+# Pause between messages in a batch; keeps well under Gmail's per-minute sending limits
+DEFAULT_SEND_INTERVAL = 1.0
+# Reconnects allowed per message when the server drops the session
+MAX_RECONNECTS = 2
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+DIGEST_TEMPLATE = "digest.html"
+MACROS_TEMPLATE = "macros.html"
+# Templates whose output is HTML-escaped; item titles and links come from third-party feeds
+AUTOESCAPE_EXTENSIONS = ("html",)
+# Escaping is compiled into the bytecode, so files compiled without it must not be loaded
+BYTECODE_PATTERN = "__jinja2_escaped_%s.cache"
+
+_environment = None
+_environment_lock = threading.Lock()
+
+_template_fingerprint = None
+# Latest (content key, html) rendered for each section in this process
+_fragments: Dict[str, tuple] = {}
+
+def get_environment() -> Environment:
     """
-    Sends the daily digest email.
+    Returns the shared Jinja2 environment for the digest templates.
+
+    Compiled templates are kept in the environment's cache for the life of the
+    process, and their bytecode is cached under the cache dir so later runs
+    skip compilation too. Values inserted into the templates are HTML-escaped.
+    """
+    global _environment
+    if _environment is None:
+        with _environment_lock:
+            if _environment is None:
+                bytecode_cache = None
+                try:
+                    bytecode_dir = os.path.join(cache.cache_dir(), "jinja")
+                    os.makedirs(bytecode_dir, exist_ok=True)
+                    bytecode_cache = FileSystemBytecodeCache(bytecode_dir, pattern=BYTECODE_PATTERN)
+                except OSError as e:
+                    logger.warning(f"Template bytecode cache unavailable, continuing without it: {e}")
+                _environment = Environment(
+                    loader=FileSystemLoader(TEMPLATE_DIR),
+                    bytecode_cache=bytecode_cache,
+                    autoescape=select_autoescape(AUTOESCAPE_EXTENSIONS),
+                    trim_blocks=True,
+                    lstrip_blocks=True,
+                    auto_reload=False
+                )
+    return _environment
+
+def _fingerprint() -> str:
+    """Hash of every template file and the escaping setting, so edited templates never match a cached section."""
+    global _template_fingerprint
+    if _template_fingerprint is None:
+        digest = hashlib.sha1(f"autoescape:{','.join(AUTOESCAPE_EXTENSIONS)}".encode("utf-8"))
+        for root, dirs, files in sorted(os.walk(TEMPLATE_DIR)):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, TEMPLATE_DIR).encode("utf-8"))
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+        _template_fingerprint = digest.hexdigest()
+    return _template_fingerprint
+
+def _section_key(section: registry.Section, items: List[Dict]) -> str:
+    payload = json.dumps(
+        [section.title, section.kind, [dict(item) for item in items]],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha1(f"{_fingerprint()}:{payload}".encode("utf-8")).hexdigest()
+
+def render_section(section: registry.Section, items: List[Dict]) -> str:
+    """
+    Renders one digest section, reusing an earlier rendering of the same items.
+
+    Renderings are kept in memory for the life of the process and in the
+    section cache between runs, keyed by a hash of the templates and items.
+    main calls this as each source's fetch completes, so most sections are
+    ready before the last fetch returns.
 
     Args:
-        ai_papers (list): List of AI paper dictionaries.
-        sys_papers (list): List of System Design paper dictionaries.
-        ai_videos (list): List of AI video dictionaries.
-        sys_videos (list): List of System Design video dictionaries.
-        news (list): List of news dictionaries.
-        rss (list): List of RSS dictionaries.
-        eng_blogs (list): List of Engineering Blog dictionaries.
-        recipient_email (str): The email address to send to.
-    """
-    email_user = os.getenv("EMAIL_USER")
-    email_pass = os.getenv("EMAIL_PASS")
-
-    if not email_user or not email_pass:
-        print("Email credentials not found. Skipping email sending.")
-        return
-
-    # HTML Template
-    template_str = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body { font-family: 'Helvetica Neue', Helvetica, Arial, sans-serif; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; padding: 20px; }
-            h1 { color: #2c3e50; border-bottom: 2px solid #eee; padding-bottom: 10px; text-align: center; }
-            h2 { color: #3498db; margin-top: 30px; border-left: 5px solid #3498db; padding-left: 10px; }
-
-            .item { margin-bottom: 25px; padding: 15px; background: #fff; border: 1px solid #e1e1e1; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05); }
-            .item h3 { margin-top: 0; margin-bottom: 10px; }
-            .item a { color: #e74c3c; text-decoration: none; font-weight: bold; }
-            .meta { font-size: 0.85em; color: #7f8c8d; margin-top: 5px; }
-
-            /* Papers */
-            details { margin-top: 10px; cursor: pointer; }
-            summary { font-weight: bold; color: #555; outline: none; }
-            .abstract { margin-top: 10px; font-size: 0.95em; color: #444; background: #f9f9f9; padding: 10px; border-radius: 4px; }
-
-            /* Videos & News with thumbnails */
-            .media-content { display: flex; gap: 15px; align-items: start; }
-            .thumbnail { width: 160px; height: 90px; object-fit: cover; border-radius: 4px; flex-shrink: 0; background: #eee; }
-            .text-content { flex-grow: 1; }
-
-            @media (max-width: 600px) {
-                .media-content { flex-direction: column; }
-                .thumbnail { width: 100%; height: auto; margin-bottom: 10px; }
-            }
-
-            .footer { margin-top: 40px; font-size: 0.8em; text-align: center; color: #999; border-top: 1px solid #eee; padding-top: 20px; }
-        </style>
-    </head>
-    <body>
-        <h1>Daily AI Digest - {{ date }}</h1>
-
-        <h2>Latest Research Papers (arXiv)</h2>
-        {% for paper in ai_papers %}
-        <div class="item">
-            <h3><a href="{{ paper.link }}">{{ paper.title }}</a></h3>
-            <div class="meta">Published: {{ paper.published }}</div>
-            <details>
-                <summary>Read Abstract</summary>
-                <div class="abstract">{{ paper.summary }}</div>
-            </details>
-        </div>
-        {% endfor %}
-
-        <h2>System Design Papers (Random Selection)</h2>
-        {% for paper in sys_papers %}
-        <div class="item">
-            <h3><a href="{{ paper.link }}">{{ paper.title }}</a></h3>
-            <div class="meta">Published: {{ paper.published }}</div>
-            <details>
-                <summary>Read Abstract</summary>
-                <div class="abstract">{{ paper.summary }}</div>
-            </details>
-        </div>
-        {% endfor %}
-
-        <h2>Trending AI Videos</h2>
-        {% for video in ai_videos %}
-        <div class="item">
-            <div class="media-content">
-                {% if video.thumbnail %}
-                <a href="{{ video.link }}">
-                    <img src="{{ video.thumbnail }}" class="thumbnail" alt="Video Thumbnail">
-                </a>
-                {% endif %}
-                <div class="text-content">
-                    <h3><a href="{{ video.link }}">{{ video.title }}</a></h3>
-                    <div class="meta">
-                        Source: {{ video.source }}
-                        {% if video.views %} • {{ "{:,}".format(video.views) }} views {% endif %}
-                    </div>
-                </div>
-            </div>
-        </div>
-        {% endfor %}
-
-        <h2>System Design Videos</h2>
-        {% for video in sys_videos %}
-        <div class="item">
-            <div class="media-content">
-                {% if video.thumbnail %}
-                <a href="{{ video.link }}">
-                    <img src="{{ video.thumbnail }}" class="thumbnail" alt="Video Thumbnail">
-                </a>
-                {% endif %}
-                <div class="text-content">
-                    <h3><a href="{{ video.link }}">{{ video.title }}</a></h3>
-                    <div class="meta">
-                        Source: {{ video.source }}
-                        {% if video.views %} • {{ "{:,}".format(video.views) }} views {% endif %}
-                    </div>
-                </div>
-            </div>
-        </div>
-        {% endfor %}
-
-        <h2>Engineering Blogs</h2>
-        {% for item in eng_blogs %}
-        <div class="item">
-            <div class="media-content">
-                {% if item.thumbnail %}
-                <a href="{{ item.link }}">
-                    <img src="{{ item.thumbnail }}" class="thumbnail" alt="Thumbnail" onerror="this.style.display='none'">
-                </a>
-                {% endif %}
-                <div class="text-content">
-                    <h3><a href="{{ item.link }}">{{ item.title }}</a></h3>
-                    <div class="meta">
-                        Source: {{ item.source }} | {{ item.published }}
-                    </div>
-                </div>
-            </div>
-        </div>
-        {% endfor %}
-
-        <h2>Hacker News Top AI Stories</h2>
-        {% for item in news %}
-        <div class="item">
-            <div class="media-content">
-                {% if item.thumbnail %}
-                <a href="{{ item.link }}">
-                    <img src="{{ item.thumbnail }}" class="thumbnail" alt="Article Thumbnail" onerror="this.style.display='none'">
-                </a>
-                {% endif %}
-                <div class="text-content">
-                    <h3><a href="{{ item.link }}">{{ item.title }}</a></h3>
-                    <div class="meta">
-                        <a href="{{ item.comments }}" style="color: #7f8c8d; font-weight: normal; text-decoration: underline;">View Comments</a>
-                        | Score: {{ item.score }}
-                    </div>
-                </div>
-            </div>
-        </div>
-        {% endfor %}
-
-        <h2>Latest AI Blog Posts</h2>
-        {% for item in rss %}
-        <div class="item">
-            <div class="media-content">
-                {% if item.thumbnail %}
-                <a href="{{ item.link }}">
-                    <img src="{{ item.thumbnail }}" class="thumbnail" alt="Thumbnail" onerror="this.style.display='none'">
-                </a>
-                {% endif %}
-                <div class="text-content">
-                    <h3><a href="{{ item.link }}">{{ item.title }}</a></h3>
-                    <div class="meta">
-                        Source: {{ item.source }} | {{ item.published }}
-                    </div>
-                </div>
-            </div>
-        </div>
-        {% endfor %}
-
-        <div class="footer">
-            Generated by Open Source AI Digest Bot
-            <p>Generated by automated agent • <a href="#">Unsubscribe</a></p>
-        </div>
-    </body>
-    </html>
-    """
-
-    template = Template(template_str)
-    html_content = template.render(
-        date=datetime.now().strftime("%Y-%m-%d"),
-        ai_papers=ai_papers,
-        sys_papers=sys_papers,
-        ai_videos=ai_videos,
-        sys_videos=sys_videos,
-        news=news,
-        rss=rss,
-        eng_blogs=eng_blogs
+        section (registry.Section): The section.
+        items (List[Dict]): Its items.
+
+    Returns:
+        str: The section's HTML fragment.
+    """
+    key = _section_key(section, items)
+    latest = _fragments.get(section.key)
+    if latest is not None and latest[0] == key:
+        metrics.count("cache.section.hit")
+        return latest[1]
+
+    section_cache = cache.get_section_cache()
+    html = section_cache.get(key) if section_cache is not None else None
+    if html is not None:
+        metrics.count("cache.section.hit")
+    else:
+        metrics.count("cache.section.miss")
+        with metrics.stage("email.render_section"):
+            macros = get_environment().get_template(MACROS_TEMPLATE).module
+            html = str(macros.section(section.title, items, section.kind))
+        if section_cache is not None:
+            section_cache.set(key, html)
+
+    _fragments[section.key] = (key, html)
+    return html
+
+def render_digest(sections: Dict[str, List[Dict]], date: Optional[str] = None) -> str:
+    """
+    Renders the digest HTML without sending it.
+
+    Sections come from render_section (so unchanged ones are not rendered
+    again) and are assembled in display order. Only the sections present in
+    `sections` are rendered; one present with no items keeps its heading.
+
+    Args:
+        sections (Dict[str, List[Dict]]): Items by section key (see fetchers.registry).
+        date (Optional[str]): Date shown in the heading (default: today).
+
+    Returns:
+        str: The HTML document.
+    """
+    template = get_environment().get_template(DIGEST_TEMPLATE)
+    return template.render(
+        date=date or datetime.now().strftime("%Y-%m-%d"),
+        fragments=[
+            # Already escaped when the section was rendered
+            Markup(render_section(section, sections[section.key]))
+            for section in registry.display_sections() if section.key in sections
+        ]
     )
 
+def build_message(html_content: str, sender: str, recipient_email: str, date: Optional[str] = None) -> MIMEMultipart:
+    """
+    Wraps rendered digest HTML in a MIME message.
+
+    Args:
+        html_content (str): The rendered digest.
+        sender (str): The From address.
+        recipient_email (str): The To address.
+        date (Optional[str]): Date shown in the subject (default: today).
+
+    Returns:
+        MIMEMultipart: The message, ready to send.
+    """
     msg = MIMEMultipart()
-    msg['From'] = email_user
+    msg['From'] = sender
     msg['To'] = recipient_email
-    msg['Subject'] = f"Daily AI Digest - {datetime.now().strftime('%Y-%m-%d')}"
+    msg['Subject'] = f"Daily AI Digest - {date or datetime.now().strftime('%Y-%m-%d')}"
 
     msg.attach(MIMEText(html_content, 'html'))
+    return msg
+
+class Recipient(NamedTuple):
+    """A digest recipient; `sections` limits the digest to those section keys (None means all)."""
+    email: str
+    sections: Optional[tuple] = None
 
+def parse_recipients(entries: Iterable[Union[str, dict]]) -> List[Recipient]:
+    """
+    Builds recipients from config entries.
+
+    Each entry is an address, a comma-separated list of addresses, or a dict
+    with `email` and an optional `sections` list.
+    """
+    recipients = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            sections = entry.get("sections")
+            recipients.append(Recipient(entry["email"].strip(), tuple(sections) if sections else None))
+        else:
+            recipients.extend(Recipient(address.strip()) for address in str(entry).split(",") if address.strip())
+    return recipients
+
+class SMTPSession:
+    """
+    One authenticated SMTP connection reused for a batch of messages.
+
+    The connection is opened lazily and reopened if the server drops it.
+    Messages are spaced at least `interval` seconds apart.
+    """
+
+    def __init__(self, user: str, password: str, host: str = SMTP_HOST, port: int = SMTP_PORT,
+                 starttls: bool = True, interval: float = DEFAULT_SEND_INTERVAL, timeout: float = SMTP_TIMEOUT):
+        self.user = user
+        self.password = password
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.interval = interval
+        self.timeout = timeout
+        self.server: Optional[smtplib.SMTP] = None
+        self._last_send = None
+
+    def connect(self):
+        self.close()
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+
+    def send(self, msg: MIMEMultipart):
+        """Sends a message, reconnecting up to MAX_RECONNECTS times if the connection drops."""
+        if self._last_send is not None:
+            wait = self.interval - (time.monotonic() - self._last_send)
+            if wait > 0:
+                time.sleep(wait)
+
+        for attempt in range(MAX_RECONNECTS + 1):
+            try:
+                if self.server is None:
+                    self.connect()
+                self.server.send_message(msg)
+                break
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                self.server = None
+                if attempt == MAX_RECONNECTS:
+                    raise
+                logger.warning(f"SMTP connection lost ({e}), reconnecting")
+        self._last_send = time.monotonic()
+
+    def close(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except Exception:
+            self.server.close()
+        self.server = None
+
+def send_batch(sections: Dict[str, List[Dict]], recipients: List[Recipient], user: Optional[str] = None,
+               password: Optional[str] = None, host: str = SMTP_HOST, port: int = SMTP_PORT,
+               starttls: bool = True, interval: float = DEFAULT_SEND_INTERVAL) -> List[Recipient]:
+    """
+    Sends the digest to every recipient over one SMTP session.
+
+    Each distinct section selection is rendered once, and recipients sharing
+    it get the same HTML. A failure for one recipient doesn't stop the rest.
+
+    Args:
+        sections (Dict[str, List[Dict]]): Items by section key (see fetchers.registry).
+        recipients (List[Recipient]): Who to send to, with optional section preferences.
+        user (Optional[str]): SMTP user and From address (default: EMAIL_USER).
+        password (Optional[str]): SMTP password (default: EMAIL_PASS).
+        host (str): SMTP server (default: SMTP_HOST).
+        port (int): SMTP port (default: SMTP_PORT).
+        starttls (bool): Upgrade the connection with STARTTLS before login (default: True).
+        interval (float): Minimum seconds between messages (default: DEFAULT_SEND_INTERVAL).
+
+    Returns:
+        List[Recipient]: The recipients the digest was sent to, with the sections each received.
+    """
+    user = user or os.getenv("EMAIL_USER")
+    password = password or os.getenv("EMAIL_PASS")
+
+    if not user or not password:
+        print("Email credentials not found. Skipping email sending.")
+        return []
+
+    date = datetime.now().strftime("%Y-%m-%d")
+    rendered: Dict[Optional[tuple], str] = {}
+    sent = []
+    session = SMTPSession(user, password, host=host, port=port, starttls=starttls, interval=interval)
     try:
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(email_user, email_pass)
-        server.send_message(msg)
-        server.quit()
+        for recipient in recipients:
+            if recipient.sections not in rendered:
+                selected = sections if recipient.sections is None else {
+                    key: items for key, items in sections.items() if key in recipient.sections
+                }
+                with metrics.stage("email.render"):
+                    rendered[recipient.sections] = render_digest(selected, date=date)
+
+            msg = build_message(rendered[recipient.sections], user, recipient.email, date=date)
+            try:
+                with metrics.stage("email.smtp"):
+                    session.send(msg)
+                sent.append(recipient)
+                metrics.count("email.sent")
+            except Exception as e:
+                logger.error(f"Failed to send email to {recipient.email}: {e}")
+    finally:
+        session.close()
+
+    logger.info(f"Sent {len(sent)} of {len(recipients)} emails ({len(rendered)} variants rendered)")
+    return sent
+
+def send_email(sections: Dict[str, List[Dict]], recipient_email: str) -> bool:
+    """
+    Sends the daily digest email.
+
+    Args:
+        sections (Dict[str, List[Dict]]): Items by section key (see fetchers.registry).
+        recipient_email (str): The email address to send to; a comma-separated list sends to each.
+
+    Returns:
+        bool: True if the email was sent (to at least one recipient).
+    """
+    sent = send_batch(sections, parse_recipients([recipient_email]))
+    if sent:
         print("Email sent successfully!")
-    except Exception as e:
-        print(f"Failed to send email: {e}")
+    return bool(sent)
 
 if __name__ == "__main__":
     print("Emailer module loaded.")
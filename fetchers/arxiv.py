@@ -1,24 +1,22 @@
-import feedparser
 import urllib.parse
 import random
+import asyncio
+import datetime
 import logging
 from typing import List, Dict, Optional
+from fetchers.engine import AsyncEngine, ensure_engine, run_sync
+from fetchers.deadline import Deadline
+from fetchers import store, metrics
+from fetchers.items import Paper
 
 logger = logging.getLogger(__name__)
 
-def fetch_papers(topics: List[str] = ["cs.AI"], limit: int = 5, sort_mode: str = "date") -> List[Dict]:
-    """
-    Fetches latest papers from arXiv for a given list of topics.
+BASE_URL = "http://export.arxiv.org/api/query?"
 
-    Args:
-        topics (List[str]): List of arXiv categories to search for (default: ["cs.AI"]).
-        limit (int): The number of papers to fetch (default: 5).
-        sort_mode (str): Sorting mode. "date" (default) or "random".
+# arXiv's API terms ask for no more than one request every three seconds
+REQUEST_DELAY = 3
 
-    Returns:
-        List[Dict]: A list of dictionaries containing paper details.
-    """
-    base_url = "http://export.arxiv.org/api/query?"
+def _build_query_url(topics: List[str], start: int, max_results: int) -> str:
     # Join topics with OR
     search_query = " OR ".join([f"cat:{topic}" for topic in topics])
 
@@ -26,39 +24,216 @@ def fetch_papers(topics: List[str] = ["cs.AI"], limit: int = 5, sort_mode: str =
     # or use quote with safe=':+'.
     encoded_query = urllib.parse.quote(search_query, safe=':+')
 
-    # If random, fetch more results to sample from
-    max_results = limit * 5 if sort_mode == "random" else limit
-
     query_params = {
-        "start": 0,
+        "start": start,
         "max_results": max_results,
         "sortBy": "submittedDate",
         "sortOrder": "descending"
     }
 
-    url = f"{base_url}search_query={encoded_query}&{urllib.parse.urlencode(query_params)}"
+    return f"{BASE_URL}search_query={encoded_query}&{urllib.parse.urlencode(query_params)}"
+
+def _entry_to_paper(entry) -> Paper:
+    return Paper(
+        title=entry.title.replace('\n', ' ').strip(),
+        link=entry.link,
+        summary=entry.summary.replace('\n', ' ').strip(),
+        published=entry.published
+    )
+
+def _entry_categories(entry) -> List[str]:
+    """Returns the entry's primary category followed by its other tags."""
+    categories = []
+    primary = entry.get('arxiv_primary_category')
+    if primary and primary.get('term'):
+        categories.append(primary['term'])
+    for tag in entry.get('tags') or []:
+        term = tag.get('term')
+        if term and term not in categories:
+            categories.append(term)
+    return categories
+
+def _assign_section(categories: List[str], sections: Dict[str, Dict]) -> Optional[str]:
+    """Picks the section for the primary category, falling back to any matching tag."""
+    if not categories:
+        return None
+    for name, spec in sections.items():
+        if categories[0] in spec.get("topics", []):
+            return name
+    for name, spec in sections.items():
+        if set(categories) & set(spec.get("topics", [])):
+            return name
+    return None
+
+def _seconds_since_midnight() -> float:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
+
+async def fetch_papers_async(topics: List[str] = ["cs.AI"], limit: int = 5, sort_mode: str = "date",
+                             deadline: Optional[float] = None, engine: Optional[AsyncEngine] = None) -> List[Paper]:
+    """
+    Fetches latest papers from arXiv for a given list of topics.
+
+    Args:
+        topics (List[str]): List of arXiv categories to search for (default: ["cs.AI"]).
+        limit (int): The number of papers to fetch (default: 5).
+        sort_mode (str): Sorting mode. "date" (default) or "random".
+        deadline (Optional[float]): Time budget in seconds (default: None, unlimited).
+        engine (Optional[AsyncEngine]): Engine to run requests on; a temporary one is used if None.
+
+    Returns:
+        List[Paper]: The papers.
+    """
+    # If random, fetch more results to sample from
+    max_results = limit * 5 if sort_mode == "random" else limit
+
+    url = _build_query_url(topics, 0, max_results)
 
     try:
-        feed = feedparser.parse(url)
+        async with ensure_engine(engine, concurrency=1) as engine:
+            with metrics.stage("arxiv.query"):
+                feed = await asyncio.wait_for(engine.fetch_feed(url, timeout=deadline), timeout=deadline)
+    except asyncio.TimeoutError:
+        logger.error(f"arXiv deadline of {deadline}s reached")
+        return []
     except Exception as e:
         logger.error(f"Error fetching arXiv feed: {e}")
         return []
 
     papers = []
     for entry in feed.entries:
-        paper = {
-            "title": entry.title.replace('\n', ' ').strip(),
-            "summary": entry.summary.replace('\n', ' ').strip(),
-            "link": entry.link,
-            "published": entry.published
-        }
-        papers.append(paper)
+        papers.append(_entry_to_paper(entry))
 
     if sort_mode == "random" and len(papers) > limit:
         return random.sample(papers, limit)
 
     return papers[:limit]
 
+async def fetch_sections_async(sections: Dict[str, Dict], page_size: int = 100, max_pages: int = 3,
+                               deadline: Optional[float] = None, skip_delivered: bool = False,
+                               engine: Optional[AsyncEngine] = None) -> Dict[str, List[Paper]]:
+    """
+    Fetches papers for several sections with one combined arXiv query.
+
+    All sections' topics are OR-ed into a single query sorted by submission
+    date. Each entry is assigned to the first section listing its primary
+    category, or else the first section matching one of its tags, so a paper
+    never appears in two sections. Further pages are requested (with arXiv's
+    three second delay) only while a section is still short. Pages are cached
+    for the rest of the UTC day, so reruns and dry-runs do not hit the API.
+    If the deadline passes, no further pages are requested.
+
+    Args:
+        sections (Dict[str, Dict]): Section name -> {"topics": [...], "limit": int,
+            "sort_mode": "date" | "random"}. Random sections sample from the
+            latest `limit * 5` matching papers, seeded by date so reruns agree.
+        page_size (int): Entries requested per page (default: 100).
+        max_pages (int): Maximum number of pages requested (default: 3).
+        deadline (Optional[float]): Time budget in seconds (default: None, unlimited).
+        skip_delivered (bool): If True, items already sent in a digest are skipped before any further work (default: False).
+        engine (Optional[AsyncEngine]): Engine to run requests on; a temporary one is used if None.
+
+    Returns:
+        Dict[str, List[Paper]]: Papers per section name.
+    """
+    wanted = {}
+    for name, spec in sections.items():
+        limit = spec.get("limit", 5)
+        wanted[name] = limit * 5 if spec.get("sort_mode") == "random" else limit
+
+    all_topics = []
+    for spec in sections.values():
+        for topic in spec.get("topics", []):
+            if topic not in all_topics:
+                all_topics.append(topic)
+
+    candidates: Dict[str, List[Paper]] = {name: [] for name in sections}
+
+    budget = Deadline(deadline)
+
+    async with ensure_engine(engine, concurrency=1) as engine:
+        for page in range(max_pages):
+            if page > 0:
+                remaining = budget.remaining()
+                if remaining is not None and remaining <= REQUEST_DELAY:
+                    logger.warning(f"arXiv deadline reached after {page} page(s)")
+                    break
+                await asyncio.sleep(REQUEST_DELAY)
+
+            url = _build_query_url(all_topics, page * page_size, page_size)
+            try:
+                timeout = budget.timeout()
+                with metrics.stage("arxiv.query"):
+                    feed = await asyncio.wait_for(
+                        engine.fetch_feed(url, timeout=timeout, max_age=_seconds_since_midnight()),
+                        timeout=timeout
+                    )
+            except asyncio.TimeoutError:
+                logger.error(f"arXiv deadline reached while fetching page {page + 1}")
+                break
+            except Exception as e:
+                logger.error(f"Error fetching arXiv feed: {e}")
+                break
+
+            for entry in feed.entries:
+                if skip_delivered and store.is_delivered(entry.link):
+                    continue
+                section = _assign_section(_entry_categories(entry), sections)
+                if section is not None and len(candidates[section]) < wanted[section]:
+                    candidates[section].append(_entry_to_paper(entry))
+
+            if len(feed.entries) < page_size or all(len(candidates[name]) >= wanted[name] for name in sections):
+                break
+
+    results = {}
+    today = datetime.date.today().isoformat()
+    for name, spec in sections.items():
+        papers = candidates[name]
+        limit = spec.get("limit", 5)
+        if spec.get("sort_mode") == "random" and len(papers) > limit:
+            papers = random.Random(f"{today}:{name}").sample(papers, limit)
+        results[name] = papers[:limit]
+
+    return results
+
+def fetch_papers(topics: List[str] = ["cs.AI"], limit: int = 5, sort_mode: str = "date",
+                 deadline: Optional[float] = None) -> List[Paper]:
+    """
+    Fetches latest papers from arXiv for a given list of topics.
+
+    Sync wrapper around fetch_papers_async.
+
+    Args:
+        topics (List[str]): List of arXiv categories to search for (default: ["cs.AI"]).
+        limit (int): The number of papers to fetch (default: 5).
+        sort_mode (str): Sorting mode. "date" (default) or "random".
+        deadline (Optional[float]): Time budget in seconds (default: None, unlimited).
+
+    Returns:
+        List[Paper]: The papers.
+    """
+    return run_sync(fetch_papers_async, topics=topics, limit=limit, sort_mode=sort_mode, deadline=deadline)
+
+def fetch_sections(sections: Dict[str, Dict], page_size: int = 100, max_pages: int = 3,
+                   deadline: Optional[float] = None, skip_delivered: bool = False) -> Dict[str, List[Paper]]:
+    """
+    Fetches papers for several sections with one combined arXiv query.
+
+    Sync wrapper around fetch_sections_async.
+
+    Args:
+        sections (Dict[str, Dict]): Section name -> {"topics": [...], "limit": int, "sort_mode": str}.
+        page_size (int): Entries requested per page (default: 100).
+        max_pages (int): Maximum number of pages requested (default: 3).
+        deadline (Optional[float]): Time budget in seconds (default: None, unlimited).
+        skip_delivered (bool): If True, items already sent in a digest are skipped before any further work (default: False).
+
+    Returns:
+        Dict[str, List[Paper]]: Papers per section name.
+    """
+    return run_sync(fetch_sections_async, sections, page_size=page_size, max_pages=max_pages,
+                    deadline=deadline, skip_delivered=skip_delivered)
+
 if __name__ == "__main__":
     # Test run
     logging.basicConfig(level=logging.INFO)
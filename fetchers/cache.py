@@ -0,0 +1,367 @@
+import os
+import time
+import pickle
+import sqlite3
+import threading
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = ".cache"
+
+# Positive results (a thumbnail was found) live longer than negative ones,
+# since a page without og:image today may get one after an edit.
+DEFAULT_TTL = 7 * 86400
+DEFAULT_NEGATIVE_TTL = 86400
+DEFAULT_MAX_ENTRIES = 5000
+
+# Feeds not refreshed for this long are dropped from the conditional GET store
+DEFAULT_FEED_MAX_AGE = 30 * 86400
+
+# Rendered digest sections kept between runs
+DEFAULT_SECTION_MAX_ENTRIES = 200
+
+_settings = {
+    "dir": None,
+    "ttl": DEFAULT_TTL,
+    "negative_ttl": DEFAULT_NEGATIVE_TTL,
+    "max_entries": DEFAULT_MAX_ENTRIES,
+}
+
+_metadata_cache = None
+_metadata_cache_lock = threading.Lock()
+
+_feed_cache = None
+_feed_cache_lock = threading.Lock()
+
+_section_cache = None
+_section_cache_lock = threading.Lock()
+
+_channel_cache = None
+_channel_cache_lock = threading.Lock()
+
+def configure(cache_conf: Optional[dict] = None):
+    """
+    Applies the `cache` section of config.yaml.
+
+    Must be called before the first cache lookup to take effect.
+
+    Args:
+        cache_conf (Optional[dict]): Keys `dir`, `og_image_ttl_days`,
+            `og_image_negative_ttl_days` and `og_image_max_entries`.
+    """
+    cache_conf = cache_conf or {}
+    if "dir" in cache_conf:
+        _settings["dir"] = cache_conf["dir"]
+    if "og_image_ttl_days" in cache_conf:
+        _settings["ttl"] = cache_conf["og_image_ttl_days"] * 86400
+    if "og_image_negative_ttl_days" in cache_conf:
+        _settings["negative_ttl"] = cache_conf["og_image_negative_ttl_days"] * 86400
+    if "og_image_max_entries" in cache_conf:
+        _settings["max_entries"] = cache_conf["og_image_max_entries"]
+
+def cache_dir() -> str:
+    """Returns the cache directory, creating it if needed. DIGEST_CACHE_DIR overrides config."""
+    path = os.getenv("DIGEST_CACHE_DIR") or _settings["dir"] or DEFAULT_CACHE_DIR
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def open_db(filename: str) -> sqlite3.Connection:
+    """Opens a SQLite database in the cache directory, shareable across threads."""
+    conn = sqlite3.connect(os.path.join(cache_dir(), filename), check_same_thread=False, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+class MetadataCache:
+    """
+    Persistent URL -> thumbnail cache with TTL expiry and LRU eviction.
+
+    A stored value of None is a negative result (the page has no thumbnail).
+    Each entry can also carry the page's canonical URL (after redirects and
+    <link rel="canonical">), which the dedup stage uses to match links.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, ttl: int = DEFAULT_TTL,
+                 negative_ttl: int = DEFAULT_NEGATIVE_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.conn = conn
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS og_image ("
+                " url TEXT PRIMARY KEY,"
+                " image_url TEXT,"
+                " fetched_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS og_image_last_access ON og_image (last_access)")
+            # Caches created before canonical URLs were recorded
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(og_image)")}
+            if "canonical_url" not in columns:
+                self.conn.execute("ALTER TABLE og_image ADD COLUMN canonical_url TEXT")
+
+    def get(self, url: str) -> Tuple[bool, Optional[str]]:
+        """
+        Looks up a URL.
+
+        Returns:
+            Tuple[bool, Optional[str]]: (hit, image_url). image_url is None for negative hits.
+        """
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT image_url, fetched_at FROM og_image WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return False, None
+
+            image_url, fetched_at = row
+            ttl = self.ttl if image_url else self.negative_ttl
+            if now - fetched_at > ttl:
+                return False, None
+
+            with self.conn:
+                self.conn.execute("UPDATE og_image SET last_access = ? WHERE url = ?", (now, url))
+            return True, image_url
+
+    def canonical(self, url: str) -> Optional[str]:
+        """Returns the recorded canonical URL of a page, if it differs from `url`. Ignores the TTL."""
+        with self._lock:
+            row = self.conn.execute("SELECT canonical_url FROM og_image WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, url: str, image_url: Optional[str], canonical_url: Optional[str] = None):
+        """Stores a thumbnail (or None for a negative result) and evicts the least recently used overflow."""
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO og_image (url, image_url, fetched_at, last_access, canonical_url) VALUES (?, ?, ?, ?, ?)",
+                (url, image_url, now, now, canonical_url)
+            )
+            self.conn.execute(
+                "DELETE FROM og_image WHERE url IN ("
+                " SELECT url FROM og_image ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM og_image").fetchone()[0]
+
+def get_metadata_cache() -> Optional[MetadataCache]:
+    """Returns the shared og:image cache, or None if the cache cannot be opened."""
+    global _metadata_cache
+    if _metadata_cache is None:
+        with _metadata_cache_lock:
+            if _metadata_cache is None:
+                try:
+                    _metadata_cache = MetadataCache(
+                        open_db("metadata.sqlite3"),
+                        ttl=_settings["ttl"],
+                        negative_ttl=_settings["negative_ttl"],
+                        max_entries=_settings["max_entries"]
+                    )
+                except Exception as e:
+                    logger.warning(f"og:image cache unavailable, continuing without it: {e}")
+                    return None
+    return _metadata_cache
+
+class CachedFeed(NamedTuple):
+    etag: Optional[str]
+    modified: Optional[str]
+    feed: Any
+    fetched_at: float
+
+class FeedCache:
+    """
+    Persistent store of parsed feeds and their HTTP validators, keyed by feed URL.
+
+    Used for conditional GETs: the stored ETag/Last-Modified are sent with the
+    next request and the stored parsed feed is served on a 304.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, max_age: int = DEFAULT_FEED_MAX_AGE):
+        self.conn = conn
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS feeds ("
+                " url TEXT PRIMARY KEY,"
+                " etag TEXT,"
+                " modified TEXT,"
+                " feed BLOB NOT NULL,"
+                " fetched_at REAL NOT NULL)"
+            )
+
+    def get(self, url: str) -> Optional[CachedFeed]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT etag, modified, feed, fetched_at FROM feeds WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        etag, modified, blob, fetched_at = row
+        try:
+            feed = pickle.loads(blob)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cached feed {url}: {e}")
+            return None
+        return CachedFeed(etag, modified, feed, fetched_at)
+
+    def set(self, url: str, feed, etag: Optional[str] = None, modified: Optional[str] = None):
+        """Stores a parsed feed with its validators and drops feeds not refreshed within max_age."""
+        blob = pickle.dumps(feed, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO feeds (url, etag, modified, feed, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, modified, blob, now)
+            )
+            self.conn.execute("DELETE FROM feeds WHERE fetched_at < ?", (now - self.max_age,))
+
+    def touch(self, url: str):
+        """Marks a feed as revalidated now (after a 304)."""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE feeds SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+def get_feed_cache() -> Optional[FeedCache]:
+    """Returns the shared conditional GET feed store, or None if it cannot be opened."""
+    global _feed_cache
+    if _feed_cache is None:
+        with _feed_cache_lock:
+            if _feed_cache is None:
+                try:
+                    _feed_cache = FeedCache(open_db("feeds.sqlite3"))
+                except Exception as e:
+                    logger.warning(f"Feed cache unavailable, continuing without it: {e}")
+                    return None
+    return _feed_cache
+
+class SectionCache:
+    """
+    Persistent store of rendered digest sections with LRU eviction.
+
+    Keys are content hashes (see emailer.render_section), so entries never go
+    stale; a section whose items or templates change gets a new key.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, max_entries: int = DEFAULT_SECTION_MAX_ENTRIES):
+        self.conn = conn
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sections ("
+                " key TEXT PRIMARY KEY,"
+                " html TEXT NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT html FROM sections WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE sections SET last_access = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def set(self, key: str, html: str):
+        """Stores a rendered section and evicts the least recently used overflow."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sections (key, html, last_access) VALUES (?, ?, ?)",
+                (key, html, time.time())
+            )
+            self.conn.execute(
+                "DELETE FROM sections WHERE key IN ("
+                " SELECT key FROM sections ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM sections").fetchone()[0]
+
+def get_section_cache() -> Optional[SectionCache]:
+    """Returns the shared rendered-section cache, or None if it cannot be opened."""
+    global _section_cache
+    if _section_cache is None:
+        with _section_cache_lock:
+            if _section_cache is None:
+                try:
+                    _section_cache = SectionCache(open_db("sections.sqlite3"))
+                except Exception as e:
+                    logger.warning(f"Section cache unavailable, continuing without it: {e}")
+                    return None
+    return _section_cache
+
+class ChannelCache:
+    """
+    Persistent YouTube handle -> channel ID mapping.
+
+    Channel IDs never change, so entries don't expire. Failed lookups are not
+    stored and are retried on the next run.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS channels ("
+                " handle TEXT PRIMARY KEY,"
+                " channel_id TEXT NOT NULL,"
+                " resolved_at REAL NOT NULL)"
+            )
+
+    def get_many(self, handles: List[str]) -> Dict[str, str]:
+        """Returns the known channel IDs of `handles` (handles are matched case-insensitively)."""
+        if not handles:
+            return {}
+        keys = {handle.lower(): handle for handle in handles}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT handle, channel_id FROM channels WHERE handle IN ({placeholders})", list(keys)
+            ).fetchall()
+        return {keys[handle]: channel_id for handle, channel_id in rows}
+
+    def set(self, handle: str, channel_id: str):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO channels (handle, channel_id, resolved_at) VALUES (?, ?, ?)",
+                (handle.lower(), channel_id, time.time())
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM channels").fetchone()[0]
+
+def get_channel_cache() -> Optional[ChannelCache]:
+    """Returns the shared handle -> channel ID cache, or None if it cannot be opened."""
+    global _channel_cache
+    if _channel_cache is None:
+        with _channel_cache_lock:
+            if _channel_cache is None:
+                try:
+                    _channel_cache = ChannelCache(open_db("channels.sqlite3"))
+                except Exception as e:
+                    logger.warning(f"Channel cache unavailable, continuing without it: {e}")
+                    return None
+    return _channel_cache
+
+def close_caches():
+    """Closes the shared caches; the next lookup reopens them in the cache dir current at that time."""
+    global _metadata_cache, _feed_cache, _section_cache, _channel_cache
+    with _metadata_cache_lock, _feed_cache_lock, _section_cache_lock, _channel_cache_lock:
+        for shared in (_metadata_cache, _feed_cache, _section_cache, _channel_cache):
+            if shared is not None:
+                shared.conn.close()
+        _metadata_cache = _feed_cache = _section_cache = _channel_cache = None
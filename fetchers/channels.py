@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional
+from fetchers import cache, metadata, metrics
+from fetchers.deadline import Deadline, gather_within
+from fetchers.engine import AsyncEngine, ensure_engine, run_sync
+
+logger = logging.getLogger(__name__)
+
+# YouTube pages carry large inline scripts in <head>, so allow a bigger cap
+MAX_PAGE_BYTES = 1024 * 1024
+DEFAULT_CONCURRENCY = 8
+# Seconds per channel page request, before clamping to the caller's deadline
+RESOLVE_TIMEOUT = 10
+
+def is_handle(value: str) -> bool:
+    """True for a YouTube handle such as "@ByteByteGo" (as opposed to a "UC..." channel ID)."""
+    return isinstance(value, str) and value.startswith("@")
+
+def _channel_id(values: Dict[str, str]) -> Optional[str]:
+    # Method 1: meta tag
+    if values.get('channelid'):
+        return values['channelid']
+
+    # Method 2: canonical link / og:url
+    for key in ('link:canonical', 'og:url'):
+        href = values.get(key, '')
+        if '/channel/' in href:
+            return href.split('/channel/')[-1].split('?')[0].strip('/')
+    return None
+
+def resolve_handle(handle: str, timeout: float = RESOLVE_TIMEOUT) -> Optional[str]:
+    """
+    Looks up the channel ID of a YouTube handle, without the cache.
+
+    Only the channel page's head is streamed, and reading stops as soon as the
+    ID has been seen.
+
+    Args:
+        handle (str): The handle, e.g. "@ByteByteGo".
+        timeout (float): Request timeout in seconds (default: RESOLVE_TIMEOUT).
+
+    Returns:
+        Optional[str]: The channel ID, or None if the page doesn't name one.
+    """
+    url = f"https://www.youtube.com/{handle}"
+    values = metadata.extract_head_metadata(url, timeout=timeout, max_bytes=MAX_PAGE_BYTES,
+                                            until=lambda values: _channel_id(values) is not None)
+    return _channel_id(values)
+
+async def resolve_handles_async(handles: Iterable[str], concurrency: int = DEFAULT_CONCURRENCY,
+                                refresh: bool = False, engine: Optional[AsyncEngine] = None,
+                                deadline: Optional[float] = None) -> Dict[str, Optional[str]]:
+    """
+    Resolves YouTube handles to channel IDs.
+
+    Handles already in the channel cache are answered without a request;
+    the rest are resolved concurrently and stored. Lookups still running when
+    the deadline passes are abandoned and their handles left unresolved.
+
+    Args:
+        handles (Iterable[str]): Handles such as "@ByteByteGo".
+        concurrency (int): Pages fetched at the same time (default: DEFAULT_CONCURRENCY).
+        refresh (bool): If True, ignores cached IDs (default: False).
+        engine (Optional[AsyncEngine]): Engine to run requests on; a temporary one sized for `concurrency` is used if None.
+        deadline (Optional[float]): Time budget in seconds (default: None, unlimited).
+
+    Returns:
+        Dict[str, Optional[str]]: Handle -> channel ID, None for handles that could not be resolved.
+    """
+    budget = Deadline(deadline)
+    handles = list(dict.fromkeys(handles))
+    channel_cache = cache.get_channel_cache()
+    resolved: Dict[str, Optional[str]] = {}
+    if channel_cache is not None and not refresh:
+        resolved.update(channel_cache.get_many(handles))
+    metrics.count("cache.channel.hit", len(resolved))
+
+    pending = [handle for handle in handles if handle not in resolved]
+    if pending:
+        metrics.count("cache.channel.miss", len(pending))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def resolve_one(handle: str):
+            async with semaphore:
+                try:
+                    channel_id = await engine.call(f"https://www.youtube.com/{handle}", resolve_handle, handle,
+                                                   timeout=budget.timeout(RESOLVE_TIMEOUT))
+                except Exception as e:
+                    logger.error(f"Error resolving {handle}: {e}")
+                    channel_id = None
+            if channel_id is None:
+                logger.warning(f"Could not resolve YouTube handle {handle}")
+            elif channel_cache is not None:
+                channel_cache.set(handle, channel_id)
+            resolved[handle] = channel_id
+
+        async with ensure_engine(engine, concurrency) as engine:
+            with metrics.stage("youtube.resolve"):
+                await gather_within(budget, [resolve_one(handle) for handle in pending], "YouTube handle lookups")
+
+    return {handle: resolved.get(handle) for handle in handles}
+
+def resolve_handles(handles: Iterable[str], concurrency: int = DEFAULT_CONCURRENCY,
+                    refresh: bool = False) -> Dict[str, Optional[str]]:
+    """
+    Resolves YouTube handles to channel IDs.
+
+    Sync wrapper around resolve_handles_async.
+
+    Args:
+        handles (Iterable[str]): Handles such as "@ByteByteGo".
+        concurrency (int): Pages fetched at the same time (default: DEFAULT_CONCURRENCY).
+        refresh (bool): If True, ignores cached IDs (default: False).
+
+    Returns:
+        Dict[str, Optional[str]]: Handle -> channel ID, None for handles that could not be resolved.
+    """
+    return run_sync(resolve_handles_async, handles, concurrency=concurrency, refresh=refresh)
+
+async def resolve_channels_async(channels: Dict[str, str], engine: Optional[AsyncEngine] = None,
+                                 deadline: Optional[float] = None) -> Dict[str, str]:
+    """
+    Replaces handles among the values of a channel name -> ID mapping with channel IDs.
+
+    Channels whose handle cannot be resolved (within `deadline` seconds, if given) are left out.
+    """
+    handles = [value for value in channels.values() if is_handle(value)]
+    if not handles:
+        return channels
+    resolved = await resolve_handles_async(handles, engine=engine, deadline=deadline)
+    result = {}
+    for name, value in channels.items():
+        channel_id = resolved.get(value) if is_handle(value) else value
+        if channel_id:
+            result[name] = channel_id
+    return result
+
+def handles_in_config(config: Dict) -> List[str]:
+    """Every @handle listed under `sources.youtube` (any mapping of channel name -> ID or handle)."""
+    youtube_conf = (config.get("sources") or {}).get("youtube") or {}
+    handles = []
+    for value in youtube_conf.values():
+        if isinstance(value, dict):
+            handles += [channel for channel in value.values() if is_handle(channel)]
+    return handles
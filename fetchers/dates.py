@@ -0,0 +1,72 @@
+import time
+import calendar
+import datetime
+import functools
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+def _to_timestamp(dt: datetime.datetime) -> float:
+    # Naive times in feeds are treated as UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+@functools.lru_cache(maxsize=4096)
+def parse_timestamp(value: str) -> Optional[float]:
+    """
+    Parses a feed date string into a UTC timestamp.
+
+    Tries ISO 8601 (Atom, YouTube) and RFC 822 (RSS) first and falls back to
+    dateutil for anything else. Results are memoized, since feeds repeat the
+    same dates across entries and runs.
+
+    Args:
+        value (str): The date string.
+
+    Returns:
+        Optional[float]: Seconds since the epoch, or None if the string is not a date.
+    """
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return _to_timestamp(datetime.datetime.fromisoformat(value))
+    except ValueError:
+        pass
+    try:
+        return _to_timestamp(parsedate_to_datetime(value))
+    except (TypeError, ValueError, IndexError):
+        pass
+
+    # Imported here: dateutil is only needed for unusual formats
+    from dateutil import parser
+    try:
+        return _to_timestamp(parser.parse(value))
+    except (ValueError, OverflowError):
+        return None
+
+def entry_timestamp(entry, keys: Tuple[str, ...] = ("published", "updated")) -> Optional[float]:
+    """
+    Returns a feed entry's date as a UTC timestamp.
+
+    For each key, feedparser's already-parsed `<key>_parsed` struct_time (in
+    UTC) is used when present; otherwise the raw string is parsed.
+
+    Args:
+        entry: A feedparser entry.
+        keys (Tuple[str, ...]): Date fields to try, in order.
+
+    Returns:
+        Optional[float]: Seconds since the epoch, or None if the entry has no usable date.
+    """
+    for key in keys:
+        parsed = entry.get(f"{key}_parsed")
+        if isinstance(parsed, (time.struct_time, tuple)):
+            return float(calendar.timegm(parsed))
+        value = entry.get(key)
+        if isinstance(value, str):
+            timestamp = parse_timestamp(value)
+            if timestamp is not None:
+                return timestamp
+    return None
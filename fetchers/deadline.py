@@ -0,0 +1,77 @@
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class Deadline:
+    """
+    A point in time by which a fetch must finish.
+
+    A deadline created with `seconds=None` never expires.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.expires_at = None if seconds is None else time.monotonic() + max(0, seconds)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None if there is no deadline."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, default: Optional[float] = None) -> Optional[float]:
+        """
+        Clamps a request timeout to the time left, with a small floor so requests can start.
+
+        Returns `default` unchanged when there is no deadline.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if default is not None:
+            remaining = min(default, remaining)
+        return max(0.1, remaining)
+
+def earliest(*seconds: Optional[float]) -> Optional[float]:
+    """Returns the smallest of several optional budgets, or None if none is set."""
+    budgets = [s for s in seconds if s is not None]
+    return min(budgets) if budgets else None
+
+async def gather_within(deadline: Deadline, aws: List[Awaitable], label: str, default: Any = None) -> List[Any]:
+    """
+    Runs awaitables concurrently until they finish or the deadline passes.
+
+    Unfinished awaitables are cancelled and their results replaced by `default`,
+    so callers keep whatever completed in time. Results keep the input order.
+
+    Args:
+        deadline (Deadline): The budget to respect.
+        aws (List[Awaitable]): The awaitables to run.
+        label (str): What is being fetched, for the log message.
+        default (Any): Result used for awaitables that did not finish (default: None).
+
+    Returns:
+        List[Any]: Results in input order.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    if not tasks:
+        return []
+
+    done, pending = await asyncio.wait(tasks, timeout=deadline.remaining())
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"Deadline reached: skipped {len(pending)} of {len(tasks)} {label}")
+
+    results = []
+    for task in tasks:
+        if task in done and not task.cancelled() and task.exception() is None:
+            results.append(task.result())
+        else:
+            results.append(default)
+    return results
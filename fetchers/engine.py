@@ -0,0 +1,94 @@
+import asyncio
+import functools
+import logging
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from fetchers import http_client, metadata
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_PER_HOST = 8
+
+class AsyncEngine:
+    """
+    Runs network requests for the async fetchers within one event loop.
+
+    Every request is gated by a global and a per-host semaphore. The requests
+    themselves go through the shared pooled session (and its caches) on a
+    bounded thread pool, so keep-alive connections, conditional GETs and the
+    og:image cache are shared with the sync code paths.
+
+    Create one engine per event loop and close it when done.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, per_host: int = DEFAULT_PER_HOST):
+        self.max_concurrency = max(1, max_concurrency)
+        # More requests to one host than the session pools connections for would discard connections
+        self.per_host = max(1, min(per_host, http_client.POOL_MAXSIZE))
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="fetch")
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    async def call(self, url: str, func, *args, **kwargs):
+        """Runs a blocking request function for `url` once both concurrency limits allow it."""
+        # Take the host slot first so a request waiting on a busy host doesn't hold a global slot
+        async with self._host_semaphore(url), self._global:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def get(self, url: str, timeout: Optional[float] = None, **kwargs):
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        return await self.call(url, http_client.get, url, **kwargs)
+
+    async def fetch_feed(self, url: str, timeout: Optional[float] = None, **kwargs):
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        return await self.call(url, http_client.fetch_feed, url, **kwargs)
+
+    async def fetch_og_image(self, url: str, timeout: Optional[float] = None):
+        if timeout is not None:
+            return await self.call(url, metadata.fetch_og_image, url, timeout=timeout)
+        return await self.call(url, metadata.fetch_og_image, url)
+
+    def close(self):
+        # Requests abandoned by a timeout keep running; don't block on them
+        self._executor.shutdown(wait=False)
+
+@asynccontextmanager
+async def ensure_engine(engine: Optional[AsyncEngine] = None, concurrency: Optional[int] = None):
+    """
+    Yields the given engine, or a temporary one that is closed afterwards.
+
+    The temporary engine is sized for the caller: with `concurrency` set, it
+    allows that many requests in flight (to one host or in total) on as many
+    threads, so a fetcher's own concurrency setting is never capped by the
+    engine defaults. Requests to one host are still capped at the session's
+    pool size (http_client.POOL_MAXSIZE). A shared engine keeps its
+    configured limits.
+    """
+    if engine is not None:
+        yield engine
+        return
+
+    if concurrency is not None:
+        engine = AsyncEngine(max_concurrency=concurrency, per_host=concurrency)
+    else:
+        engine = AsyncEngine()
+    try:
+        yield engine
+    finally:
+        engine.close()
+
+def run_sync(coro_fn, *args, **kwargs):
+    """Runs an async fetcher to completion on a fresh event loop; used by the sync wrappers."""
+    return asyncio.run(coro_fn(*args, **kwargs))
@@ -0,0 +1,218 @@
+import time
+import threading
+import urllib.parse
+import logging
+from typing import Dict, Optional
+
+import certifi
+import feedparser
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from fetchers import cache, metrics
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+}
+
+DEFAULT_TIMEOUT = 10
+
+# Number of distinct hosts kept in the pool cache, and connections kept per host.
+# AsyncEngine caps requests in flight per host at POOL_MAXSIZE, so no connection is discarded.
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 16
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def _record(url: str, response: Optional[requests.Response], streamed: bool):
+    host = urllib.parse.urlsplit(url).netloc
+    if response is None:
+        metrics.record_request_error(host)
+        return
+    # Streamed bodies aren't read yet; the reader reports what it consumes (see record_read)
+    nbytes = 0 if streamed else len(response.content)
+    metrics.record_response(host, response.status_code, nbytes, response.elapsed.total_seconds())
+
+def record_read(url: str, nbytes: int):
+    """Counts body bytes actually read from a response fetched with stream=True."""
+    metrics.record_bytes(urllib.parse.urlsplit(url).netloc, nbytes)
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=2,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "HEAD"],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.verify = certifi.where()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide pooled session, creating it on first use.
+
+    The session keeps per-host keep-alive connection pools, so repeated requests
+    to the same host reuse TCP/TLS connections.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def close_session():
+    """Closes the shared session and its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def get(url: str, timeout: float = DEFAULT_TIMEOUT, insecure_fallback: bool = False, **kwargs) -> requests.Response:
+    """
+    Performs a GET request through the shared session.
+
+    Args:
+        url (str): The URL to fetch.
+        timeout (float): Connect/read timeout in seconds (default: DEFAULT_TIMEOUT).
+        insecure_fallback (bool): If True, retries without certificate verification on SSL errors.
+        **kwargs: Passed through to requests.Session.get.
+
+    Returns:
+        requests.Response: The response.
+    """
+    session = get_session()
+    response = None
+    try:
+        try:
+            response = session.get(url, timeout=timeout, **kwargs)
+        except requests.exceptions.SSLError:
+            if not insecure_fallback:
+                raise
+            logger.warning(f"SSL verification failed for {url}, retrying without verification")
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            response = session.get(url, timeout=timeout, verify=False, **kwargs)
+        return response
+    finally:
+        # Every request counts towards the run report, failed ones as errors
+        _record(url, response, kwargs.get("stream", False))
+
+class _Flight:
+    """A feed fetch in progress, shared by every caller asking for the same URL meanwhile."""
+    __slots__ = ("done", "feed", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.feed = None
+        self.error: Optional[BaseException] = None
+
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+def fetch_feed(url: str, timeout: float = DEFAULT_TIMEOUT, insecure_fallback: bool = False,
+               max_age: Optional[float] = None):
+    """
+    Downloads a feed through the shared session and parses it with feedparser.
+
+    Concurrent calls for the same URL, from any thread or event loop, share a
+    single fetch: later callers wait for the first one and get the same parsed
+    feed (or exception). Together with `max_age`, this fetches a feed listed by
+    several sources once per run.
+
+    Uses a conditional GET: the ETag/Last-Modified stored from the previous
+    fetch are sent as If-None-Match/If-Modified-Since, and on a 304 the
+    previously parsed feed is returned from the feed cache without re-parsing.
+
+    Args:
+        url (str): The feed URL.
+        timeout (float): Request timeout in seconds (default: DEFAULT_TIMEOUT).
+        insecure_fallback (bool): If True, retries without certificate verification on SSL errors.
+        max_age (Optional[float]): If set, a cached feed fetched less than this many
+            seconds ago is returned without any request.
+
+    Returns:
+        feedparser.FeedParserDict: The parsed feed.
+    """
+    with _flights_lock:
+        flight = _flights.get(url)
+        leader = flight is None
+        if leader:
+            flight = _flights[url] = _Flight()
+
+    if not leader:
+        logger.debug(f"Waiting for in-flight fetch of feed: {url}")
+        metrics.count("feed.shared")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.feed
+
+    try:
+        flight.feed = _fetch_feed(url, timeout, insecure_fallback, max_age)
+        return flight.feed
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[url]
+        flight.done.set()
+
+def _fetch_feed(url: str, timeout: float, insecure_fallback: bool, max_age: Optional[float]):
+    feed_cache = cache.get_feed_cache()
+    cached = feed_cache.get(url) if feed_cache is not None else None
+
+    if cached is not None and max_age is not None and time.time() - cached.fetched_at < max_age:
+        logger.debug(f"Serving cached feed: {url}")
+        metrics.count("cache.feed.hit")
+        return cached.feed
+
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached.modified:
+            headers['If-Modified-Since'] = cached.modified
+
+    resp = get(url, timeout=timeout, insecure_fallback=insecure_fallback, headers=headers)
+    if resp.status_code == 304 and cached is not None:
+        logger.debug(f"Feed not modified: {url}")
+        metrics.count("cache.feed.not_modified")
+        feed_cache.touch(url)
+        return cached.feed
+
+    metrics.count("cache.feed.miss")
+    with metrics.stage("feed.parse"):
+        feed = feedparser.parse(resp.content, response_headers={'content-type': resp.headers.get('Content-Type', '')})
+
+    if feed_cache is not None and resp.status_code == 200 and feed.get('entries'):
+        try:
+            # Only the feed metadata and entries are kept; bozo exceptions may not pickle
+            feed_cache.set(
+                url,
+                feedparser.FeedParserDict(feed=feed.get('feed', {}), entries=feed.get('entries', [])),
+                etag=resp.headers.get('ETag'),
+                modified=resp.headers.get('Last-Modified')
+            )
+        except Exception as e:
+            logger.debug(f"Could not cache feed {url}: {e}")
+
+    return feed
@@ -0,0 +1,105 @@
+import datetime
+from dataclasses import dataclass, fields
+from datetime import timezone
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+class Item:
+    """
+    Base for the typed item records returned by the fetchers.
+
+    Records use __slots__ and keep raw values only; display strings are
+    derived on access. They also behave like read/write dicts (`item['title']`,
+    `item.get(...)`, `item['thumbnail'] = ...`), so templates, the dedup stage
+    and the item store work with records and plain dicts alike.
+    """
+    __slots__ = ()
+
+    # Derived attributes exposed through the dict view, besides the dataclass fields
+    _derived: Tuple[str, ...] = ()
+
+    def keys(self) -> Iterator[str]:
+        for f in fields(self):
+            yield f.name
+        yield from self._derived
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._key_set():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self._key_set():
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._key_set()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self._key_set() else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.keys()}
+
+    @classmethod
+    def _key_set(cls) -> frozenset:
+        # Computed once per class; stored on the class since instances have no __dict__
+        keys = cls.__dict__.get("_keys")
+        if keys is None:
+            keys = frozenset([f.name for f in fields(cls)] + list(cls._derived))
+            cls._keys = keys
+        return keys
+
+def _date_string(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+@dataclass(slots=True)
+class Paper(Item):
+    title: str
+    link: str
+    summary: str
+    published: str
+
+@dataclass(slots=True)
+class Video(Item):
+    source: str
+    title: str
+    link: str
+    published: str
+    thumbnail: Optional[str]
+    views: int
+    score: float # Views per day since publishing; the sort key
+
+@dataclass(slots=True)
+class NewsItem(Item):
+    story_id: int
+    title: str
+    link: str
+    score: int
+    popularity: float # HN score per day since posting; the sort key
+    keyword: str
+    thumbnail: Optional[str] = None
+
+    _derived = ("comments",)
+
+    @property
+    def comments(self) -> str:
+        return f"https://news.ycombinator.com/item?id={self.story_id}"
+
+@dataclass(slots=True)
+class Post(Item):
+    source: str
+    title: str
+    link: str
+    published_ts: float # UTC timestamp; the sort key
+    thumbnail: Optional[str] = None
+
+    _derived = ("published", "published_dt")
+
+    @property
+    def published(self) -> str:
+        return _date_string(self.published_ts)
+
+    @property
+    def published_dt(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.published_ts, timezone.utc)
@@ -0,0 +1,78 @@
+import re
+import functools
+from typing import Dict, Iterable, Optional, Tuple
+
+# Keywords this short only match as whole words, so "AI" doesn't match "said"
+SHORT_KEYWORD_LEN = 3
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Builds a regex matching any of `words` from a character trie.
+
+    Alternatives sharing a prefix are merged, so the regex engine rejects a
+    position after a few characters instead of trying every word there.
+    Longer words are preferred over their prefixes.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+class KeywordMatcher:
+    """
+    A list of keywords compiled into a single regex.
+
+    Keywords of up to SHORT_KEYWORD_LEN characters match whole words only;
+    longer keywords and phrases ("Generative AI") match anywhere in the text.
+    Matching is case-insensitive and treats any run of whitespace as one space.
+    Per-text cost depends on the text length, not the number of keywords.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Dict[str, str] = {}
+        for keyword in keywords:
+            normalized = _normalize(keyword)
+            if normalized:
+                self.keywords.setdefault(normalized, keyword)
+
+        short = [k for k in self.keywords if len(k) <= SHORT_KEYWORD_LEN]
+        long = [k for k in self.keywords if len(k) > SHORT_KEYWORD_LEN]
+        alternatives = []
+        # Longer keywords first, so "GPT-4" is reported rather than "GPT" for "GPT-4 launch"
+        if long:
+            alternatives.append(_trie_pattern(long))
+        if short:
+            alternatives.append(r"\b" + _trie_pattern(short) + r"\b")
+        self.pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    def match(self, text: str) -> Optional[str]:
+        """Returns the first keyword (as configured) found in the text, or None."""
+        if self.pattern is None:
+            return None
+        found = self.pattern.search(_normalize(text))
+        return self.keywords[found.group(0)] if found else None
+
+@functools.lru_cache(maxsize=32)
+def _compile(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+def compile_keywords(keywords: Iterable[str]) -> KeywordMatcher:
+    """Returns a matcher for the keywords, reusing one already compiled for the same list."""
+    return _compile(tuple(keywords))
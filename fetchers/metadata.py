@@ -0,0 +1,154 @@
+import codecs
+import logging
+import urllib.parse
+from html.parser import HTMLParser
+from typing import Callable, Dict, Optional
+from fetchers import http_client, cache, metrics
+
+logger = logging.getLogger(__name__)
+
+# Hard cap on bytes read per page; <head> is almost always well within this
+MAX_HEAD_BYTES = 256 * 1024
+CHUNK_SIZE = 8192
+
+IMAGE_KEYS = ("og:image", "og:image:url", "og:image:secure_url", "twitter:image", "twitter:image:src")
+CANONICAL_KEYS = ("link:canonical", "og:url", "response:url")
+
+class HeadMetadataParser(HTMLParser):
+    """
+    Incremental parser collecting <meta> and <link> values from the document head.
+
+    Meta values are keyed by their property/name/itemprop attribute and link
+    hrefs by "link:<rel>". The first occurrence of a key wins. `done` is set
+    once </head> or <body> is seen.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.values: Dict[str, str] = {}
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "body":
+            self.done = True
+            return
+
+        attrs = dict(attrs)
+        if tag == "meta":
+            key = attrs.get("property") or attrs.get("name") or attrs.get("itemprop")
+            content = attrs.get("content")
+            if key and content:
+                self.values.setdefault(key.lower(), content.strip())
+        elif tag == "link":
+            rel = attrs.get("rel")
+            href = attrs.get("href")
+            if rel and href:
+                self.values.setdefault(f"link:{rel.lower()}", href.strip())
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.done = True
+
+def extract_head_metadata(url: str, timeout: float = 5, max_bytes: int = MAX_HEAD_BYTES,
+                          until: Optional[Callable[[Dict[str, str]], bool]] = None) -> Dict[str, str]:
+    """
+    Streams a page and parses only its <head> for meta and link tags.
+
+    Reading stops at </head> (or <body>), after `max_bytes`, or as soon as
+    `until(values)` is true, and the connection is then closed without
+    downloading the rest of the page. Non-HTML responses are skipped without
+    reading the body; error responses (4xx/5xx) raise requests.HTTPError
+    instead of being parsed.
+
+    Args:
+        url (str): The page URL.
+        timeout (float): Request timeout in seconds (default: 5).
+        max_bytes (int): Maximum number of body bytes to read (default: MAX_HEAD_BYTES).
+        until (Optional[Callable[[Dict[str, str]], bool]]): Stops reading once it returns True for the values so far.
+
+    Returns:
+        Dict[str, str]: Meta values by property/name/itemprop, link hrefs by "link:<rel>",
+            and the final URL after redirects by "response:url" when it differs from `url`.
+    """
+    resp = http_client.get(url, timeout=timeout, stream=True)
+    read = 0
+    try:
+        # A 403 or 5xx page says nothing about the article's metadata
+        resp.raise_for_status()
+        final_url = getattr(resp, "url", None)
+        redirect = {"response:url": final_url} if isinstance(final_url, str) and final_url != url else {}
+
+        content_type = (resp.headers.get("Content-Type") or "").lower()
+        if content_type and "html" not in content_type:
+            return redirect
+
+        # requests falls back to ISO-8859-1 without a charset; HTML today is overwhelmingly UTF-8
+        encoding = resp.encoding if "charset" in content_type and resp.encoding else "utf-8"
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        head_parser = HeadMetadataParser()
+        for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+            read += len(chunk)
+            head_parser.feed(decoder.decode(chunk))
+            if head_parser.done or read >= max_bytes or (until is not None and until(head_parser.values)):
+                break
+        return {**redirect, **head_parser.values}
+    finally:
+        resp.close()
+        # The run report counts what was read, not the full page size
+        http_client.record_read(url, read)
+
+def find_image(values: Dict[str, str], base_url: str) -> Optional[str]:
+    """Picks the preview image from extracted head metadata, resolved against the page URL."""
+    for key in IMAGE_KEYS:
+        if values.get(key):
+            return urllib.parse.urljoin(base_url, values[key])
+    return None
+
+def find_canonical(values: Dict[str, str], base_url: str) -> Optional[str]:
+    """Picks the page's canonical URL from extracted head metadata, or None if it is `base_url` itself."""
+    for key in CANONICAL_KEYS:
+        if values.get(key):
+            canonical_url = urllib.parse.urljoin(base_url, values[key])
+            return canonical_url if canonical_url != base_url else None
+    return None
+
+def fetch_og_image(url: str, timeout: float = 5) -> Optional[str]:
+    """
+    Returns the og:image (or twitter:image) URL of an article page.
+
+    The persistent metadata cache is consulted before any network call. Pages
+    without an image are cached as negative results, and the page's canonical
+    URL is cached alongside the image. Network errors and HTTP error
+    responses are not cached, so the page is retried on the next run.
+
+    Args:
+        url (str): The article URL.
+        timeout (float): Request timeout in seconds (default: 5).
+
+    Returns:
+        Optional[str]: The image URL, or None if there is none or it could not be fetched.
+    """
+    metadata_cache = cache.get_metadata_cache()
+    if metadata_cache is not None:
+        hit, image_url = metadata_cache.get(url)
+        if hit:
+            metrics.count("cache.og_image.hit")
+            return image_url
+        metrics.count("cache.og_image.miss")
+
+    try:
+        with metrics.stage("og_image.fetch"):
+            values = extract_head_metadata(url, timeout=timeout)
+    except Exception as e:
+        logger.debug(f"Error fetching og:image for {url}: {e}")
+        return None # Ignore errors fetching image
+
+    image_url = find_image(values, url)
+    if metadata_cache is not None:
+        metadata_cache.set(url, image_url, canonical_url=find_canonical(values, url))
+    return image_url
@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import threading
+import logging
+import collections
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Counters named "cache.<name>.hit" / "cache.<name>.miss" are reported as hit ratios
+CACHE_PREFIX = "cache."
+
+_lock = threading.Lock()
+_started_at = time.time()
+_stages: Dict[str, Dict[str, float]] = {}
+_counters: Dict[str, int] = collections.Counter()
+_hosts: Dict[str, Dict] = {}
+
+def reset():
+    """Clears everything recorded so far and restarts the run clock."""
+    global _started_at
+    with _lock:
+        _started_at = time.time()
+        _stages.clear()
+        _counters.clear()
+        _hosts.clear()
+
+@contextmanager
+def stage(name: str):
+    """
+    Times a block of work under `name`.
+
+    Repeated and concurrent blocks with the same name add up, so `seconds`
+    for a per-item stage is the total time spent across items.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            entry = _stages.setdefault(name, {"count": 0, "seconds": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += elapsed
+            entry["max"] = max(entry["max"], elapsed)
+
+def count(name: str, n: int = 1):
+    """Increments a named counter."""
+    with _lock:
+        _counters[name] += n
+
+def _host_entry(host: str) -> Dict:
+    return _hosts.setdefault(host, {"requests": 0, "bytes": 0, "seconds": 0.0, "errors": 0, "status": collections.Counter()})
+
+def record_response(host: str, status: int, nbytes: int, seconds: float):
+    """Records one HTTP response: its status, body size (0 if not read yet) and time to headers."""
+    with _lock:
+        entry = _host_entry(host)
+        entry["requests"] += 1
+        entry["bytes"] += nbytes
+        entry["seconds"] += seconds
+        entry["status"][str(status)] += 1
+
+def record_bytes(host: str, nbytes: int):
+    """Adds body bytes read from a streamed response after record_response counted the response itself."""
+    with _lock:
+        _host_entry(host)["bytes"] += nbytes
+
+def record_request_error(host: str):
+    """Records an HTTP request that failed without a response (timeout, connection error...)."""
+    with _lock:
+        entry = _host_entry(host)
+        entry["requests"] += 1
+        entry["errors"] += 1
+
+class LogCounter(logging.Handler):
+    """Counts warnings and errors per logger, as counters "warnings.<logger>" and "errors.<logger>"."""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+
+    def emit(self, record):
+        kind = "errors" if record.levelno >= logging.ERROR else "warnings"
+        count(f"{kind}.{record.name}")
+
+def install_log_counter(target: Optional[logging.Logger] = None) -> LogCounter:
+    """Attaches a LogCounter to the root logger (or `target`) unless one is already there."""
+    target = target or logging.getLogger()
+    for handler in target.handlers:
+        if isinstance(handler, LogCounter):
+            return handler
+    handler = LogCounter()
+    target.addHandler(handler)
+    return handler
+
+def report() -> Dict:
+    """Returns everything recorded in this run as a JSON-serializable dict."""
+    with _lock:
+        caches = {}
+        for name, value in _counters.items():
+            if name.startswith(CACHE_PREFIX):
+                cache_name, _, outcome = name[len(CACHE_PREFIX):].rpartition(".")
+                caches.setdefault(cache_name, collections.Counter())[outcome] += value
+        for cache_name, outcomes in caches.items():
+            lookups = sum(outcomes.values())
+            caches[cache_name] = {**outcomes, "hit_ratio": outcomes["hit"] / lookups if lookups else 0.0}
+
+        return {
+            "started_at": _started_at,
+            "duration": time.time() - _started_at,
+            "stages": {name: dict(entry) for name, entry in sorted(_stages.items())},
+            "http": {
+                host: {**entry, "status": dict(entry["status"])}
+                for host, entry in sorted(_hosts.items())
+            },
+            "counters": dict(sorted(_counters.items())),
+            "caches": dict(sorted(caches.items())),
+        }
+
+def write_json(path: str, data: Optional[Dict] = None):
+    """Writes the run report as JSON."""
+    data = data or report()
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def write_prometheus(path: str, data: Optional[Dict] = None):
+    """
+    Writes the run report in the Prometheus text format, for node_exporter's textfile collector.
+
+    The file is replaced atomically so the collector never reads a partial write.
+    """
+    data = data or report()
+    lines = [
+        "# HELP digest_run_timestamp_seconds Start time of the last digest run.",
+        "# TYPE digest_run_timestamp_seconds gauge",
+        f"digest_run_timestamp_seconds {data['started_at']:.3f}",
+        "# HELP digest_run_duration_seconds Duration of the last digest run.",
+        "# TYPE digest_run_duration_seconds gauge",
+        f"digest_run_duration_seconds {data['duration']:.3f}",
+        "# HELP digest_stage_seconds Time spent in each stage, summed over calls.",
+        "# TYPE digest_stage_seconds gauge",
+    ]
+    lines += [f'digest_stage_seconds{{stage="{_label(name)}"}} {entry["seconds"]:.6f}' for name, entry in data["stages"].items()]
+    lines += ["# HELP digest_stage_calls Number of times each stage ran.", "# TYPE digest_stage_calls gauge"]
+    lines += [f'digest_stage_calls{{stage="{_label(name)}"}} {entry["count"]}' for name, entry in data["stages"].items()]
+
+    lines += ["# HELP digest_http_requests HTTP requests per host and status.", "# TYPE digest_http_requests gauge"]
+    for host, entry in data["http"].items():
+        for status, n in entry["status"].items():
+            lines.append(f'digest_http_requests{{host="{_label(host)}",status="{status}"}} {n}')
+        if entry["errors"]:
+            lines.append(f'digest_http_requests{{host="{_label(host)}",status="error"}} {entry["errors"]}')
+    lines += ["# HELP digest_http_bytes Response bytes per host.", "# TYPE digest_http_bytes gauge"]
+    lines += [f'digest_http_bytes{{host="{_label(host)}"}} {entry["bytes"]}' for host, entry in data["http"].items()]
+
+    lines += ["# HELP digest_events Counters recorded during the run.", "# TYPE digest_events gauge"]
+    lines += [f'digest_events{{name="{_label(name)}"}} {n}' for name, n in data["counters"].items()]
+    lines += ["# HELP digest_cache_hit_ratio Cache hits over lookups.", "# TYPE digest_cache_hit_ratio gauge"]
+    lines += [f'digest_cache_hit_ratio{{cache="{_label(name)}"}} {entry["hit_ratio"]:.4f}' for name, entry in data["caches"].items()]
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
@@ -1,107 +1,150 @@
-import requests
-import datetime
-from bs4 import BeautifulSoup
+import time
 import logging
 from typing import List, Dict, Optional
-import re
+from fetchers.engine import AsyncEngine, ensure_engine, run_sync
+from fetchers.deadline import Deadline, gather_within
+from fetchers import store, metrics
+from fetchers.keywords import compile_keywords
+from fetchers.items import NewsItem
 
 logger = logging.getLogger(__name__)
 
-def fetch_news(keywords: List[str] = ["AI"], limit: int = 5) -> List[Dict]:
+HN_API_BASE = "https://hacker-news.firebaseio.com/v0"
+
+async def _fetch_story(engine: AsyncEngine, story_id: int, deadline: Deadline) -> Optional[Dict]:
+    """Fetches a single Hacker News item, returning None on failure."""
+    story_url = f"{HN_API_BASE}/item/{story_id}.json"
+    try:
+        story_resp = await engine.get(story_url, timeout=deadline.timeout())
+        return story_resp.json()
+    except Exception as e:
+        logger.error(f"Error fetching story {story_id}: {e}")
+        return None
+
+def _build_news_item(story_id: int, story: Dict, keyword: str, image_url: Optional[str]) -> NewsItem:
+    # Calculate popularity score: HN Score / (Days + 1)
+    now = time.time()
+    days_ago = max(0.0, (now - story.get('time', now)) / 86400)
+
+    hn_score = story.get('score', 0)
+    popularity_score = hn_score / (days_ago + 1)
+
+    return NewsItem(
+        story_id=story_id,
+        title=story['title'],
+        link=story['url'],
+        score=hn_score,
+        popularity=popularity_score,
+        keyword=keyword,
+        thumbnail=image_url
+    )
+
+async def fetch_news_async(keywords: List[str] = ["AI"], limit: int = 5, concurrency: int = 8,
+                           deadline: Optional[float] = None, skip_delivered: bool = False,
+                           engine: Optional[AsyncEngine] = None) -> List[NewsItem]:
     """
     Fetches latest news from Hacker News matching the keywords.
 
+    Keywords are compiled once into a single matcher (see fetchers.keywords);
+    each item records the keyword that matched it.
+
+    Story IDs are processed in windows of `concurrency` items fetched in parallel.
+    Matches are taken in topstories order and fetching stops as soon as `limit`
+    matches are found, so the result is the same as a serial scan.
+
+    If the deadline passes, the matches found so far are returned and any
+    thumbnails not yet fetched are skipped.
+
     Args:
         keywords (List[str]): List of search terms to filter by (default: ["AI"]).
         limit (int): The number of news items to return (default: 5).
+        concurrency (int): Number of parallel item requests (default: 8). 1 fetches serially.
+        deadline (Optional[float]): Time budget in seconds (default: None, unlimited).
+        skip_delivered (bool): If True, items already sent in a digest are skipped before any further work (default: False).
+        engine (Optional[AsyncEngine]): Engine to run requests on; a temporary one sized for `concurrency` is used if None.
 
     Returns:
-        List[Dict]: A list of dictionaries containing news details.
+        List[NewsItem]: The matching stories, most popular first.
     """
-    # Get top stories IDs
-    top_stories_url = "https://hacker-news.firebaseio.com/v0/topstories.json"
-    try:
-        response = requests.get(top_stories_url)
-        story_ids = response.json()
-    except Exception as e:
-        logger.error(f"Error fetching top stories: {e}")
-        return []
-
-    news_items = []
-    count = 0
+    budget = Deadline(deadline)
+    matcher = compile_keywords(keywords)
 
-    # We check more stories to find matches, but limit the API calls
-    for story_id in story_ids[:100]:
-        if count >= limit:
-            break
-
-        story_url = f"https://hacker-news.firebaseio.com/v0/item/{story_id}.json"
+    async with ensure_engine(engine, concurrency) as engine:
+        # Get top stories IDs
+        top_stories_url = f"{HN_API_BASE}/topstories.json"
         try:
-            story_resp = requests.get(story_url)
-            story = story_resp.json()
-
-            if not story or 'title' not in story or 'url' not in story:
-                continue
-
-            title = story['title']
-            title_lower = title.lower()
-
-            # Check if any keyword is in the title
-            match_found = False
-            for keyword in keywords:
-                k_lower = keyword.lower()
-                # Use regex for short acronyms to avoid partial matches
-                if len(k_lower) <= 3:
-                     if re.search(r'\b' + re.escape(k_lower) + r'\b', title_lower):
-                         match_found = True
-                         break
-                else:
-                    if k_lower in title_lower:
-                        match_found = True
+            with metrics.stage("news.topstories"):
+                response = await engine.get(top_stories_url, timeout=budget.timeout())
+                story_ids = response.json()
+        except Exception as e:
+            logger.error(f"Error fetching top stories: {e}")
+            return []
+
+        concurrency = max(1, concurrency)
+        matches = []
+
+        # We check more stories to find matches, but limit the API calls
+        candidate_ids = story_ids[:100]
+        for start in range(0, len(candidate_ids), concurrency):
+            if len(matches) >= limit:
+                break
+            if budget.expired():
+                logger.warning(f"Hacker News deadline reached after scanning {start} stories")
+                break
+
+            window = candidate_ids[start:start + concurrency]
+            # Results keep input order, preserving topstories ordering
+            with metrics.stage("news.items"):
+                stories = await gather_within(budget, [_fetch_story(engine, story_id, budget) for story_id in window], "Hacker News items")
+            for story_id, story in zip(window, stories):
+                if not story or 'title' not in story or 'url' not in story:
+                    continue
+                if skip_delivered and store.is_delivered(story['url']):
+                    continue
+                keyword = matcher.match(story['title'])
+                if keyword is not None:
+                    matches.append((story_id, story, keyword))
+                    if len(matches) >= limit:
                         break
 
-            if match_found:
-                # Fetch OG Image
-                image_url = None
-                try:
-                    art_resp = requests.get(story['url'], timeout=5)
-                    soup = BeautifulSoup(art_resp.content, 'html.parser')
-                    og_image = soup.find('meta', property='og:image')
-                    if og_image:
-                        image_url = og_image['content']
-                except Exception:
-                    pass # Ignore errors fetching image
-
-                # Calculate popularity score: HN Score / (Days + 1)
-                story_time = story.get('time', datetime.datetime.now().timestamp())
-                story_dt = datetime.datetime.fromtimestamp(story_time)
-                now = datetime.datetime.now()
-                days_ago = (now - story_dt).total_seconds() / 86400
-                if days_ago < 0: days_ago = 0
-
-                hn_score = story.get('score', 0)
-                popularity_score = hn_score / (days_ago + 1)
-
-                news_item = {
-                    "title": title,
-                    "link": story['url'],
-                    "score": hn_score,
-                    "comments": f"https://news.ycombinator.com/item?id={story_id}",
-                    "thumbnail": image_url,
-                    "popularity": popularity_score
-                }
-                news_items.append(news_item)
-                count += 1
+        # Fetch OG Images for the selected stories in parallel
+        with metrics.stage("news.thumbnails"):
+            image_urls = await gather_within(
+                budget,
+                [engine.fetch_og_image(story['url'], timeout=budget.timeout(5)) for _, story, _ in matches],
+                "Hacker News thumbnails"
+            )
 
-        except Exception as e:
-            logger.error(f"Error fetching story {story_id}: {e}")
-            continue
+    news_items = [
+        _build_news_item(story_id, story, keyword, image_url)
+        for (story_id, story, keyword), image_url in zip(matches, image_urls)
+    ]
 
     # Sort by popularity score descending
-    news_items.sort(key=lambda x: x['popularity'], reverse=True)
+    news_items.sort(key=lambda x: x.popularity, reverse=True)
 
     return news_items
 
+def fetch_news(keywords: List[str] = ["AI"], limit: int = 5, concurrency: int = 8,
+               deadline: Optional[float] = None, skip_delivered: bool = False) -> List[NewsItem]:
+    """
+    Fetches latest news from Hacker News matching the keywords.
+
+    Sync wrapper around fetch_news_async.
+
+    Args:
+        keywords (List[str]): List of search terms to filter by (default: ["AI"]).
+        limit (int): The number of news items to return (default: 5).
+        concurrency (int): Number of parallel item requests (default: 8). 1 fetches serially.
+        deadline (Optional[float]): Time budget in seconds (default: None, unlimited).
+        skip_delivered (bool): If True, items already sent in a digest are skipped before any further work (default: False).
+
+    Returns:
+        List[NewsItem]: The matching stories, most popular first.
+    """
+    return run_sync(fetch_news_async, keywords=keywords, limit=limit, concurrency=concurrency,
+                    deadline=deadline, skip_delivered=skip_delivered)
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     results = fetch_news()
@@ -0,0 +1,198 @@
+import importlib
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Item layouts with a template in templates/items/<kind>.html, and the extra detail shown for each in dry runs
+PREVIEWS: Dict[str, Callable[[Dict], str]] = {
+    "paper": lambda item: f"Abstract length: {len(item.get('summary') or '')} chars",
+    "video": lambda item: f"Thumbnail: {item.get('thumbnail')}",
+    "post": lambda item: f"Thumbnail: {item.get('thumbnail')}",
+    "news": lambda item: f"Thumbnail: {item.get('thumbnail')}",
+}
+
+class Section(NamedTuple):
+    """
+    One section of the digest.
+
+    Attributes:
+        key: Results key, also used by --sources and per-recipient preferences.
+        title: Heading in the email.
+        label: Short name for logs and dry runs.
+        kind: Item layout, rendered by templates/items/<kind>.html.
+        fields: Keys every item must have; items missing one are dropped.
+        order: Position in the email; sections are fetched and deduplicated in registration order.
+    """
+    key: str
+    title: str
+    label: str
+    kind: str
+    fields: Tuple[str, ...] = ("title", "link")
+    order: int = 0
+
+class Source(NamedTuple):
+    """
+    A fetcher and the sections it fills.
+
+    `build_kwargs(conf, sections)` turns the source's config (the
+    `sources.<config_key>` mapping) and the wanted section keys into keyword
+    arguments for `fetchers.<module>.<func>`, or returns None to skip the run.
+    `deadline` and `skip_delivered` are added by the caller. A source filling
+    several sections returns a dict of section key -> items.
+
+    `refresh_minutes` is how often `main.py --daemon` refetches the source.
+    `select(kwargs, section_key, items)` picks what one digest shows from
+    items gathered over several of the daemon's refreshes: the same ordering
+    and limit a single fetch with `kwargs` applies. None keeps every item.
+    """
+    name: str
+    config_key: str
+    module: str
+    func: str
+    sections: Tuple[Section, ...]
+    build_kwargs: Callable[[Dict, List[str]], Optional[Dict]]
+    refresh_minutes: int = 180
+    select: Optional[Callable[[Dict, str, List[Dict]], List[Dict]]] = None
+
+_sources: Dict[str, Source] = {}
+
+def register(source: Source):
+    """Adds a source; registering a name again replaces the earlier source."""
+    _sources[source.name] = source
+
+def sources() -> List[Source]:
+    """Registered sources, in registration order."""
+    return list(_sources.values())
+
+def sections() -> List[Section]:
+    """Every section, in registration order."""
+    return [section for source in _sources.values() for section in source.sections]
+
+def find_source(name: str) -> Optional[Source]:
+    """The source registered as `name`, if any."""
+    return _sources.get(name)
+
+def find_section(key: str) -> Optional[Section]:
+    """The section with results key `key`, if any."""
+    return next((section for section in sections() if section.key == key), None)
+
+def display_sections() -> List[Section]:
+    """Every section, in the order the email shows them."""
+    return sorted(sections(), key=lambda section: section.order)
+
+def preview(section: Section, item: Dict) -> str:
+    """Describes an item for the dry-run output."""
+    source = f"[{item.get('source')}] " if section.kind == "post" else ""
+    detail = PREVIEWS.get(section.kind, lambda item: "")(item)
+    return f"- {source}{item['title']}\n  Link: {item['link']}\n  {detail}\n"
+
+def load_plugins(module_names: List[str]):
+    """Imports plugin modules, which register their sources on import."""
+    for module_name in module_names:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            logger.error(f"Could not load source plugin {module_name}: {e}")
+
+def validate(section: Section, items: List[Dict]) -> List[Dict]:
+    """Drops items missing any of the section's required fields."""
+    valid = [item for item in items if all(item.get(field) is not None for field in section.fields)]
+    if len(valid) < len(items):
+        logger.warning(f"Dropped {len(items) - len(valid)} malformed items from {section.key}")
+    return valid
+
+def _arxiv_kwargs(conf: Dict, wanted: List[str]) -> Optional[Dict]:
+    specs = {
+        "ai_papers": {
+            "topics": conf.get("ai_topics", ["cs.AI", "cs.LG", "cs.CL", "cs.CV"]),
+            "limit": conf.get("ai_limit", 5)
+        },
+        "sys_papers": {
+            "topics": conf.get("system_design_topics", ["cs.DC", "cs.SE", "cs.NI", "cs.DB"]),
+            "limit": conf.get("system_design_limit", 3),
+            "sort_mode": "random"
+        }
+    }
+    specs = {key: spec for key, spec in specs.items() if key in wanted}
+    return {"sections": specs} if specs else None
+
+def _youtube_kwargs(channels_key: str, limit_key: str):
+    def build(conf: Dict, wanted: List[str]) -> Dict:
+        return {
+            "channels": conf.get(channels_key, None),
+            "limit": conf.get(limit_key, 3),
+            "max_age": conf.get("feed_ttl_minutes", 60) * 60
+        }
+    return build
+
+def _news_kwargs(conf: Dict, wanted: List[str]) -> Dict:
+    return {
+        "keywords": conf.get("keywords", ["AI", "LLM"]),
+        "limit": conf.get("limit", 5),
+        "concurrency": conf.get("concurrency", 8)
+    }
+
+def _feeds_kwargs(conf: Dict, wanted: List[str]) -> Dict:
+    return {
+        "feeds": conf.get("feeds", []),
+        "limit": conf.get("limit", 5),
+        "one_per_source": True,
+        "concurrency": conf.get("concurrency", 4),
+        "feed_timeout": conf.get("feed_timeout", 10)
+    }
+
+def _keep_best(items: List[Dict], sort_key: Optional[str], limit: Optional[int], per_source: bool = False) -> List[Dict]:
+    """Sorts items by `sort_key` (highest first) and keeps `limit` of them, or `limit` per item source."""
+    if sort_key is not None:
+        items = sorted(items, key=lambda item: item[sort_key], reverse=True)
+    if limit is None:
+        return list(items)
+    if not per_source:
+        return items[:limit]
+    kept, counts = [], {}
+    for item in items:
+        count = counts.get(item.get('source'), 0)
+        if count < limit:
+            kept.append(item)
+            counts[item.get('source')] = count + 1
+    return kept
+
+def _arxiv_select(kwargs: Dict, key: str, items: List[Dict]) -> List[Dict]:
+    spec = kwargs.get("sections", {}).get(key, {})
+    # A random selection has no order to restore
+    sort_key = None if spec.get("sort_mode") == "random" else "published"
+    return _keep_best(items, sort_key, spec.get("limit"))
+
+def _videos_select(kwargs: Dict, key: str, items: List[Dict]) -> List[Dict]:
+    return _keep_best(items, "score", kwargs.get("limit"), per_source=True)
+
+def _news_select(kwargs: Dict, key: str, items: List[Dict]) -> List[Dict]:
+    return _keep_best(items, "popularity", kwargs.get("limit"))
+
+def _feeds_select(kwargs: Dict, key: str, items: List[Dict]) -> List[Dict]:
+    if kwargs.get("one_per_source"):
+        return _keep_best(items, "published_ts", 1, per_source=True)
+    return _keep_best(items, "published_ts", kwargs.get("limit"))
+
+PAPER_FIELDS = ("title", "link", "summary")
+
+register(Source("arxiv", "arxiv", "arxiv", "fetch_sections", (
+    Section("ai_papers", "Latest Research Papers (arXiv)", "AI Papers", "paper", PAPER_FIELDS, order=0),
+    Section("sys_papers", "System Design Papers (Random Selection)", "System Design Papers", "paper", PAPER_FIELDS, order=1),
+), _arxiv_kwargs, refresh_minutes=24 * 60, select=_arxiv_select))
+register(Source("ai_videos", "youtube", "youtube", "fetch_videos", (
+    Section("ai_videos", "Trending AI Videos", "AI Videos", "video", order=2),
+), _youtube_kwargs("ai_channels", "ai_limit"), select=_videos_select))
+register(Source("sys_videos", "youtube", "youtube", "fetch_videos", (
+    Section("sys_videos", "System Design Videos", "System Design Videos", "video", order=3),
+), _youtube_kwargs("system_design_channels", "system_design_limit"), refresh_minutes=6 * 60, select=_videos_select))
+register(Source("news", "news", "news", "fetch_news", (
+    Section("news", "Hacker News Top AI Stories", "News", "news", order=5),
+), _news_kwargs, refresh_minutes=60, select=_news_select))
+register(Source("rss", "rss", "rss", "fetch_rss", (
+    Section("rss", "Latest AI Blog Posts", "RSS Items", "post", order=6),
+), _feeds_kwargs, select=_feeds_select))
+register(Source("eng_blogs", "engineering_blogs", "rss", "fetch_rss", (
+    Section("eng_blogs", "Engineering Blogs", "Engineering Blogs", "post", order=4),
+), _feeds_kwargs, refresh_minutes=6 * 60, select=_feeds_select))
@@ -1,104 +1,139 @@
-import feedparser
-import requests
-import datetime
-from bs4 import BeautifulSoup
-from dateutil import parser
-from datetime import timezone
+import asyncio
+import time
 import logging
-from typing import List, Dict, Optional
+from typing import List, Optional
+from fetchers.engine import AsyncEngine, ensure_engine, run_sync
+from fetchers.deadline import Deadline, gather_within
+from fetchers import store, metrics
+from fetchers.items import Post
+from fetchers.dates import entry_timestamp
 
 logger = logging.getLogger(__name__)
 
-def fetch_rss(feeds: List[str] = [], limit: int = 5, one_per_source: bool = False) -> List[Dict]:
+def _parse_feed_items(feed, one_per_source: bool) -> List[Post]:
+    """Turns a parsed feed into items without thumbnails."""
+    items = []
+    for entry in feed.entries:
+        title = entry.title
+        link = entry.link
+
+        published_ts = entry_timestamp(entry)
+        if published_ts is None:
+            published_ts = time.time()
+
+        item = Post(
+            source=feed.feed.get('title', 'Unknown Blog'),
+            title=title,
+            link=link,
+            published_ts=published_ts
+        )
+        items.append(item)
+
+        if one_per_source:
+            break # Take only the first (latest) item
+
+    return items
+
+async def fetch_rss_async(feeds: List[str] = [], limit: int = 5, one_per_source: bool = False,
+                          concurrency: int = 4, feed_timeout: float = 10, deadline: Optional[float] = None,
+                          skip_delivered: bool = False, engine: Optional[AsyncEngine] = None) -> List[Post]:
     """
     Fetches latest items from a list of RSS feeds.
 
+    Feeds are fetched concurrently, then thumbnails are looked up concurrently
+    for the selected items only. Items are collected in feed order and sorted
+    stably, so the output is the same as a serial run.
+
+    If the deadline passes, items from the feeds fetched so far are returned
+    and the remaining thumbnail lookups are skipped.
+
     Args:
         feeds (List[str]): List of RSS feed URLs.
         limit (int): The number of items to return (default: 5).
         one_per_source (bool): If True, returns the latest item from each source.
+        concurrency (int): Maximum number of feeds/articles fetched at once (default: 4).
+        feed_timeout (float): Time budget per feed in seconds (default: 10).
+        deadline (Optional[float]): Time budget for the whole fetch in seconds (default: None, unlimited).
+        skip_delivered (bool): If True, selected items already sent in a digest are dropped before thumbnails are fetched (default: False).
+        engine (Optional[AsyncEngine]): Engine to run requests on; a temporary one sized for `concurrency` is used if None.
 
     Returns:
-        List[Dict]: A list of dictionaries containing feed items.
+        List[Post]: The feed items, newest first.
     """
-    all_items = []
-
-    for feed_url in feeds:
-        try:
-            import certifi
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Cache-Control': 'max-age=0'
-            }
+    budget = Deadline(deadline)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_one(feed_url: str) -> List[Post]:
+        async with semaphore:
+            timeout = budget.timeout(feed_timeout)
             try:
-                resp = requests.get(feed_url, headers=headers, timeout=10, verify=certifi.where())
-            except requests.exceptions.SSLError:
-                import urllib3
-                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-                resp = requests.get(feed_url, headers=headers, timeout=10, verify=False)
-            feed = feedparser.parse(resp.content)
-
-            for entry in feed.entries:
-                title = entry.title
-                link = entry.link
-
-                # Fetch OG Image
-                image_url = None
-                try:
-                    # Some feeds might put image in content/summary, but fetching URL is safer for og:image
-                    art_resp = requests.get(link, timeout=5)
-                    soup = BeautifulSoup(art_resp.content, 'html.parser')
-                    og_image = soup.find('meta', property='og:image')
-                    if og_image:
-                        image_url = og_image['content']
-                except Exception:
-                    pass
-
-                # Parse date
-                published_dt = datetime.datetime.now(timezone.utc)
-                if hasattr(entry, 'published'):
-                    try:
-                        published_dt = parser.parse(entry.published)
-                        if published_dt.tzinfo is None:
-                            published_dt = published_dt.replace(tzinfo=timezone.utc)
-                    except:
-                        pass
-                elif hasattr(entry, 'updated'):
-                     try:
-                        published_dt = parser.parse(entry.updated)
-                        if published_dt.tzinfo is None:
-                            published_dt = published_dt.replace(tzinfo=timezone.utc)
-                     except:
-                        pass
-
-                item = {
-                    "source": feed.feed.get('title', 'Unknown Blog'),
-                    "title": title,
-                    "link": link,
-                    "published": published_dt.strftime("%Y-%m-%d"),
-                    "published_dt": published_dt, # For sorting
-                    "thumbnail": image_url
-                }
-                all_items.append(item)
-
-                if one_per_source:
-                    break # Take only the first (latest) item
-
-        except Exception as e:
-            logger.error(f"Error fetching feed {feed_url}: {e}")
-            continue
-
-    # Sort by date descending
-    all_items.sort(key=lambda x: x['published_dt'], reverse=True)
-
-    if one_per_source:
-        return all_items # Return all single items from each source
-
-    return all_items[:limit]
+                feed = await asyncio.wait_for(
+                    engine.fetch_feed(feed_url, timeout=timeout, insecure_fallback=True),
+                    timeout=timeout
+                )
+                with metrics.stage("rss.parse"):
+                    return _parse_feed_items(feed, one_per_source)
+            except asyncio.TimeoutError:
+                logger.error(f"Timed out fetching feed {feed_url} after {timeout:.1f}s")
+            except Exception as e:
+                logger.error(f"Error fetching feed {feed_url}: {e}")
+            return []
+
+    async def fetch_thumbnail(item: Post):
+        async with semaphore:
+            # Some feeds might put image in content/summary, but fetching URL is safer for og:image
+            item['thumbnail'] = await engine.fetch_og_image(item['link'], timeout=budget.timeout(5))
+
+    async with ensure_engine(engine, concurrency) as engine:
+        all_items = []
+        with metrics.stage("rss.feeds"):
+            fetched = await gather_within(budget, [fetch_one(feed_url) for feed_url in feeds], "feeds", default=[])
+        for items in fetched:
+            all_items.extend(items)
+
+        # Sort by date descending
+        all_items.sort(key=lambda x: x.published_ts, reverse=True)
+
+        if not one_per_source:
+            all_items = all_items[:limit]
+
+        # Filter after selecting, so a feed with nothing new contributes nothing
+        # rather than its next-older (already skipped) post
+        if skip_delivered:
+            all_items = [item for item in all_items if not store.is_delivered(item['link'])]
+
+        # Fetch OG Images
+        if budget.expired():
+            logger.warning(f"Feed deadline reached: skipping thumbnails for {len(all_items)} items")
+        else:
+            with metrics.stage("rss.thumbnails"):
+                await gather_within(budget, [fetch_thumbnail(item) for item in all_items], "feed thumbnails")
+
+    return all_items # one_per_source returns all single items from each source
+
+def fetch_rss(feeds: List[str] = [], limit: int = 5, one_per_source: bool = False,
+              concurrency: int = 4, feed_timeout: float = 10, deadline: Optional[float] = None,
+              skip_delivered: bool = False) -> List[Post]:
+    """
+    Fetches latest items from a list of RSS feeds.
+
+    Sync wrapper around fetch_rss_async.
+
+    Args:
+        feeds (List[str]): List of RSS feed URLs.
+        limit (int): The number of items to return (default: 5).
+        one_per_source (bool): If True, returns the latest item from each source.
+        concurrency (int): Maximum number of feeds/articles fetched at once (default: 4).
+        feed_timeout (float): Time budget per feed in seconds (default: 10).
+        deadline (Optional[float]): Time budget for the whole fetch in seconds (default: None, unlimited).
+        skip_delivered (bool): If True, selected items already sent in a digest are dropped before thumbnails are fetched (default: False).
+
+    Returns:
+        List[Post]: The feed items, newest first.
+    """
+    return run_sync(fetch_rss_async, feeds=feeds, limit=limit, one_per_source=one_per_source,
+                    concurrency=concurrency, feed_timeout=feed_timeout, deadline=deadline,
+                    skip_delivered=skip_delivered)
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
@@ -0,0 +1,154 @@
+import time
+import sqlite3
+import threading
+import logging
+import urllib.parse
+from typing import Dict, Iterable, List, Optional, Set
+from fetchers import cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ITEMS = 50
+# Delivered items are remembered until they have been out of every fetch for this long
+DEFAULT_DELIVERED_TTL = 30 * 86400
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+_settings = {
+    "max_items": DEFAULT_MAX_ITEMS,
+    "delivered_ttl": DEFAULT_DELIVERED_TTL,
+}
+
+_item_store = None
+_item_store_lock = threading.Lock()
+
+def configure(database_conf: Optional[dict] = None):
+    """
+    Applies the `database` section of config.yaml.
+
+    Args:
+        database_conf (Optional[dict]): Keys `max_items`, the number of undelivered items
+            remembered per source, and `delivered_days`, how long a delivered item is
+            remembered after it was last fetched.
+    """
+    database_conf = database_conf or {}
+    if "max_items" in database_conf:
+        _settings["max_items"] = database_conf["max_items"]
+    if "delivered_days" in database_conf:
+        _settings["delivered_ttl"] = database_conf["delivered_days"] * 86400
+
+def normalize_link(url: str) -> str:
+    """
+    Normalizes a link so the same article is recognised across sources and runs.
+
+    Lowercases scheme and host, drops "www.", the fragment, tracking query
+    parameters (utm_* and friends) and a trailing slash, and sorts the query.
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urllib.parse.urlunsplit((parts.scheme.lower() or "http", host, path, urllib.parse.urlencode(query), ""))
+
+class ItemStore:
+    """
+    Persistent record of items emitted by the fetchers, keyed by normalized link.
+
+    Stores the source, first- and last-seen time of every item, and when it
+    was delivered in a digest. Only the newest `max_items` undelivered items
+    per source are kept. Delivered items are kept until they have not been
+    fetched for `delivered_ttl` seconds, so a story still in topstories or a
+    feed is never sent twice, however many newer items come along.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, max_items: int = DEFAULT_MAX_ITEMS,
+                 delivered_ttl: float = DEFAULT_DELIVERED_TTL):
+        self.conn = conn
+        self.max_items = max_items
+        self.delivered_ttl = delivered_ttl
+        self._lock = threading.Lock()
+        self._delivered: Optional[Set[str]] = None
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " key TEXT PRIMARY KEY,"
+                " source TEXT NOT NULL,"
+                " link TEXT NOT NULL,"
+                " title TEXT,"
+                " first_seen REAL NOT NULL,"
+                " delivered_at REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS items_source_seen ON items (source, first_seen)")
+            # Stores created before last-seen times were recorded
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(items)")}
+            if "last_seen" not in columns:
+                self.conn.execute("ALTER TABLE items ADD COLUMN last_seen REAL")
+
+    def _delivered_keys(self) -> Set[str]:
+        # Loaded once; lookups happen for every feed entry and HN story
+        if self._delivered is None:
+            rows = self.conn.execute("SELECT key FROM items WHERE delivered_at IS NOT NULL").fetchall()
+            self._delivered = {row[0] for row in rows}
+        return self._delivered
+
+    def is_delivered(self, link: str) -> bool:
+        """Returns True if the link was already sent in a digest."""
+        with self._lock:
+            return normalize_link(link) in self._delivered_keys()
+
+    def record(self, source: str, items: Iterable[Dict]):
+        """Records items (keeping the original first-seen time, updating the last-seen time) and applies retention."""
+        now = time.time()
+        rows = [(normalize_link(item['link']), source, item['link'], item.get('title'), now, now) for item in items]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO items (key, source, link, title, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET last_seen = excluded.last_seen", rows
+            )
+            self.conn.execute(
+                "DELETE FROM items WHERE source = ? AND delivered_at IS NULL AND key NOT IN ("
+                " SELECT key FROM items WHERE source = ? AND delivered_at IS NULL ORDER BY first_seen DESC LIMIT ?)",
+                (source, source, self.max_items)
+            )
+            self.conn.execute(
+                "DELETE FROM items WHERE delivered_at IS NOT NULL AND COALESCE(last_seen, first_seen) < ?",
+                (now - self.delivered_ttl,)
+            )
+            self._delivered = None
+
+    def undelivered(self, items: List[Dict]) -> List[Dict]:
+        """Filters out items already sent in a digest."""
+        return [item for item in items if not self.is_delivered(item['link'])]
+
+    def mark_delivered(self, items: Iterable[Dict]):
+        """Marks items as sent."""
+        now = time.time()
+        keys = [(now, normalize_link(item['link'])) for item in items]
+        with self._lock, self.conn:
+            self.conn.executemany("UPDATE items SET delivered_at = ? WHERE key = ? AND delivered_at IS NULL", keys)
+            self._delivered = None
+
+def get_item_store() -> Optional[ItemStore]:
+    """Returns the shared item store, or None if it cannot be opened."""
+    global _item_store
+    if _item_store is None:
+        with _item_store_lock:
+            if _item_store is None:
+                try:
+                    _item_store = ItemStore(cache.open_db("items.sqlite3"), max_items=_settings["max_items"],
+                                            delivered_ttl=_settings["delivered_ttl"])
+                except Exception as e:
+                    logger.warning(f"Item store unavailable, continuing without it: {e}")
+                    return None
+    return _item_store
+
+def is_delivered(link: str) -> bool:
+    """Convenience check against the shared store; False if the store is unavailable."""
+    item_store = get_item_store()
+    return item_store is not None and item_store.is_delivered(link)
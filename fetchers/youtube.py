@@ -1,80 +1,137 @@
-import feedparser
-import datetime
-from dateutil import parser
-from datetime import timezone
+import time
 import logging
 from typing import List, Dict, Optional
+from fetchers.engine import AsyncEngine, ensure_engine, run_sync
+from fetchers.deadline import Deadline, gather_within
+from fetchers import store, metrics
+from fetchers.items import Video
+from fetchers.dates import entry_timestamp
+from fetchers.channels import resolve_channels_async
 
 logger = logging.getLogger(__name__)
 
-def fetch_videos(channels: Optional[Dict[str, str]] = None, limit: int = 3) -> List[Dict]:
+DEFAULT_CHANNELS = {
+    "Two Minute Papers": "UCbfYPyITQ-7l4upoX8nvctg",
+    "AI Explained": "UCNJ1Ymd5yFuUPtn21xxR7kw"
+}
+
+# Channel feeds fetched within this many seconds are served from the feed cache,
+# so reruns and dry runs within the hour make no requests
+DEFAULT_FEED_MAX_AGE = 3600
+
+def _parse_videos(feed, channel_name: str, limit: int, skip_delivered: bool = False) -> List[Video]:
+    videos = []
+    # The channel's latest `limit` uploads; delivered ones are dropped, not replaced by older uploads
+    for entry in feed.entries[:limit]:
+        if skip_delivered and store.is_delivered(entry.link):
+            continue
+
+        # Extract views
+        views = 0
+        if 'media_statistics' in entry and 'views' in entry.media_statistics:
+            views = int(entry.media_statistics['views'])
+
+        # Days since publishing
+        published_ts = entry_timestamp(entry, ("published",))
+        if published_ts is not None:
+            days_ago = max(0.0, (time.time() - published_ts) / 86400)
+        else:
+            logger.debug(f"Error parsing date for video {entry.get('title', 'Unknown')}")
+            days_ago = 1 # Fallback
+
+        # Calculate popularity score: Views / (Days + 1)
+        # Add 1 to avoid huge scores for very fresh videos or div by zero
+        popularity_score = views / (days_ago + 1)
+
+        video = Video(
+            source=channel_name,
+            title=entry.title,
+            link=entry.link,
+            published=entry.published,
+            thumbnail=entry.media_thumbnail[0]['url'] if 'media_thumbnail' in entry else None,
+            views=views,
+            score=popularity_score
+        )
+        videos.append(video)
+    return videos
+
+async def fetch_videos_async(channels: Optional[Dict[str, str]] = None, limit: int = 3,
+                             deadline: Optional[float] = None, skip_delivered: bool = False,
+                             max_age: Optional[float] = DEFAULT_FEED_MAX_AGE,
+                             engine: Optional[AsyncEngine] = None) -> List[Video]:
     """
     Fetches latest videos from selected AI YouTube channels.
 
+    Channel feeds are fetched concurrently. A channel also being fetched by
+    another call at the same time (e.g. listed in both the AI and system design
+    sets) is fetched once, and feeds fetched within `max_age` seconds are
+    served from the feed cache. If the deadline passes, videos from the
+    channels fetched so far are returned.
+
     Args:
-        channels (Optional[Dict[str, str]]): Dictionary of channel names and IDs.
+        channels (Optional[Dict[str, str]]): Dictionary of channel names and IDs or @handles
+            (resolved once and remembered in the channel cache).
         limit (int): The number of videos to fetch per channel (default: 3).
+        deadline (Optional[float]): Time budget in seconds (default: None, unlimited).
+        skip_delivered (bool): If True, the channel's latest videos already sent in a digest are left out (default: False).
+        max_age (Optional[float]): Seconds a cached channel feed is served without a request (default: DEFAULT_FEED_MAX_AGE); None to always revalidate.
+        engine (Optional[AsyncEngine]): Engine to run requests on; a temporary one is used if None.
 
     Returns:
-        List[Dict]: A list of dictionaries containing video details.
+        List[Video]: The videos, most popular first.
     """
     if channels is None:
         # Default fallback
-        channels = {
-            "Two Minute Papers": "UCbfYPyITQ-7l4upoX8nvctg",
-            "AI Explained": "UCNJ1Ymd5yFuUPtn21xxR7kw"
-        }
+        channels = DEFAULT_CHANNELS
 
-    all_videos = []
+    budget = Deadline(deadline)
 
-    for channel_name, channel_id in channels.items():
+    async def fetch_channel(channel_name: str, channel_id: str) -> List[Video]:
         rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
         try:
-            feed = feedparser.parse(rss_url)
-
-            for entry in feed.entries[:limit]:
-                # Extract views
-                views = 0
-                if 'media_statistics' in entry and 'views' in entry.media_statistics:
-                    views = int(entry.media_statistics['views'])
-
-                # Parse date
-                try:
-                    published_dt = parser.parse(entry.published)
-                    # Ensure timezone awareness for subtraction
-                    if published_dt.tzinfo is None:
-                            published_dt = published_dt.replace(tzinfo=timezone.utc)
-
-                    now = datetime.datetime.now(timezone.utc)
-                    days_ago = (now - published_dt).total_seconds() / 86400
-                    if days_ago < 0: days_ago = 0
-                except Exception as e:
-                    logger.debug(f"Error parsing date for video {entry.get('title', 'Unknown')}: {e}")
-                    days_ago = 1 # Fallback
-
-                # Calculate popularity score: Views / (Days + 1)
-                # Add 1 to avoid huge scores for very fresh videos or div by zero
-                popularity_score = views / (days_ago + 1)
-
-                video = {
-                    "source": channel_name,
-                    "title": entry.title,
-                    "link": entry.link,
-                    "published": entry.published,
-                    "thumbnail": entry.media_thumbnail[0]['url'] if 'media_thumbnail' in entry else None,
-                    "views": views,
-                    "score": popularity_score
-                }
-                all_videos.append(video)
+            feed = await engine.fetch_feed(rss_url, timeout=budget.timeout(), max_age=max_age)
+            with metrics.stage("youtube.parse"):
+                return _parse_videos(feed, channel_name, limit, skip_delivered)
         except Exception as e:
             logger.error(f"Error fetching/parsing channel {channel_name}: {e}")
-            continue
+            return []
+
+    async with ensure_engine(engine) as engine:
+        # Handle lookups share the source's deadline with the feed fetches
+        channels = await resolve_channels_async(channels, engine=engine, deadline=budget.remaining())
+        all_videos = []
+        channel_fetches = [fetch_channel(name, cid) for name, cid in channels.items()]
+        with metrics.stage("youtube.feeds"):
+            fetched = await gather_within(budget, channel_fetches, "YouTube channels", default=[])
+        for videos in fetched:
+            all_videos.extend(videos)
 
     # Sort all collected videos by score descending
-    all_videos.sort(key=lambda x: x['score'], reverse=True)
+    all_videos.sort(key=lambda x: x.score, reverse=True)
 
     return all_videos
 
+def fetch_videos(channels: Optional[Dict[str, str]] = None, limit: int = 3,
+                 deadline: Optional[float] = None, skip_delivered: bool = False,
+                 max_age: Optional[float] = DEFAULT_FEED_MAX_AGE) -> List[Video]:
+    """
+    Fetches latest videos from selected AI YouTube channels.
+
+    Sync wrapper around fetch_videos_async.
+
+    Args:
+        channels (Optional[Dict[str, str]]): Dictionary of channel names and IDs or @handles.
+        limit (int): The number of videos to fetch per channel (default: 3).
+        deadline (Optional[float]): Time budget in seconds (default: None, unlimited).
+        skip_delivered (bool): If True, the channel's latest videos already sent in a digest are left out (default: False).
+        max_age (Optional[float]): Seconds a cached channel feed is served without a request (default: DEFAULT_FEED_MAX_AGE); None to always revalidate.
+
+    Returns:
+        List[Video]: The videos, most popular first.
+    """
+    return run_sync(fetch_videos_async, channels=channels, limit=limit, deadline=deadline,
+                    skip_delivered=skip_delivered, max_age=max_age)
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     results = fetch_videos()
@@ -1,30 +1,53 @@
-import requests
-from bs4 import BeautifulSoup
-
-def get_channel_id(handle):
-    url = f"https://www.youtube.com/{handle}"
-    try:
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Method 1: meta tag
-        meta_id = soup.find('meta', itemprop='channelId')
-        if meta_id:
-            return meta_id['content']
-
-        # Method 2: link tag
-        link_id = soup.find('link', rel='canonical')
-        if link_id:
-            href = link_id['href']
-            if '/channel/' in href:
-                return href.split('/channel/')[-1]
-
-        return None
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
-
-handles = ["@ByteByteGo", "@gkcs", "@hnasr"]
-for handle in handles:
-    cid = get_channel_id(handle)
-    print(f"{handle}: {cid}")
+"""
+Resolves YouTube handles to channel IDs.
+
+Channel IDs are remembered in the channel cache (.cache/channels.sqlite3),
+so each handle is looked up once. config.yaml can list @handles instead of
+IDs under sources.youtube; they are resolved the same way on the first run.
+
+Usage:
+    python get_channel_id.py @ByteByteGo @gkcs @hnasr
+    python get_channel_id.py --file handles.txt
+    python get_channel_id.py --config config.yaml
+"""
+import sys
+import argparse
+import logging
+import yaml
+from fetchers import channels
+
+def read_handles(path: str):
+    """One handle per line; blank lines and # comments are ignored."""
+    with open(path) as f:
+        lines = [line.split("#", 1)[0].strip() for line in f]
+    return [line for line in lines if line]
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve YouTube handles to channel IDs")
+    parser.add_argument("handles", nargs="*", help="Handles such as @ByteByteGo")
+    parser.add_argument("--file", help="Read handles from a file, one per line")
+    parser.add_argument("--config", help="Resolve every @handle under sources.youtube in this config file")
+    parser.add_argument("--concurrency", type=int, default=channels.DEFAULT_CONCURRENCY)
+    parser.add_argument("--refresh", action="store_true", help="Look handles up again even if cached")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    handles = list(args.handles)
+    if args.file:
+        handles += read_handles(args.file)
+    if args.config:
+        with open(args.config) as f:
+            handles += channels.handles_in_config(yaml.safe_load(f) or {})
+    # Accept handles given without the leading @
+    handles = [handle if channels.is_handle(handle) else f"@{handle}" for handle in handles]
+    if not handles:
+        parser.error("no handles given")
+
+    resolved = channels.resolve_handles(handles, concurrency=args.concurrency, refresh=args.refresh)
+    for handle, channel_id in resolved.items():
+        print(f"{handle}: {channel_id}")
+    return 0 if all(resolved.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
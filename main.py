@@ -2,10 +2,12 @@ import os
 import argparse
 import yaml
 import logging
-import concurrent.futures
 from dotenv import load_dotenv
-from fetchers import arxiv, youtube, news, rss
-import emailer
+from fetchers import cache, store, metrics, registry
+from pipeline import build_jobs, fetch, make_section_handler, remove_duplicates, print_preview, deliver, write_report
+
+# Fetcher modules, the HTTP stack and the emailer (with Jinja) are imported
+# only when a run needs them, so short runs and --sources subsets start fast.
 
 # Configure logging
 logging.basicConfig(
@@ -27,6 +29,15 @@ def main():
     parser = argparse.ArgumentParser(description="Daily AI Digest Generator")
     parser.add_argument("--dry-run", action="store_true", help="Run without sending email")
     parser.add_argument("--config", default="config.yaml", help="Path to configuration file")
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads",
+                        help="Fetch engine: a thread per source (default) or one asyncio event loop for every request")
+    parser.add_argument("--sources", nargs="+", metavar="SECTION",
+                        help="Only fetch these sections (default: all enabled in config), e.g. news rss ai_papers")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep running: refresh each source on its own schedule and send at `daemon.send_at` (see config.yaml)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Serve the digest over HTTP (see `server` in config.yaml), refreshing sources like --daemon; "
+                             "only sends email when combined with --daemon")
     args = parser.parse_args()
 
     load_dotenv()
@@ -43,124 +54,61 @@ def main():
             }
         }
 
-    # Config Check for Email
-    if not os.getenv("EMAIL_USER") or not os.getenv("EMAIL_PASS") or not os.getenv("RECIPIENT_EMAIL"):
-        if not args.dry_run:
-            logger.error("Environment variables for email not set. Exiting.")
-            return
-
-    logger.info("Starting Daily AI Digest generation...")
-
-    # Fetching Content in Parallel
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # Prepare futures
-        futures = {}
-
-        # arXiv: AI Papers
-        arxiv_conf = config.get("sources", {}).get("arxiv", {})
-        ai_topics = arxiv_conf.get("ai_topics", ["cs.AI", "cs.LG", "cs.CL", "cs.CV"])
-        ai_limit = arxiv_conf.get("ai_limit", 5)
-        futures[executor.submit(arxiv.fetch_papers, topics=ai_topics, limit=ai_limit)] = "ai_papers"
-
-        # arXiv: System Design Papers
-        sys_topics = arxiv_conf.get("system_design_topics", ["cs.DC", "cs.SE", "cs.NI", "cs.DB"])
-        sys_limit = arxiv_conf.get("system_design_limit", 3)
-        futures[executor.submit(arxiv.fetch_papers, topics=sys_topics, limit=sys_limit, sort_mode="random")] = "sys_papers"
-
-        # YouTube: AI Videos
-        yt_conf = config.get("sources", {}).get("youtube", {})
-        ai_channels = yt_conf.get("ai_channels", None)
-        ai_limit_yt = yt_conf.get("ai_limit", 3)
-        futures[executor.submit(youtube.fetch_videos, channels=ai_channels, limit=ai_limit_yt)] = "ai_videos"
-
-        # YouTube: System Design Videos
-        sys_channels = yt_conf.get("system_design_channels", None)
-        sys_limit_yt = yt_conf.get("system_design_limit", 3)
-        futures[executor.submit(youtube.fetch_videos, channels=sys_channels, limit=sys_limit_yt)] = "sys_videos"
-
-        # News
-        news_conf = config.get("sources", {}).get("news", {})
-        keywords = news_conf.get("keywords", ["AI", "LLM"])
-        news_limit = news_conf.get("limit", 5)
-        futures[executor.submit(news.fetch_news, keywords=keywords, limit=news_limit)] = "news"
-
-        # RSS
-        rss_conf = config.get("sources", {}).get("rss", {})
-        feeds = rss_conf.get("feeds", [])
-        rss_limit = rss_conf.get("limit", 5)
-        futures[executor.submit(rss.fetch_rss, feeds=feeds, limit=rss_limit, one_per_source=True)] = "rss"
-
-        # Engineering Blogs
-        eng_conf = config.get("sources", {}).get("engineering_blogs", {})
-        eng_feeds = eng_conf.get("feeds", [])
-        eng_limit = eng_conf.get("limit", 5)
-        futures[executor.submit(rss.fetch_rss, feeds=eng_feeds, limit=eng_limit, one_per_source=True)] = "eng_blogs"
-
-        # Collect results
-        results = {
-            "ai_papers": [], "sys_papers": [],
-            "ai_videos": [], "sys_videos": [],
-            "news": [], "rss": [], "eng_blogs": []
-        }
-
-        for future in concurrent.futures.as_completed(futures):
-            name = futures[future]
-            try:
-                data = future.result()
-                results[name] = data
-                logger.info(f"Fetched {len(data)} items for {name}")
-            except Exception as e:
-                logger.error(f"Error fetching {name}: {e}")
-
-    # Extract results
-    ai_papers = results["ai_papers"]
-    sys_papers = results["sys_papers"]
-    ai_videos = results["ai_videos"]
-    sys_videos = results["sys_videos"]
-    news_items = results["news"]
-    rss_items = results["rss"]
-    eng_blogs = results["eng_blogs"]
+    cache.configure(config.get("cache", {}))
+    store.configure(config.get("database", {}))
 
-    if args.dry_run:
-        print("\n=== DRY RUN MODE: Email Content Preview ===")
+    # Extra sources register themselves on import
+    registry.load_plugins(config.get("plugins") or [])
+    section_keys = [section.key for section in registry.sections()]
+    unknown = [name for name in args.sources or [] if name not in section_keys]
+    if unknown:
+        parser.error(f"unknown section(s) {', '.join(unknown)}; choose from {', '.join(section_keys)}")
 
-        print(f"AI Papers: {len(ai_papers)}")
-        for p in ai_papers:
-            print(f"- {p['title']}\n  Link: {p['link']}\n  Abstract length: {len(p['summary'])} chars\n")
+    # Recipients come from config and/or RECIPIENT_EMAIL (comma-separated)
+    email_conf = config.get("email", {})
+    recipient_entries = list(email_conf.get("recipients") or [])
+    if os.getenv("RECIPIENT_EMAIL"):
+        recipient_entries.append(os.getenv("RECIPIENT_EMAIL"))
 
-        print(f"System Design Papers: {len(sys_papers)}")
-        for p in sys_papers:
-            print(f"- {p['title']}\n  Link: {p['link']}\n  Abstract length: {len(p['summary'])} chars\n")
+    # Config Check for Email
+    sends_email = not args.dry_run and (args.daemon or not args.serve)
+    if not os.getenv("EMAIL_USER") or not os.getenv("EMAIL_PASS") or not recipient_entries:
+        if sends_email:
+            logger.error("Environment variables for email not set. Exiting.")
+            return
 
-        print(f"AI Videos: {len(ai_videos)}")
-        for v in ai_videos:
-            print(f"- {v['title']}\n  Link: {v['link']}\n  Thumbnail: {v['thumbnail']}\n")
+    metrics.reset()
+    metrics.install_log_counter()
 
-        print(f"System Design Videos: {len(sys_videos)}")
-        for v in sys_videos:
-            print(f"- {v['title']}\n  Link: {v['link']}\n  Thumbnail: {v['thumbnail']}\n")
+    item_store = store.get_item_store()
+    emailer = None
+    if not args.dry_run or args.serve:
+        import emailer
 
-        print(f"News: {len(news_items)}")
-        for n in news_items:
-            print(f"- {n['title']}\n  Link: {n['link']}\n  Thumbnail: {n.get('thumbnail', 'None')}\n")
+    jobs = build_jobs(config, args.sources)
 
-        print(f"RSS Items: {len(rss_items)}")
-        for r in rss_items:
-            print(f"- [{r['source']}] {r['title']}\n  Link: {r['link']}\n  Thumbnail: {r.get('thumbnail', 'None')}\n")
+    if args.daemon or args.serve:
+        import daemon
+        digest_daemon = daemon.DigestDaemon(config, jobs, args.engine, recipient_entries, item_store,
+                                            emailer, send=args.daemon, dry_run=args.dry_run)
+        if args.serve:
+            import server
+            server.serve(digest_daemon, emailer, config.get("server", {}))
+        else:
+            digest_daemon.run()
+        return
 
-        print(f"Engineering Blogs: {len(eng_blogs)}")
-        for r in eng_blogs:
-            print(f"- [{r['source']}] {r['title']}\n  Link: {r['link']}\n  Thumbnail: {r.get('thumbnail', 'None')}\n")
+    logger.info("Starting Daily AI Digest generation...")
+    skip_delivered = config.get("database", {}).get("skip_delivered", True)
+    results = fetch(config, jobs, args.engine, make_section_handler(item_store, emailer, skip_delivered))
+    results, duplicates = remove_duplicates(config, results)
 
-        print("===========================================")
+    if args.dry_run:
+        print_preview(results)
     else:
-        recipient = os.getenv("RECIPIENT_EMAIL")
-        if recipient:
-            logger.info(f"Sending email to {recipient}...")
-            # We pass the raw data, emailer handles formatting
-            emailer.send_email(ai_papers, sys_papers, ai_videos, sys_videos, news_items, rss_items, eng_blogs, recipient)
-        else:
-            logger.warning("RECIPIENT_EMAIL not set. Skipping email.")
+        deliver(emailer, config, results, duplicates, recipient_entries, item_store)
+
+    write_report(config.get("report", {}))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,264 @@
+import asyncio
+import importlib
+import logging
+import concurrent.futures
+from fetchers import metrics, registry
+from fetchers.deadline import Deadline, earliest
+import dedup
+
+# The digest pipeline shared by main.py, daemon.py and server.py: building
+# and running the fetch jobs, deduplicating, and delivering or previewing.
+
+logger = logging.getLogger(__name__)
+
+# Extra time a source gets past its deadline to return partial results before it is abandoned
+DEADLINE_GRACE = 5
+
+def load_fetcher(module_name, func_name):
+    """Imports a fetcher module (`fetchers.<module_name>` unless the name is dotted) and returns `func_name`."""
+    if "." not in module_name:
+        module_name = f"fetchers.{module_name}"
+    return getattr(importlib.import_module(module_name), func_name)
+
+def build_jobs(config, sections=None):
+    """
+    Builds the list of fetch jobs for the registered sources (see fetchers.registry).
+
+    Each job is (name, fetcher module name, function name, kwargs); see
+    load_fetcher. The async engine calls `<function name>_async` on the same
+    module with the same kwargs. Sources with `enabled: false` in the config
+    are left out, as are sections not listed in `sections` (if given).
+    """
+    jobs = []
+    skip_delivered = config.get("database", {}).get("skip_delivered", True)
+    wanted = set(sections or [section.key for section in registry.sections()])
+
+    for source in registry.sources():
+        conf = config.get("sources", {}).get(source.config_key) or {}
+        if not conf.get("enabled", True):
+            continue
+        source_sections = [section.key for section in source.sections if section.key in wanted]
+        if not source_sections:
+            continue
+        kwargs = source.build_kwargs(conf, source_sections)
+        if kwargs is None:
+            continue
+        kwargs["deadline"] = conf.get("deadline")
+        kwargs["skip_delivered"] = skip_delivered
+        jobs.append((source.name, source.module, source.func, kwargs))
+
+    return jobs
+
+def _empty_results():
+    return {section.key: [] for section in registry.sections()}
+
+def _record_result(results, name, data, on_section=None):
+    # Multi-section fetches return a dict of section name -> items
+    sections = data if isinstance(data, dict) else {name: data}
+    section_specs = {section.key: section for section in registry.sections()}
+    for section_name, items in sections.items():
+        if section_name in section_specs:
+            items = registry.validate(section_specs[section_name], items)
+        logger.info(f"Fetched {len(items)} items for {section_name}")
+        if on_section is not None:
+            items = on_section(section_name, items)
+        results[section_name] = items
+
+def _with_run_deadline(kwargs, run_deadline):
+    """Clamps a job's own deadline to the time left in the run."""
+    return {**kwargs, "deadline": earliest(kwargs.get("deadline"), run_deadline.remaining())}
+
+def _timed(name, func, kwargs):
+    with metrics.stage(f"fetch.{name}"):
+        return func(**kwargs)
+
+def fetch_all_threaded(jobs, run_deadline=None, on_section=None):
+    """
+    Runs each job's sync fetcher on a thread pool.
+
+    Jobs still running DEADLINE_GRACE seconds after the run deadline are
+    abandoned and their sections left empty. `on_section(name, items)` is
+    called for each section as soon as its fetch completes, while the others
+    are still running; it returns the items to keep.
+    """
+    run_deadline = run_deadline or Deadline()
+    results = _empty_results()
+
+    # Fetching Content in Parallel
+    executor = concurrent.futures.ThreadPoolExecutor()
+    try:
+        futures = {
+            executor.submit(_timed, name, load_fetcher(module_name, func_name), _with_run_deadline(kwargs, run_deadline)): name
+            for name, module_name, func_name, kwargs in jobs
+        }
+
+        remaining = run_deadline.remaining()
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=None if remaining is None else remaining + DEADLINE_GRACE):
+                name = futures[future]
+                try:
+                    _record_result(results, name, future.result(), on_section)
+                except Exception as e:
+                    logger.error(f"Error fetching {name}: {e}")
+        except concurrent.futures.TimeoutError:
+            unfinished = sorted(name for future, name in futures.items() if not future.done())
+            logger.error(f"Run deadline reached, continuing without: {', '.join(unfinished)}")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
+async def fetch_all_async(jobs, engine_conf=None, run_deadline=None, on_section=None):
+    """
+    Runs every job's async fetcher in one event loop sharing one AsyncEngine.
+
+    Jobs still running DEADLINE_GRACE seconds after the run deadline are
+    cancelled and their sections left empty. `on_section` is called as in
+    fetch_all_threaded.
+    """
+    from fetchers.engine import AsyncEngine, DEFAULT_MAX_CONCURRENCY, DEFAULT_PER_HOST
+
+    engine_conf = engine_conf or {}
+    run_deadline = run_deadline or Deadline()
+    results = _empty_results()
+    engine = AsyncEngine(
+        max_concurrency=engine_conf.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+        per_host=engine_conf.get("per_host", DEFAULT_PER_HOST)
+    )
+
+    async def run_job(name, module_name, func_name, kwargs):
+        kwargs = _with_run_deadline(kwargs, run_deadline)
+        limit = None if kwargs["deadline"] is None else kwargs["deadline"] + DEADLINE_GRACE
+        try:
+            with metrics.stage(f"fetch.{name}"):
+                data = await asyncio.wait_for(load_fetcher(module_name, f"{func_name}_async")(engine=engine, **kwargs), timeout=limit)
+            _record_result(results, name, data, on_section)
+        except asyncio.TimeoutError:
+            logger.error(f"Deadline reached, continuing without {name}")
+        except Exception as e:
+            logger.error(f"Error fetching {name}: {e}")
+
+    try:
+        await asyncio.gather(*[run_job(*job) for job in jobs])
+    finally:
+        engine.close()
+
+    return results
+
+def make_section_handler(item_store, emailer=None, skip_delivered=True):
+    """
+    Returns the on_section callback for the fetch engines.
+
+    It records each completed section in the item store, leaves out what
+    earlier digests already sent (unless `skip_delivered` is False) and, if
+    `emailer` is given, renders the section while other sources are still
+    fetching.
+    """
+    def on_section(section_name, items):
+        # Remember everything fetched and leave out what earlier digests already sent
+        if item_store is not None:
+            with metrics.stage("store"):
+                item_store.record(section_name, items)
+                if skip_delivered:
+                    items = item_store.undelivered(items)
+        # After dedup only the sections that lost items are rendered again
+        section = registry.find_section(section_name)
+        if emailer is not None and section is not None:
+            try:
+                emailer.render_section(section, items)
+            except Exception as e:
+                logger.warning(f"Could not pre-render {section_name}: {e}")
+        return items
+    return on_section
+
+def fetch(config, jobs, engine="threads", on_section=None):
+    """Runs the fetch jobs on the chosen engine within the run deadline and returns items by section."""
+    run_deadline = Deadline(config.get("run_deadline"))
+    with metrics.stage("fetch"):
+        if engine == "async":
+            results = asyncio.run(fetch_all_async(jobs, config.get("engine", {}), run_deadline, on_section))
+        else:
+            results = fetch_all_threaded(jobs, run_deadline, on_section)
+    for section_name, items in results.items():
+        metrics.count(f"items.{section_name}", len(items))
+    return results
+
+def remove_duplicates(config, results):
+    """
+    Applies the `dedup` config.
+
+    Returns the deduplicated results and the dropped items that repeat a
+    kept item's link. Items dropped only for a similar title are left out of
+    the latter, so they are not marked delivered and can still appear later
+    should the match have been wrong.
+    """
+    # The same story often shows up in several sections; keep only its first appearance
+    dedup_conf = config.get("dedup", {})
+    if not dedup_conf.get("enabled", True):
+        return results, []
+    with metrics.stage("dedup"):
+        results, same_link, _ = dedup.dedup_sections(
+            results, title_threshold=dedup_conf.get("title_threshold", dedup.DEFAULT_TITLE_THRESHOLD)
+        )
+    return results, same_link
+
+def print_preview(results):
+    print("\n=== DRY RUN MODE: Email Content Preview ===")
+
+    for section in registry.sections():
+        items = results.get(section.key, [])
+        print(f"{section.label}: {len(items)}")
+        for item in items:
+            print(registry.preview(section, item))
+
+    print("===========================================")
+
+def sent_sections(results, recipients):
+    """The keys of the sections in `results` that at least one of `recipients` (emailer.Recipient) received."""
+    return [key for key in results if any(r.sections is None or key in r.sections for r in recipients)]
+
+def deliver(emailer, config, results, duplicates, recipient_entries, item_store):
+    """
+    Sends the digest to every recipient and marks what was sent as delivered.
+
+    Only sections that at least one recipient actually received are marked,
+    so a section nobody selected stays available for later digests.
+
+    Returns:
+        List[emailer.Recipient]: The recipients the digest was sent to.
+    """
+    email_conf = config.get("email", {})
+    recipients = emailer.parse_recipients(recipient_entries)
+    if not recipients:
+        logger.warning("No recipients configured. Skipping email.")
+        return []
+
+    logger.info(f"Sending email to {len(recipients)} recipients...")
+    # Content is fetched once; each recipient gets their selection of sections
+    sent = emailer.send_batch(
+        results, recipients,
+        host=email_conf.get("smtp_host", emailer.SMTP_HOST),
+        port=email_conf.get("smtp_port", emailer.SMTP_PORT),
+        interval=email_conf.get("send_interval", emailer.DEFAULT_SEND_INTERVAL)
+    )
+    if sent and item_store is not None:
+        delivered = [item for key in sent_sections(results, sent) for item in results[key]]
+        item_store.mark_delivered(delivered)
+        # Repeats of a sent link count as delivered so they don't resurface in tomorrow's digest
+        delivered_links = {dedup.canonical_link(item['link']) for item in delivered}
+        item_store.mark_delivered([item for item in duplicates if dedup.canonical_link(item['link']) in delivered_links])
+    return sent
+
+def write_report(report_conf):
+    """Writes the run's metrics to the JSON report and Prometheus textfile named in the `report` config."""
+    data = metrics.report()
+    stages = data["stages"]
+    logger.info(", ".join(f"{name} {stages[name]['seconds']:.1f}s" for name in stages if name.startswith("fetch")))
+    try:
+        if report_conf.get("json"):
+            metrics.write_json(report_conf["json"], data)
+            logger.info(f"Run report written to {report_conf['json']}")
+        if report_conf.get("prometheus"):
+            metrics.write_prometheus(report_conf["prometheus"], data)
+    except OSError as e:
+        logger.error(f"Could not write run report: {e}")
@@ -0,0 +1,200 @@
+import json
+import hashlib
+import datetime
+import threading
+import logging
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, NamedTuple, Optional, Tuple
+from fetchers import metrics, registry
+import pipeline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+# Cache-Control max-age for digest responses; clients revalidate with If-None-Match after that
+DEFAULT_CACHE_SECONDS = 60
+# Rendered responses kept per version of the items (one per path and section selection)
+MAX_CACHED_RESPONSES = 256
+
+class Response(NamedTuple):
+    body: bytes
+    content_type: str
+    etag: str
+
+def _section_json(section: registry.Section, items) -> Dict:
+    return {"key": section.key, "title": section.title, "kind": section.kind, "items": [dict(item) for item in items]}
+
+class DigestView:
+    """
+    The digest endpoints, rendered from the items a DigestDaemon keeps fresh.
+
+    Responses are rendered once per version of the items and served from
+    memory until a refresh changes them, so any number of requests between
+    refreshes cost no fetches and almost no rendering.
+
+    Paths:
+        /digest.html, /digest.json: the whole digest; `?sections=a,b` selects sections.
+        /sections/<key>.html, /sections/<key>.json: one section.
+    """
+
+    def __init__(self, daemon, emailer):
+        self.daemon = daemon
+        self.emailer = emailer
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._results: Dict = {}
+        self._responses: Dict[Tuple[str, Optional[tuple]], Response] = {}
+
+    def version(self) -> str:
+        """Changes whenever a source is refreshed or a digest is sent (which prunes items), and daily (the digest is dated)."""
+        stamp = repr((sorted(dict(self.daemon.fetched_at).items()), getattr(self.daemon, "sent_at", None),
+                      datetime.date.today().isoformat()))
+        return hashlib.sha1(stamp.encode("utf-8")).hexdigest()
+
+    def _current_results(self) -> Dict:
+        # Called with the lock held
+        version = self.version()
+        if version != self._version:
+            results = {key: list(items) for key, items in self.daemon.results.items()}
+            self._results, _ = pipeline.remove_duplicates(self.daemon.config, results)
+            self._responses.clear()
+            self._version = version
+        return self._results
+
+    def get(self, path: str, sections: Optional[tuple] = None) -> Optional[Response]:
+        """Returns the response for `path`, or None if there is no such endpoint."""
+        with self._lock:
+            results = self._current_results()
+            key = (path, sections)
+            response = self._responses.get(key)
+            if response is not None:
+                metrics.count("cache.response.hit")
+                return response
+
+            metrics.count("cache.response.miss")
+            with metrics.stage("server.render"):
+                response = self._render(path, sections, results)
+            if response is not None:
+                if len(self._responses) >= MAX_CACHED_RESPONSES:
+                    self._responses.clear()
+                self._responses[key] = response
+            return response
+
+    def _render(self, path: str, sections: Optional[tuple], results: Dict) -> Optional[Response]:
+        selected = results if sections is None else {key: items for key, items in results.items() if key in sections}
+        date = datetime.date.today().isoformat()
+
+        if path == "/digest.html":
+            return self._response(self.emailer.render_digest(selected, date=date), "text/html; charset=utf-8")
+        if path == "/digest.json":
+            return self._response(json.dumps({
+                "date": date,
+                "sections": [_section_json(section, selected[section.key])
+                             for section in registry.display_sections() if section.key in selected],
+            }, default=str), "application/json")
+
+        if path.startswith("/sections/"):
+            name, _, extension = path[len("/sections/"):].rpartition(".")
+            section = registry.find_section(name)
+            if section is None or name not in results:
+                return None
+            if extension == "html":
+                return self._response(self.emailer.render_section(section, results[name]), "text/html; charset=utf-8")
+            if extension == "json":
+                return self._response(json.dumps(_section_json(section, results[name]), default=str), "application/json")
+        return None
+
+    @staticmethod
+    def _response(text: str, content_type: str) -> Response:
+        body = text.encode("utf-8")
+        return Response(body, content_type, f'"{hashlib.sha1(body).hexdigest()[:20]}"')
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def make_handler(view: DigestView, cache_seconds: int):
+    class DigestRequestHandler(BaseHTTPRequestHandler):
+        # Keep-alive, so a dashboard polling the digest reuses its connection. Headers and
+        # body go out in separate writes; without TCP_NODELAY each response waits on a delayed ACK
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            sections = None
+            if "sections" in query:
+                sections = tuple(sorted({key for value in query["sections"] for key in value.split(",") if key}))
+
+            try:
+                response = view.get(url.path, sections)
+            except Exception as e:
+                logger.error(f"Error rendering {self.path}: {e}")
+                return self._send(500, b"Internal error\n", "text/plain")
+            if response is None:
+                return self._send(404, b"Not found\n", "text/plain")
+
+            headers = {"ETag": response.etag, "Cache-Control": f"max-age={cache_seconds}"}
+            if _etag_matches(self.headers.get("If-None-Match"), response.etag):
+                metrics.count("server.not_modified")
+                return self._send(304, b"", None, headers)
+            self._send(200, response.body, response.content_type, headers)
+
+        def _send(self, status: int, body: bytes, content_type: Optional[str], headers: Optional[Dict] = None):
+            self.send_response(status)
+            if content_type:
+                self.send_header("Content-Type", content_type)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return DigestRequestHandler
+
+class DigestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, view: DigestView, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 cache_seconds: int = DEFAULT_CACHE_SECONDS):
+        super().__init__((host, port), make_handler(view, cache_seconds))
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+def serve(daemon, emailer, server_conf: Optional[Dict] = None):
+    """
+    Serves the digest over HTTP while `daemon` keeps the items fresh.
+
+    Runs until SIGINT/SIGTERM.
+
+    Args:
+        daemon (DigestDaemon): Refreshes sources on their schedule (and sends, if enabled).
+        emailer: The emailer module, used to render HTML.
+        server_conf (Optional[Dict]): The `server` config: `host`, `port` and `cache_seconds`.
+    """
+    server_conf = server_conf or {}
+    server = DigestServer(
+        DigestView(daemon, emailer),
+        host=server_conf.get("host", DEFAULT_HOST),
+        port=server_conf.get("port", DEFAULT_PORT),
+        cache_seconds=server_conf.get("cache_seconds", DEFAULT_CACHE_SECONDS)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving the digest at {server.base_url}/digest.html")
+    try:
+        # The daemon loop owns the signal handlers, so it runs on the main thread
+        daemon.run()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep persistent caches out of the working tree while testing
+os.environ.setdefault("DIGEST_CACHE_DIR", tempfile.mkdtemp(prefix="digest-test-cache-"))
@@ -0,0 +1,194 @@
+import os
+import time
+import sqlite3
+import tempfile
+import unittest
+import requests
+from unittest.mock import patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
+from fetchers import cache, metadata, http_client
+
+RSS_BODY = b'''<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Blog</title>
+<item><title>Post</title><link>http://blog.com/post</link></item>
+</channel></rss>'''
+
+class TestMetadataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = cache.MetadataCache(sqlite3.connect(":memory:", check_same_thread=False),
+                                         ttl=100, negative_ttl=10, max_entries=2)
+
+    def test_positive_and_negative_hits(self):
+        self.cache.set("http://a.com", "http://a.com/img.png")
+        self.cache.set("http://b.com", None)
+
+        self.assertEqual(self.cache.get("http://a.com"), (True, "http://a.com/img.png"))
+        self.assertEqual(self.cache.get("http://b.com"), (True, None))
+        self.assertEqual(self.cache.get("http://c.com"), (False, None))
+
+    @patch('fetchers.cache.time.time')
+    def test_ttl_expiry(self, mock_time):
+        mock_time.return_value = 1000
+        self.cache.set("http://a.com", "http://a.com/img.png")
+        self.cache.set("http://b.com", None)
+
+        # Negative results expire first
+        mock_time.return_value = 1050
+        self.assertEqual(self.cache.get("http://a.com"), (True, "http://a.com/img.png"))
+        self.assertEqual(self.cache.get("http://b.com"), (False, None))
+
+        mock_time.return_value = 1200
+        self.assertEqual(self.cache.get("http://a.com"), (False, None))
+
+    @patch('fetchers.cache.time.time')
+    def test_lru_eviction(self, mock_time):
+        mock_time.return_value = 1
+        self.cache.set("http://a.com", "a")
+        mock_time.return_value = 2
+        self.cache.set("http://b.com", "b")
+        mock_time.return_value = 3
+        self.cache.get("http://a.com") # a is now more recent than b
+        mock_time.return_value = 4
+        self.cache.set("http://c.com", "c")
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.get("http://b.com"), (False, None))
+        self.assertEqual(self.cache.get("http://a.com"), (True, "a"))
+
+    @patch('fetchers.metadata.http_client.get')
+    def test_fetch_og_image_uses_cache(self, mock_get):
+        mock_resp = MagicMock()
+        mock_resp.headers = {'Content-Type': 'text/html'}
+        mock_resp.iter_content.return_value = [b'<html><head><meta property="og:image" content="http://img.jpg"></head></html>']
+        mock_get.return_value = mock_resp
+
+        with patch('fetchers.metadata.cache.get_metadata_cache', return_value=self.cache):
+            first = metadata.fetch_og_image("http://example.com/cached-article")
+            second = metadata.fetch_og_image("http://example.com/cached-article")
+
+        self.assertEqual(first, "http://img.jpg")
+        self.assertEqual(second, "http://img.jpg")
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('fetchers.metadata.http_client.get')
+    def test_error_pages_are_not_cached(self, mock_get):
+        mock_resp = MagicMock()
+        mock_resp.headers = {'Content-Type': 'text/html'}
+        mock_resp.raise_for_status.side_effect = requests.HTTPError("403 Client Error: Forbidden")
+        mock_resp.iter_content.return_value = [b'<html><head><title>Access denied</title></head></html>']
+        mock_get.return_value = mock_resp
+
+        with patch('fetchers.metadata.cache.get_metadata_cache', return_value=self.cache):
+            self.assertIsNone(metadata.fetch_og_image("http://example.com/blocked"))
+
+        self.assertEqual(self.cache.get("http://example.com/blocked"), (False, None))
+        mock_resp.iter_content.assert_not_called()
+        mock_resp.close.assert_called_once()
+
+class TestFeedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = cache.FeedCache(sqlite3.connect(":memory:", check_same_thread=False))
+
+    def _response(self, status_code, content=b'', headers=None):
+        resp = MagicMock()
+        resp.status_code = status_code
+        resp.content = content
+        resp.headers = headers or {}
+        return resp
+
+    @patch('fetchers.http_client.get')
+    def test_conditional_get_serves_cached_feed_on_304(self, mock_get):
+        mock_get.side_effect = [
+            self._response(200, RSS_BODY, {'ETag': '"v1"', 'Last-Modified': 'Mon, 23 Oct 2023 10:00:00 GMT'}),
+            self._response(304),
+        ]
+
+        with patch('fetchers.http_client.cache.get_feed_cache', return_value=self.cache), \
+             patch('fetchers.http_client.feedparser.parse', wraps=http_client.feedparser.parse) as mock_parse:
+            first = http_client.fetch_feed("http://blog.com/feed")
+            second = http_client.fetch_feed("http://blog.com/feed")
+
+        self.assertEqual(mock_get.call_args_list[0].kwargs['headers'], {})
+        self.assertEqual(mock_get.call_args_list[1].kwargs['headers'], {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Mon, 23 Oct 2023 10:00:00 GMT'
+        })
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertEqual(second.entries[0].title, first.entries[0].title)
+        self.assertEqual(second.feed.title, "Blog")
+
+    @patch('fetchers.http_client.get')
+    def test_max_age_serves_cached_feed_without_request(self, mock_get):
+        mock_get.return_value = self._response(200, RSS_BODY)
+
+        with patch('fetchers.http_client.cache.get_feed_cache', return_value=self.cache):
+            http_client.fetch_feed("http://blog.com/feed")
+            cached = http_client.fetch_feed("http://blog.com/feed", max_age=3600)
+
+        mock_get.assert_called_once()
+        self.assertEqual(cached.feed.title, "Blog")
+
+    @patch('fetchers.http_client.get')
+    def test_concurrent_fetches_share_one_request(self, mock_get):
+        def slow_get(url, **kwargs):
+            time.sleep(0.2)
+            if url == "http://broken.com/feed":
+                raise IOError("boom")
+            return self._response(200, RSS_BODY)
+        mock_get.side_effect = slow_get
+
+        def fetch(url):
+            try:
+                return http_client.fetch_feed(url)
+            except IOError as e:
+                return e
+
+        with patch('fetchers.http_client.cache.get_feed_cache', return_value=self.cache), \
+             ThreadPoolExecutor(max_workers=6) as pool:
+            urls = ["http://blog.com/feed"] * 4 + ["http://broken.com/feed"] * 2
+            results = list(pool.map(fetch, urls))
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertTrue(all(r is results[0] for r in results[:4]))
+        self.assertTrue(all(isinstance(r, IOError) for r in results[4:]))
+
+        # Nothing is left in flight, so a later call fetches again
+        with patch('fetchers.http_client.cache.get_feed_cache', return_value=self.cache):
+            http_client.fetch_feed("http://blog.com/feed")
+        self.assertEqual(mock_get.call_count, 3)
+
+class TestSectionCache(unittest.TestCase):
+
+    @patch('fetchers.cache.time.time')
+    def test_lru_eviction(self, mock_time):
+        section_cache = cache.SectionCache(sqlite3.connect(":memory:", check_same_thread=False), max_entries=2)
+        for now, key in enumerate(["a", "b"]):
+            mock_time.return_value = now
+            section_cache.set(key, f"<h2>{key}</h2>")
+        mock_time.return_value = 3
+        self.assertEqual(section_cache.get("a"), "<h2>a</h2>") # a is now more recent than b
+        mock_time.return_value = 4
+        section_cache.set("c", "<h2>c</h2>")
+
+        self.assertEqual(len(section_cache), 2)
+        self.assertIsNone(section_cache.get("b"))
+        self.assertEqual(section_cache.get("c"), "<h2>c</h2>")
+
+class TestSharedCaches(unittest.TestCase):
+
+    def test_close_caches_reopens_in_new_dir(self):
+        self.addCleanup(cache.close_caches)
+        cache.get_metadata_cache().set("http://a.com", "a")
+
+        new_dir = tempfile.mkdtemp(prefix="digest-test-cache-")
+        with patch.dict(os.environ, {"DIGEST_CACHE_DIR": new_dir}):
+            cache.close_caches()
+            self.assertEqual(cache.get_metadata_cache().get("http://a.com"), (False, None))
+            cache.close_caches()
+
+        self.assertEqual(cache.get_metadata_cache().get("http://a.com"), (True, "a"))
+
+if __name__ == '__main__':
+    unittest.main()
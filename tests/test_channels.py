@@ -0,0 +1,86 @@
+import time
+import sqlite3
+import unittest
+from unittest.mock import patch, MagicMock
+from fetchers import cache, channels
+
+class TestResolveHandle(unittest.TestCase):
+
+    @patch('fetchers.metadata.http_client.get')
+    def test_stops_reading_once_id_is_seen(self, mock_get):
+        resp = MagicMock()
+        resp.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        resp.encoding = 'utf-8'
+        resp.iter_content.return_value = iter([
+            b'<html><head><meta property="og:url" content="https://www.youtube.com/channel/UC123">',
+            b'<script>' + b'x' * 1000 + b'</script>',
+            b'</head><body>',
+        ])
+        mock_get.return_value = resp
+
+        self.assertEqual(channels.resolve_handle("@example"), "UC123")
+        self.assertEqual(mock_get.call_args.args[0], "https://www.youtube.com/@example")
+        # The rest of the (large) head was never pulled
+        self.assertEqual(len(list(resp.iter_content.return_value)), 2)
+
+class TestResolveHandles(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = cache.ChannelCache(sqlite3.connect(":memory:", check_same_thread=False))
+        patcher = patch('fetchers.channels.cache.get_channel_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('fetchers.channels.resolve_handle')
+    def test_resolves_once_and_retries_failures(self, mock_resolve):
+        mock_resolve.side_effect = lambda handle, timeout=None: {"@a": "UCa", "@b": "UCb"}.get(handle)
+
+        first = channels.resolve_handles(["@a", "@b", "@missing", "@a"])
+        self.assertEqual(first, {"@a": "UCa", "@b": "UCb", "@missing": None})
+        self.assertEqual(mock_resolve.call_count, 3)
+
+        mock_resolve.reset_mock()
+        second = channels.resolve_handles(["@A", "@b", "@missing"])
+        self.assertEqual(second, {"@A": "UCa", "@b": "UCb", "@missing": None})
+        # Only the handle that failed before is looked up again
+        self.assertEqual([c.args[0] for c in mock_resolve.call_args_list], ["@missing"])
+
+        mock_resolve.reset_mock()
+        channels.resolve_handles(["@a"], refresh=True)
+        mock_resolve.assert_called_once()
+
+    @patch('fetchers.channels.resolve_handle')
+    def test_resolve_channels_mixes_ids_and_handles(self, mock_resolve):
+        mock_resolve.side_effect = lambda handle, timeout=None: "UCb" if handle == "@b" else None
+
+        resolved = channels.run_sync(channels.resolve_channels_async, {"A": "UCa", "B": "@b", "Gone": "@gone"})
+
+        self.assertEqual(resolved, {"A": "UCa", "B": "UCb"})
+
+    @patch('fetchers.channels.resolve_handle')
+    def test_lookups_bounded_by_deadline(self, mock_resolve):
+        def resolve(handle, timeout=None):
+            if handle == "@slow":
+                time.sleep(0.5)
+            return "UC" + handle[1:]
+        mock_resolve.side_effect = resolve
+
+        resolved = channels.run_sync(channels.resolve_handles_async, ["@fast", "@slow"], deadline=0.2)
+
+        self.assertEqual(resolved, {"@fast": "UCfast", "@slow": None})
+        # Each request's own timeout is clamped to the time left
+        self.assertTrue(all(c.kwargs["timeout"] <= 0.2 for c in mock_resolve.call_args_list))
+        # The abandoned lookup is not remembered, so the next run tries again
+        self.assertEqual(self.cache.get_many(["@fast", "@slow"]), {"@fast": "UCfast"})
+
+    def test_handles_in_config(self):
+        config = {"sources": {"youtube": {
+            "ai_channels": {"A": "UCa", "B": "@b"},
+            "system_design_channels": {"C": "@c"},
+            "ai_limit": 3,
+        }}}
+
+        self.assertEqual(channels.handles_in_config(config), ["@b", "@c"])
+
+if __name__ == '__main__':
+    unittest.main()
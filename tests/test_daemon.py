@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import unittest
+import datetime
+from datetime import timezone
+from unittest.mock import patch
+import daemon
+from fetchers import cache, store
+
+JOBS = [
+    ("news", "news", "fetch_news", {}),
+    ("arxiv", "arxiv", "fetch_sections", {}),
+]
+
+def ts(*args) -> float:
+    return datetime.datetime(*args, tzinfo=timezone.utc).timestamp()
+
+def fake_fetch(config, jobs, engine="threads", on_section=None):
+    results = {}
+    for name, *_ in jobs:
+        if name == "arxiv":
+            results["ai_papers"] = [{"title": "Paper", "link": "http://arxiv.org/abs/1", "summary": "s", "published": "2024-01-01"}]
+        else:
+            results[name] = [{"title": f"{name} item", "link": f"http://{name}.com/1", "popularity": 0}]
+    return results
+
+@patch('daemon.pipeline.write_report')
+@patch('daemon.pipeline.fetch', side_effect=fake_fetch)
+class TestDigestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        path = os.path.join(cache.cache_dir(), daemon.SNAPSHOT_FILE)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def make(self, jobs=JOBS, **config):
+        return daemon.DigestDaemon(config, jobs)
+
+    def test_refreshes_each_source_on_its_own_interval(self, mock_fetch, mock_report):
+        digest_daemon = self.make(daemon={"refresh_minutes": {"news": 30}})
+        start = ts(2024, 1, 1, 3)
+        next_send = daemon.next_send_time("02:00", start)
+
+        digest_daemon.run_once(start, next_send)
+        self.assertEqual([job[0] for job in mock_fetch.call_args.args[1]], ["news", "arxiv"])
+
+        digest_daemon.run_once(start + 10 * 60, next_send)
+        self.assertEqual(mock_fetch.call_count, 1)
+
+        digest_daemon.run_once(start + 30 * 60, next_send)
+        self.assertEqual([job[0] for job in mock_fetch.call_args.args[1]], ["news"])
+        self.assertEqual(digest_daemon.next_refresh_time(), start + 60 * 60)
+
+    def test_send_uses_prefetched_items_only(self, mock_fetch, mock_report):
+        digest_daemon = self.make()
+        start = ts(2024, 1, 1, 1, 30)
+        next_send = digest_daemon.run_once(start, daemon.next_send_time("02:00", start))
+        mock_fetch.reset_mock()
+
+        with patch('daemon.pipeline.print_preview') as mock_preview:
+            next_send = digest_daemon.run_once(ts(2024, 1, 1, 2), next_send)
+
+        mock_fetch.assert_not_called()
+        sent = mock_preview.call_args.args[0]
+        self.assertEqual(sent["news"][0]["title"], "news item")
+        self.assertEqual(sent["ai_papers"][0]["title"], "Paper")
+        self.assertEqual(next_send, ts(2024, 1, 2, 2))
+        mock_report.assert_called_once()
+
+    def test_send_respects_skip_delivered(self, mock_fetch, mock_report):
+        item_store = store.ItemStore(sqlite3.connect(":memory:", check_same_thread=False))
+        item_store.record("news", [{"link": "http://news.com/1"}])
+        item_store.mark_delivered([{"link": "http://news.com/1"}])
+        start = ts(2024, 1, 1, 1, 30)
+
+        for skip_delivered, expected in ((True, 0), (False, 1)):
+            self.setUp()
+            digest_daemon = daemon.DigestDaemon({"database": {"skip_delivered": skip_delivered}}, JOBS, item_store=item_store)
+            next_send = digest_daemon.run_once(start, daemon.next_send_time("02:00", start))
+            with patch('daemon.pipeline.print_preview') as mock_preview:
+                digest_daemon.run_once(ts(2024, 1, 1, 2), next_send)
+            self.assertEqual(len(mock_preview.call_args.args[0]["news"]), expected)
+
+    def test_items_accumulate_until_sent(self, mock_fetch, mock_report):
+        jobs = [("news", "news", "fetch_news", {"limit": 2}), JOBS[1]]
+        digest_daemon = self.make(jobs, daemon={"max_items": 3})
+        start = ts(2024, 1, 1, 3)
+        next_send = digest_daemon.run_once(start, daemon.next_send_time("02:00", start))
+
+        def fetch_story(story, popularity):
+            return lambda config, jobs, *args: {"news": [{"title": story, "link": f"http://news.com/{story}", "popularity": popularity}]}
+
+        # Later refreshes no longer see the morning's story, but it is kept...
+        for hour, story, popularity in ((4, "b", 1), (5, "c", 3)):
+            mock_fetch.side_effect = fetch_story(story, popularity)
+            next_send = digest_daemon.run_once(ts(2024, 1, 1, hour), next_send)
+        self.assertEqual([item["title"] for item in digest_daemon.results["news"]], ["c", "b", "news item"])
+
+        # ...up to max_items per section
+        mock_fetch.side_effect = fetch_story("d", 2)
+        next_send = digest_daemon.run_once(ts(2024, 1, 1, 6), next_send)
+        self.assertEqual([item["title"] for item in digest_daemon.results["news"]], ["d", "c", "b"])
+
+        with patch('daemon.pipeline.print_preview') as mock_preview:
+            digest_daemon.run_once(ts(2024, 1, 2, 2), next_send)
+
+        # The digest shows the source's limit of the pool, most popular first
+        self.assertEqual([item["title"] for item in mock_preview.call_args.args[0]["news"]], ["c", "d"])
+        # The pool of a sent section is pruned; only what the refresh right after it found again is kept
+        self.assertEqual([item["title"] for item in digest_daemon.results["news"]], ["d"])
+        self.assertIsNotNone(digest_daemon.sent_at)
+
+    def test_send_limits_videos_per_channel(self, mock_fetch, mock_report):
+        jobs = [("ai_videos", "youtube", "fetch_videos", {"limit": 1})]
+        digest_daemon = self.make(jobs)
+        start = ts(2024, 1, 1, 3)
+        next_send = digest_daemon.run_once(start, daemon.next_send_time("02:00", start))
+
+        # Each refresh found a video per channel; the digest keeps each channel's best one
+        digest_daemon.results["ai_videos"] = [
+            {"title": title, "link": f"http://youtube.com/{title}", "source": source, "score": score}
+            for title, source, score in (("a2", "A", 5.0), ("b2", "B", 1.0), ("a1", "A", 9.0), ("b1", "B", 2.0))
+        ]
+        with patch('daemon.pipeline.print_preview') as mock_preview:
+            digest_daemon.run_once(ts(2024, 1, 2, 2), next_send)
+
+        self.assertEqual([item["title"] for item in mock_preview.call_args.args[0]["ai_videos"]], ["a1", "b1"])
+
+    def test_refresh_does_not_render(self, mock_fetch, mock_report):
+        start = ts(2024, 1, 1, 3)
+        with patch('daemon.pipeline.make_section_handler') as mock_handler:
+            self.make().run_once(start, daemon.next_send_time("02:00", start))
+
+        self.assertIsNone(mock_handler.call_args.kwargs.get("emailer"))
+
+    def test_restart_reuses_snapshot(self, mock_fetch, mock_report):
+        start = ts(2024, 1, 1, 3)
+        self.make().run_once(start, daemon.next_send_time("02:00", start))
+        mock_fetch.reset_mock()
+
+        restarted = self.make()
+        self.assertEqual(restarted.results["news"][0]["title"], "news item")
+        self.assertEqual(restarted.due_jobs(start + 60), [])
+        self.assertEqual([job[0] for job in restarted.due_jobs(start + 60 * 60)], ["news"])
+
+class TestNextSendTime(unittest.TestCase):
+
+    def test_today_or_tomorrow(self):
+        self.assertEqual(daemon.next_send_time("02:00", ts(2024, 1, 1, 1, 59)), ts(2024, 1, 1, 2))
+        self.assertEqual(daemon.next_send_time("02:00", ts(2024, 1, 1, 2)), ts(2024, 1, 2, 2))
+        self.assertEqual(daemon.next_send_time("23:30", ts(2024, 12, 31, 23, 45)), ts(2025, 1, 1, 23, 30))
+
+if __name__ == '__main__':
+    unittest.main()
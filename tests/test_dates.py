@@ -0,0 +1,52 @@
+import time
+import unittest
+import datetime
+from datetime import timezone
+from unittest.mock import patch
+from fetchers import dates
+
+def ts(*args) -> float:
+    return datetime.datetime(*args, tzinfo=timezone.utc).timestamp()
+
+class TestParseTimestamp(unittest.TestCase):
+
+    def setUp(self):
+        dates.parse_timestamp.cache_clear()
+
+    def test_iso_and_rfc822(self):
+        self.assertEqual(dates.parse_timestamp("2023-10-27T00:00:00Z"), ts(2023, 10, 27))
+        self.assertEqual(dates.parse_timestamp("2023-10-27T02:00:00+02:00"), ts(2023, 10, 27))
+        self.assertEqual(dates.parse_timestamp("2023-10-27"), ts(2023, 10, 27))
+        self.assertEqual(dates.parse_timestamp("Fri, 27 Oct 2023 10:00:00 GMT"), ts(2023, 10, 27, 10))
+        self.assertEqual(dates.parse_timestamp("Fri, 27 Oct 2023 03:00:00 -0700"), ts(2023, 10, 27, 10))
+        self.assertEqual(dates.parse_timestamp("Fri, 27 Oct 2023 06:00:00 EDT"), ts(2023, 10, 27, 10))
+
+    def test_falls_back_to_dateutil(self):
+        self.assertEqual(dates.parse_timestamp("October 27, 2023"), ts(2023, 10, 27))
+        self.assertIsNone(dates.parse_timestamp("not a date"))
+        self.assertIsNone(dates.parse_timestamp(""))
+
+    def test_memoized(self):
+        with patch('fetchers.dates.datetime.datetime') as mock_datetime:
+            mock_datetime.fromisoformat.return_value = datetime.datetime(2023, 10, 27, tzinfo=timezone.utc)
+            dates.parse_timestamp("2023-10-27")
+            dates.parse_timestamp("2023-10-27")
+        mock_datetime.fromisoformat.assert_called_once()
+
+class TestEntryTimestamp(unittest.TestCase):
+
+    def test_prefers_feedparser_struct_time(self):
+        entry = {
+            "published": "garbage",
+            "published_parsed": time.struct_time((2023, 10, 27, 10, 0, 0, 4, 300, 0)),
+        }
+        self.assertEqual(dates.entry_timestamp(entry), ts(2023, 10, 27, 10))
+
+    def test_falls_back_to_later_keys(self):
+        entry = {"published": "garbage", "updated": "2023-10-27T00:00:00Z"}
+        self.assertEqual(dates.entry_timestamp(entry), ts(2023, 10, 27))
+        self.assertIsNone(dates.entry_timestamp(entry, ("published",)))
+        self.assertIsNone(dates.entry_timestamp({}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import dedup
+import pipeline
+
+def item(title, link):
+    return {"title": title, "link": link}
+
+@patch('dedup.cache.get_metadata_cache', return_value=None)
+class TestDedup(unittest.TestCase):
+
+    def test_same_link_across_sections(self, _):
+        sections = {
+            "news": [item("OpenAI releases a new model", "https://openai.com/blog/new-model?utm_source=hn")],
+            "rss": [item("Introducing our new model", "https://www.openai.com/blog/new-model/")],
+        }
+
+        result, removed, _ = dedup.dedup_sections(sections)
+
+        self.assertEqual(len(result["news"]), 1)
+        self.assertEqual(result["rss"], [])
+        self.assertEqual(removed, sections["rss"])
+
+    def test_near_duplicate_titles(self, _):
+        sections = {
+            "news": [item("OpenAI announces GPT-5 with improved reasoning", "https://news.example.com/a")],
+            "rss": [
+                item("OpenAI Announces GPT-5, With Improved Reasoning", "https://techcrunch.com/b"),
+                item("Scaling Postgres to millions of queries per second", "https://blog.example.com/c"),
+            ],
+        }
+
+        result, same_link, removed = dedup.dedup_sections(sections)
+
+        self.assertEqual([i["link"] for i in result["rss"]], ["https://blog.example.com/c"])
+        self.assertEqual(same_link, [])
+        self.assertEqual(len(removed), 1)
+
+    def test_short_titles_differing_in_one_token_are_kept(self, _):
+        sections = {
+            "news": [
+                item("OpenAI releases GPT-5", "https://news.example.com/1"),
+                item("Anthropic raises $2B", "https://news.example.com/2"),
+            ],
+            "rss": [
+                item("OpenAI releases GPT-4o", "https://blog.example.com/1"),
+                item("Anthropic raises $4B", "https://blog.example.com/2"),
+            ],
+        }
+
+        result, same_link, similar_title = dedup.dedup_sections(sections)
+
+        self.assertEqual(len(result["rss"]), 2)
+        self.assertEqual(same_link + similar_title, [])
+
+    def test_only_link_repeats_are_marked_delivered(self, _):
+        sections = {
+            "news": [item("OpenAI announces GPT-5 with improved reasoning", "https://news.example.com/a")],
+            "rss": [
+                item("OpenAI Announces GPT-5, With Improved Reasoning", "https://techcrunch.com/b"),
+                item("Another post", "https://news.example.com/a?utm_source=rss"),
+            ],
+        }
+
+        result, duplicates = pipeline.remove_duplicates({}, sections)
+
+        self.assertEqual(result["rss"], [])
+        self.assertEqual(duplicates, [sections["rss"][1]])
+
+    def test_canonical_link_from_cache(self, mock_get_cache):
+        metadata_cache = MagicMock()
+        metadata_cache.canonical.side_effect = lambda url: "https://example.com/post" if "feedproxy" in url else None
+        mock_get_cache.return_value = metadata_cache
+        sections = {
+            "news": [item("A post", "https://example.com/post")],
+            "eng_blogs": [item("Completely different headline", "https://feedproxy.google.com/~r/x/123")],
+        }
+
+        result, removed, _ = dedup.dedup_sections(sections)
+
+        self.assertEqual(result["eng_blogs"], [])
+        self.assertEqual(len(removed), 1)
+
+    def test_distinct_items_kept(self, _):
+        sections = {"rss": [item(f"Post number {i} about topic {i * 7}", f"https://blog.example.com/{i}") for i in range(200)]}
+
+        result, _, removed = dedup.dedup_sections(sections, title_threshold=0.9)
+
+        self.assertEqual(len(result["rss"]), 200)
+        self.assertEqual(removed, [])
+
+if __name__ == '__main__':
+    unittest.main()
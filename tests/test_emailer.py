@@ -0,0 +1,190 @@
+import socketserver
+import threading
+import unittest
+from email import message_from_bytes
+from unittest.mock import patch
+import emailer
+from fetchers import registry
+
+SECTIONS = {
+    "ai_papers": [{"title": "Attention Again", "link": "http://arxiv.org/abs/1", "published": "2023-10-27", "summary": "An abstract."}],
+    "ai_videos": [{"title": "AI Video", "link": "http://youtube.com/v", "thumbnail": "http://img/v.jpg", "source": "Chan", "views": 12345}],
+    "news": [{"title": "HN Story", "link": "http://news.com/a", "thumbnail": None, "comments": "http://hn/item?id=1", "score": 42}],
+    "rss": [{"title": "Blog Post", "link": "http://blog.com/p", "thumbnail": "http://img/p.jpg", "source": "Blog", "published": "2023-10-27"}],
+}
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP (EHLO, AUTH PLAIN, MAIL, RCPT, DATA) for smtplib."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 stub ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-stub")
+                self.reply("250 AUTH PLAIN")
+            elif verb == "AUTH":
+                server.logins += 1
+                self.reply("235 ok")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 ok")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip(" <>"))
+                self.reply("250 ok")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                data = b""
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b".\r\n", b""):
+                        break
+                    data += chunk
+                server.messages.append((recipients, message_from_bytes(data)))
+                self.reply("250 queued")
+                if server.drop_after and len(server.messages) % server.drop_after == 0:
+                    return # Hang up without QUIT, like a provider closing an idle or busy session
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, drop_after=0):
+        super().__init__(("127.0.0.1", 0), StubSMTPHandler)
+        self.connections = 0
+        self.logins = 0
+        self.messages = []
+        self.drop_after = drop_after
+
+class TestBatchDelivery(unittest.TestCase):
+
+    def start_server(self, drop_after=0):
+        server = StubSMTPServer(drop_after=drop_after)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def send(self, server, recipients):
+        return emailer.send_batch(SECTIONS, recipients, user="bot@example.com", password="secret",
+                                  host="127.0.0.1", port=server.server_address[1], starttls=False, interval=0)
+
+    def test_one_session_for_many_recipients(self):
+        server = self.start_server()
+        recipients = emailer.parse_recipients(["a@example.com, b@example.com", "c@example.com"])
+
+        with patch('emailer.render_digest', wraps=emailer.render_digest) as mock_render:
+            sent = self.send(server, recipients)
+
+        self.assertEqual([recipient.email for recipient in sent], ["a@example.com", "b@example.com", "c@example.com"])
+        self.assertEqual((server.connections, server.logins), (1, 1))
+        self.assertEqual([rcpts for rcpts, _ in server.messages], [["a@example.com"], ["b@example.com"], ["c@example.com"]])
+        mock_render.assert_called_once()
+
+    def test_per_recipient_sections(self):
+        server = self.start_server()
+        recipients = emailer.parse_recipients(["all@example.com", {"email": "news@example.com", "sections": ["news"]}])
+
+        self.send(server, recipients)
+
+        bodies = {msg['To']: msg.get_payload()[0].get_payload(decode=True).decode() for _, msg in server.messages}
+        self.assertIn("Attention Again", bodies["all@example.com"])
+        self.assertIn("HN Story", bodies["news@example.com"])
+        self.assertNotIn("Attention Again", bodies["news@example.com"])
+        # Only the selected section's heading, not empty headings for the rest
+        headings = [section.title for section in registry.display_sections() if f"<h2>{section.title}</h2>" in bodies["news@example.com"]]
+        self.assertEqual(headings, [registry.find_section("news").title])
+
+    def test_reconnects_when_dropped(self):
+        server = self.start_server(drop_after=2)
+        recipients = emailer.parse_recipients([f"user{i}@example.com" for i in range(5)])
+
+        sent = self.send(server, recipients)
+
+        self.assertEqual(len(sent), 5)
+        self.assertEqual(len(server.messages), 5)
+        self.assertEqual(server.connections, 3)
+
+class TestEmailer(unittest.TestCase):
+
+    def test_render_digest(self):
+        html = emailer.render_digest({**{section.key: [] for section in registry.display_sections()}, **SECTIONS}, date="2023-10-27")
+
+        self.assertIn("Daily AI Digest - 2023-10-27", html)
+        self.assertIn("Read Abstract", html)
+        self.assertIn("12,345 views", html)
+        self.assertIn("Score: 42", html)
+        self.assertIn('alt="Thumbnail"', html)
+        # Every section passed in is rendered, in order, even when empty
+        positions = [html.index(f"<h2>{section.title}</h2>") for section in registry.display_sections()]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_item_fields_escaped(self):
+        items = [{"title": "<script>alert(1)</script>", "link": 'http://news.com/x" onclick="alert(1)', "score": 1}]
+
+        html = emailer.render_digest({"news": items}, date="2023-10-27")
+
+        self.assertIn("&lt;script&gt;alert(1)&lt;/script&gt;", html)
+        self.assertNotIn("<script>", html)
+        self.assertIn('href="http://news.com/x&#34; onclick=&#34;alert(1)"', html)
+        # Section markup itself is not escaped a second time
+        self.assertIn(f"<h2>{registry.find_section('news').title}</h2>", html)
+
+    def test_template_compiled_once(self):
+        env = emailer.get_environment()
+        template = env.get_template(emailer.DIGEST_TEMPLATE)
+
+        emailer.render_digest(SECTIONS)
+
+        self.assertIs(emailer.get_environment(), env)
+        self.assertIs(env.get_template(emailer.DIGEST_TEMPLATE), template)
+
+    def test_sections_rendered_once(self):
+        news = registry.find_section("news")
+        items = [{"title": "Cached Story", "link": "http://news.com/c", "comments": "http://hn/item?id=2", "score": 1}]
+
+        first = emailer.render_section(news, items)
+        with patch.object(emailer.cache, 'get_section_cache', return_value=None), \
+             patch.object(emailer, 'get_environment', wraps=emailer.get_environment) as mock_env:
+            # Same items again: served from memory, no template lookup
+            self.assertEqual(emailer.render_section(news, list(items)), first)
+            mock_env.assert_not_called()
+
+            changed = emailer.render_section(news, items + [{"title": "New Story", "link": "http://news.com/n", "score": 2}])
+            mock_env.assert_called_once()
+        self.assertIn("New Story", changed)
+
+    def test_sections_reused_across_runs(self):
+        news = registry.find_section("news")
+        items = [{"title": "Persisted Story", "link": "http://news.com/p", "score": 3}]
+        html = emailer.render_section(news, items)
+
+        # A new process starts with nothing in memory but finds the section on disk
+        with patch.dict(emailer._fragments, clear=True), \
+             patch.object(emailer, 'get_environment') as mock_env:
+            self.assertEqual(emailer.render_section(news, items), html)
+            mock_env.assert_not_called()
+
+    def test_build_message(self):
+        msg = emailer.build_message("<p>hi</p>", "bot@example.com", "me@example.com", date="2023-10-27")
+
+        self.assertEqual(msg['To'], "me@example.com")
+        self.assertEqual(msg['Subject'], "Daily AI Digest - 2023-10-27")
+
+if __name__ == '__main__':
+    unittest.main()
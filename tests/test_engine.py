@@ -0,0 +1,62 @@
+import time
+import asyncio
+import threading
+import unittest
+from fetchers import http_client
+from fetchers.engine import AsyncEngine, ensure_engine
+
+class TestAsyncEngine(unittest.TestCase):
+
+    def test_per_host_and_global_limits(self):
+        lock = threading.Lock()
+        in_flight = {"a.com": 0, "b.com": 0, "total": 0}
+        peak = {"a.com": 0, "b.com": 0, "total": 0}
+
+        def request(host):
+            with lock:
+                in_flight[host] += 1
+                in_flight["total"] += 1
+                for key in peak:
+                    peak[key] = max(peak[key], in_flight[key])
+            time.sleep(0.02)
+            with lock:
+                in_flight[host] -= 1
+                in_flight["total"] -= 1
+
+        async def run():
+            engine = AsyncEngine(max_concurrency=3, per_host=2)
+            try:
+                await asyncio.gather(*[
+                    engine.call(f"http://{host}/{i}", request, host)
+                    for i in range(6) for host in ("a.com", "b.com")
+                ])
+            finally:
+                engine.close()
+
+        asyncio.run(run())
+
+        self.assertEqual(peak["a.com"], 2)
+        self.assertEqual(peak["b.com"], 2)
+        self.assertEqual(peak["total"], 3)
+
+    def test_temporary_engine_sized_for_caller(self):
+        shared = AsyncEngine()
+
+        async def run():
+            async with ensure_engine(concurrency=16) as engine:
+                sized = (engine.max_concurrency, engine.per_host)
+            async with ensure_engine(shared, concurrency=16) as engine:
+                self.assertIs(engine, shared)
+            return sized
+
+        try:
+            self.assertEqual(asyncio.run(run()), (16, 16))
+            # Never more per host than the pooled session keeps connections for
+            capped = AsyncEngine(max_concurrency=64, per_host=64)
+            capped.close()
+            self.assertEqual(capped.per_host, http_client.POOL_MAXSIZE)
+        finally:
+            shared.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
+import time
 import unittest
 from unittest.mock import patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
 from fetchers import arxiv, youtube, news, rss
 
 # Helper to mock feedparser entries which support both dict and attribute access
@@ -9,8 +11,9 @@ class MockEntry(dict):
 
 class TestFetchers(unittest.TestCase):
 
-    @patch('fetchers.arxiv.feedparser.parse')
-    def test_arxiv_fetch_papers(self, mock_parse):
+    @patch('fetchers.http_client.get')
+    @patch('fetchers.http_client.feedparser.parse')
+    def test_arxiv_fetch_papers(self, mock_parse, mock_get):
         # Mock response
         mock_entry = MockEntry({
             'title': "Test Paper",
@@ -29,8 +32,40 @@ class TestFetchers(unittest.TestCase):
         self.assertEqual(papers[0]['title'], "Test Paper")
         self.assertEqual(papers[0]['link'], "http://arxiv.org/abs/1234.5678")
 
-    @patch('fetchers.youtube.feedparser.parse')
-    def test_youtube_fetch_videos(self, mock_parse):
+    @patch('fetchers.http_client.fetch_feed')
+    def test_arxiv_fetch_sections_single_query(self, mock_fetch_feed):
+        def entry(n, primary, tags):
+            return MockEntry({
+                'title': f"Paper {n}",
+                'summary': "Summary",
+                'link': f"http://arxiv.org/abs/{n}",
+                'published': "2023-10-27T00:00:00Z",
+                'arxiv_primary_category': {'term': primary},
+                'tags': [{'term': t} for t in tags]
+            })
+
+        mock_feed = MagicMock()
+        mock_feed.entries = [
+            entry(1, "cs.AI", ["cs.AI", "cs.SE"]),
+            entry(2, "cs.DC", ["cs.DC"]),
+            entry(3, "stat.ML", ["stat.ML", "cs.LG"]),
+            entry(4, "cs.LG", ["cs.LG"]),
+        ]
+        mock_fetch_feed.return_value = mock_feed
+
+        sections = arxiv.fetch_sections({
+            "ai": {"topics": ["cs.AI", "cs.LG"], "limit": 2},
+            "sys": {"topics": ["cs.DC", "cs.SE"], "limit": 1, "sort_mode": "random"},
+        }, page_size=10)
+
+        self.assertEqual(mock_fetch_feed.call_count, 1)
+        self.assertIn("cat:cs.AI%20OR%20cat:cs.LG%20OR%20cat:cs.DC%20OR%20cat:cs.SE", mock_fetch_feed.call_args.args[0])
+        self.assertEqual([p['title'] for p in sections["ai"]], ["Paper 1", "Paper 3"])
+        self.assertEqual([p['title'] for p in sections["sys"]], ["Paper 2"])
+
+    @patch('fetchers.http_client.get')
+    @patch('fetchers.http_client.feedparser.parse')
+    def test_youtube_fetch_videos(self, mock_parse, mock_get):
         # Mock response
         mock_entry = MockEntry({
             'title': "Test Video",
@@ -51,7 +86,44 @@ class TestFetchers(unittest.TestCase):
         self.assertEqual(videos[0]['title'], "Test Video")
         self.assertEqual(videos[0]['views'], 1000)
 
-    @patch('fetchers.news.requests.get')
+    @patch('fetchers.http_client.get')
+    def test_youtube_shared_channel_fetched_once(self, mock_get):
+        body = b"""<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">
+<entry><title>Shared Video</title><link href="http://youtube.com/watch?v=shared"/>
+<published>2023-10-27T00:00:00Z</published></entry></feed>"""
+
+        def slow_get(url, **kwargs):
+            time.sleep(0.2)
+            resp = MagicMock()
+            resp.status_code = 200
+            resp.content = body
+            resp.headers = {}
+            return resp
+        mock_get.side_effect = slow_get
+
+        # The AI and system design sets run as separate concurrent jobs
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            ai = pool.submit(youtube.fetch_videos, channels={"Shared": "UCshared", "AI": "UCai"}, max_age=None)
+            sys_design = pool.submit(youtube.fetch_videos, channels={"Shared": "UCshared"}, max_age=None)
+            ai_videos, sys_videos = ai.result(), sys_design.result()
+
+        fetched = [c.args[0] for c in mock_get.call_args_list]
+        self.assertEqual(sorted(fetched), sorted(set(fetched)))
+        self.assertEqual(len(fetched), 2)
+        self.assertEqual(sys_videos[0]['title'], "Shared Video")
+        self.assertEqual(len(ai_videos), 2)
+
+    @patch('fetchers.http_client.fetch_feed')
+    def test_youtube_passes_feed_max_age(self, mock_fetch_feed):
+        mock_fetch_feed.return_value = MagicMock(entries=[])
+
+        youtube.fetch_videos(channels={"Test Channel": "UC123"})
+        youtube.fetch_videos(channels={"Test Channel": "UC123"}, max_age=60)
+
+        self.assertEqual(mock_fetch_feed.call_args_list[0].kwargs['max_age'], youtube.DEFAULT_FEED_MAX_AGE)
+        self.assertEqual(mock_fetch_feed.call_args_list[1].kwargs['max_age'], 60)
+
+    @patch('fetchers.http_client.get')
     def test_news_fetch_news(self, mock_get):
         # Mock top stories response
         mock_response_ids = MagicMock()
@@ -68,7 +140,8 @@ class TestFetchers(unittest.TestCase):
 
         # Mock article page response for og:image
         mock_response_art = MagicMock()
-        mock_response_art.content = b'<html><meta property="og:image" content="http://img.jpg"></html>'
+        mock_response_art.headers = {'Content-Type': 'text/html'}
+        mock_response_art.iter_content.return_value = [b'<html><head><meta property="og:image" content="http://img.jpg"></head></html>']
 
         # Side effect to return different mocks based on call
         def side_effect(*args, **kwargs):
@@ -86,9 +159,59 @@ class TestFetchers(unittest.TestCase):
         self.assertEqual(len(news_items), 1)
         self.assertEqual(news_items[0]['title'], "AI is great")
         self.assertEqual(news_items[0]['score'], 100)
+        self.assertEqual(news_items[0]['thumbnail'], "http://img.jpg")
 
-    @patch('fetchers.rss.feedparser.parse')
-    def test_rss_fetch_rss(self, mock_parse):
+    @patch('fetchers.http_client.get')
+    def test_news_concurrent_keeps_topstories_order(self, mock_get):
+        titles = {1: "Cooking tips", 2: "New LLM released", 3: "AI agents", 4: "GPT-5 rumours", 5: "Gardening"}
+
+        def side_effect(*args, **kwargs):
+            resp = MagicMock()
+            if "topstories" in args[0]:
+                resp.json.return_value = list(titles)
+            elif "item" in args[0]:
+                story_id = int(args[0].rsplit('/', 1)[-1].split('.')[0])
+                resp.json.return_value = {
+                    "title": titles[story_id],
+                    "url": f"http://example.com/{story_id}",
+                    "score": 10,
+                    "time": 1698364800
+                }
+            else:
+                resp.headers = {'Content-Type': 'text/html'}
+                resp.iter_content.return_value = [b'<html></html>']
+            return resp
+
+        mock_get.side_effect = side_effect
+
+        news_items = news.fetch_news(keywords=["AI", "LLM", "GPT"], limit=2, concurrency=4)
+
+        self.assertEqual(sorted(n['title'] for n in news_items), ["AI agents", "New LLM released"])
+
+    @patch('fetchers.http_client.get')
+    def test_news_deadline_returns_partial_results(self, mock_get):
+        def side_effect(*args, **kwargs):
+            resp = MagicMock()
+            if "topstories" in args[0]:
+                resp.json.return_value = list(range(1, 9))
+            else:
+                time.sleep(0.1)
+                story_id = int(args[0].rsplit('/', 1)[-1].split('.')[0])
+                resp.json.return_value = {"title": f"AI story {story_id}", "url": f"http://example.com/{story_id}"}
+            return resp
+
+        mock_get.side_effect = side_effect
+
+        start = time.monotonic()
+        news_items = news.fetch_news(keywords=["AI"], limit=8, concurrency=2, deadline=0.25)
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertTrue(1 <= len(news_items) < 8)
+        self.assertTrue(all(n['thumbnail'] is None for n in news_items))
+
+    @patch('fetchers.http_client.get')
+    @patch('fetchers.http_client.feedparser.parse')
+    def test_rss_fetch_rss(self, mock_parse, mock_get):
         # Mock response
         mock_entry = MockEntry({
             'title': "Test Blog Post",
@@ -108,5 +231,76 @@ class TestFetchers(unittest.TestCase):
         self.assertEqual(items[0]['title'], "Test Blog Post")
         self.assertEqual(items[0]['source'], "Test Blog")
 
+    @patch('fetchers.metadata.fetch_og_image')
+    @patch('fetchers.http_client.fetch_feed')
+    def test_rss_concurrent_sorted_and_enriches_selected_only(self, mock_fetch_feed, mock_og_image):
+        dates = {
+            "http://a.com/feed": "Mon, 23 Oct 2023 10:00:00 GMT",
+            "http://b.com/feed": "Fri, 27 Oct 2023 10:00:00 GMT",
+            "http://c.com/feed": "Wed, 25 Oct 2023 10:00:00 GMT",
+        }
+
+        def fetch_feed(url, **kwargs):
+            if url == "http://broken.com/feed":
+                raise IOError("boom")
+            feed = MagicMock()
+            feed.entries = [MockEntry({'title': f"Post from {url}", 'link': f"{url}/post", 'published': dates[url]})]
+            feed.feed = {'title': url}
+            return feed
+
+        mock_fetch_feed.side_effect = fetch_feed
+        mock_og_image.side_effect = lambda link, **kwargs: f"{link}.png"
+
+        items = rss.fetch_rss(feeds=list(dates) + ["http://broken.com/feed"], limit=2, concurrency=4)
+
+        self.assertEqual([i['source'] for i in items], ["http://b.com/feed", "http://c.com/feed"])
+        self.assertEqual(items[0]['thumbnail'], "http://b.com/feed/post.png")
+        self.assertEqual(mock_og_image.call_count, 2)
+
+    @patch('fetchers.metadata.fetch_og_image')
+    @patch('fetchers.http_client.fetch_feed')
+    @patch('fetchers.store.is_delivered')
+    def test_rss_skips_delivered_items(self, mock_is_delivered, mock_fetch_feed, mock_og_image):
+        feeds = {
+            "http://blog.com/feed": [
+                MockEntry({'title': "Latest", 'link': "http://blog.com/latest", 'published': "Fri, 27 Oct 2023 10:00:00 GMT"}),
+                MockEntry({'title': "Older", 'link': "http://blog.com/older", 'published': "Thu, 26 Oct 2023 10:00:00 GMT"}),
+            ],
+            "http://other.com/feed": [
+                MockEntry({'title': "Fresh", 'link': "http://other.com/fresh", 'published': "Thu, 26 Oct 2023 10:00:00 GMT"}),
+            ],
+        }
+
+        def fetch_feed(url, **kwargs):
+            feed = MagicMock()
+            feed.entries = feeds[url]
+            feed.feed = {'title': url}
+            return feed
+
+        mock_fetch_feed.side_effect = fetch_feed
+        mock_is_delivered.side_effect = lambda link: link == "http://blog.com/latest"
+        mock_og_image.return_value = None
+
+        items = rss.fetch_rss(feeds=list(feeds), one_per_source=True, skip_delivered=True)
+
+        # The blog has posted nothing new, so it contributes nothing (not its older post)
+        self.assertEqual([i['title'] for i in items], ["Fresh"])
+        mock_og_image.assert_called_once()
+
+    @patch('fetchers.http_client.fetch_feed')
+    @patch('fetchers.store.is_delivered')
+    def test_youtube_skips_delivered_without_backfilling(self, mock_is_delivered, mock_fetch_feed):
+        feed = MagicMock()
+        feed.entries = [
+            MockEntry({'title': f"Video {n}", 'link': f"http://youtube.com/watch?v={n}", 'published': "2023-10-27T00:00:00Z"})
+            for n in range(1, 4)
+        ]
+        mock_fetch_feed.return_value = feed
+        mock_is_delivered.side_effect = lambda link: link.endswith("v=1")
+
+        videos = youtube.fetch_videos(channels={"Test Channel": "UC123"}, limit=2, skip_delivered=True)
+
+        self.assertEqual([v['title'] for v in videos], ["Video 2"])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import datetime
+from datetime import timezone
+from fetchers.items import Paper, Video, NewsItem, Post
+
+class TestItems(unittest.TestCase):
+
+    def test_records_have_no_instance_dict(self):
+        paper = Paper(title="A", link="http://a", summary="s", published="2024-01-01")
+        video = Video("Chan", "V", "http://v", "2024-01-01", None, 10, 1.5)
+
+        self.assertFalse(hasattr(paper, "__dict__"))
+        self.assertFalse(hasattr(video, "__dict__"))
+        with self.assertRaises(AttributeError):
+            paper.extra = 1
+
+    def test_dict_view(self):
+        item = NewsItem(story_id=1, title="T", link="http://t", score=10, popularity=2.5, keyword="AI")
+
+        self.assertEqual(item["title"], "T")
+        self.assertEqual(item.get("thumbnail"), None)
+        self.assertEqual(item.get("missing", "x"), "x")
+        self.assertIn("comments", item)
+        self.assertNotIn("missing", item)
+        with self.assertRaises(KeyError):
+            item["missing"]
+
+        item["thumbnail"] = "http://img"
+        self.assertEqual(item.thumbnail, "http://img")
+        with self.assertRaises(KeyError):
+            item["missing"] = 1
+
+    def test_derived_fields(self):
+        item = NewsItem(story_id=42, title="T", link="http://t", score=10, popularity=2.5, keyword="AI")
+        self.assertEqual(item["comments"], "https://news.ycombinator.com/item?id=42")
+
+        published = datetime.datetime(2024, 3, 5, 12, 0, tzinfo=timezone.utc)
+        post = Post(source="Blog", title="P", link="http://p", published_ts=published.timestamp())
+        self.assertEqual(post["published"], "2024-03-05")
+        self.assertEqual(post.published_dt, published)
+
+    def test_to_dict(self):
+        post = Post(source="Blog", title="P", link="http://p", published_ts=0.0)
+
+        self.assertEqual(post.to_dict(), {
+            "source": "Blog",
+            "title": "P",
+            "link": "http://p",
+            "published_ts": 0.0,
+            "thumbnail": None,
+            "published": "1970-01-01",
+            "published_dt": datetime.datetime(1970, 1, 1, tzinfo=timezone.utc),
+        })
+
+if __name__ == '__main__':
+    unittest.main()
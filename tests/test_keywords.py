@@ -0,0 +1,39 @@
+import unittest
+from fetchers.keywords import KeywordMatcher, compile_keywords
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def test_short_keywords_match_whole_words(self):
+        matcher = KeywordMatcher(["AI", "LLM"])
+
+        self.assertEqual(matcher.match("New AI model released"), "AI")
+        self.assertEqual(matcher.match("Benchmarking LLM inference"), "LLM")
+        self.assertIsNone(matcher.match("He said the rain would stop"))
+        self.assertIsNone(matcher.match("LLMs explained"))
+
+    def test_long_keywords_and_phrases_match_substrings(self):
+        matcher = KeywordMatcher(["AI", "Generative AI", "Transformer"])
+
+        self.assertEqual(matcher.match("The state of generative  AI"), "Generative AI")
+        self.assertEqual(matcher.match("Transformers from scratch"), "Transformer")
+
+    def test_prefers_longer_keyword_at_same_position(self):
+        matcher = KeywordMatcher(["GPT", "GPT-4"])
+
+        self.assertEqual(matcher.match("GPT-4 launch notes"), "GPT-4")
+        self.assertEqual(matcher.match("GPT and friends"), "GPT")
+
+    def test_large_keyword_list(self):
+        keywords = [f"term{i}" for i in range(1000)] + ["Rust"]
+        matcher = compile_keywords(keywords)
+
+        self.assertEqual(matcher.match("Why we rewrote it in Rust"), "Rust")
+        self.assertEqual(matcher.match("Notes on term999"), "term999")
+        self.assertIsNone(matcher.match("Nothing to see here"))
+        self.assertIs(compile_keywords(keywords), matcher)
+
+    def test_empty_keywords(self):
+        self.assertIsNone(KeywordMatcher([]).match("AI"))
+
+if __name__ == '__main__':
+    unittest.main()
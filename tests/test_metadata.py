@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from fetchers import metadata
+
+class TestHeadMetadata(unittest.TestCase):
+
+    def _response(self, chunks, content_type='text/html; charset=utf-8'):
+        resp = MagicMock()
+        resp.headers = {'Content-Type': content_type}
+        resp.encoding = 'utf-8'
+        resp.iter_content.return_value = iter(chunks)
+        return resp
+
+    @patch('fetchers.metadata.http_client.get')
+    def test_stops_reading_after_head(self, mock_get):
+        chunks = [
+            b'<html><head><title>x</title><meta property="og:image" content="/img.png">',
+            b'<link rel="canonical" href="http://site.com/a"></head>',
+            b'<body>' + b'x' * 1000,
+        ]
+        resp = self._response(chunks)
+        mock_get.return_value = resp
+
+        values = metadata.extract_head_metadata("http://site.com/a")
+
+        self.assertEqual(values['og:image'], "/img.png")
+        self.assertEqual(values['link:canonical'], "http://site.com/a")
+        self.assertEqual(metadata.find_image(values, "http://site.com/a"), "http://site.com/img.png")
+        # The body chunk was never pulled and the connection was closed
+        self.assertEqual(len(list(resp.iter_content.return_value)), 1)
+        resp.close.assert_called_once()
+
+    @patch('fetchers.metadata.http_client.get')
+    def test_twitter_image_fallback(self, mock_get):
+        mock_get.return_value = self._response([b'<head><meta name="twitter:image" content="http://t.co/i.png"></head>'])
+
+        values = metadata.extract_head_metadata("http://site.com/b")
+
+        self.assertEqual(metadata.find_image(values, "http://site.com/b"), "http://t.co/i.png")
+
+    @patch('fetchers.metadata.http_client.get')
+    def test_byte_cap(self, mock_get):
+        chunks = [b'<head>' + b' ' * 100, b'<meta property="og:image" content="http://late.png">']
+        mock_get.return_value = self._response(chunks)
+
+        values = metadata.extract_head_metadata("http://site.com/c", max_bytes=50)
+
+        self.assertNotIn('og:image', values)
+
+    @patch('fetchers.metadata.http_client.get')
+    def test_skips_non_html(self, mock_get):
+        resp = self._response([b'%PDF-1.4'], content_type='application/pdf')
+        mock_get.return_value = resp
+
+        self.assertEqual(metadata.extract_head_metadata("http://site.com/paper.pdf"), {})
+        resp.iter_content.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import json
+import logging
+import datetime
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from fetchers import metrics, http_client, metadata
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_stages_counters_and_cache_ratio(self):
+        for _ in range(3):
+            with metrics.stage("news.items"):
+                pass
+        metrics.count("cache.og_image.hit", 3)
+        metrics.count("cache.og_image.miss")
+
+        data = metrics.report()
+
+        self.assertEqual(data["stages"]["news.items"]["count"], 3)
+        self.assertEqual(data["counters"]["cache.og_image.hit"], 3)
+        self.assertEqual(data["caches"]["og_image"]["hit_ratio"], 0.75)
+
+    @patch('fetchers.http_client.get_session')
+    def test_http_requests_recorded_per_host(self, mock_get_session):
+        resp = MagicMock()
+        resp.status_code = 200
+        resp.content = b"x" * 10
+        resp.headers = {}
+        resp.elapsed = datetime.timedelta(seconds=0.5)
+        mock_get_session.return_value.get.side_effect = [resp, requests.exceptions.ConnectionError("down")]
+
+        http_client.get("http://a.com/1")
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            http_client.get("http://a.com/2")
+
+        host = metrics.report()["http"]["a.com"]
+        self.assertEqual((host["requests"], host["bytes"], host["errors"]), (2, 10, 1))
+        self.assertEqual(host["status"], {"200": 1})
+
+    @patch('fetchers.http_client.get_session')
+    def test_streamed_bytes_counted_as_read(self, mock_get_session):
+        resp = MagicMock()
+        resp.status_code = 200
+        resp.headers = {"Content-Type": "text/html", "Content-Length": "500000"}
+        resp.elapsed = datetime.timedelta(seconds=0.1)
+        head = b'<html><head><meta property="og:image" content="/i.png"></head>'
+        resp.iter_content.return_value = iter([head, b'<body>' + b'x' * 100000])
+        mock_get_session.return_value.get.return_value = resp
+
+        metadata.extract_head_metadata("http://a.com/article")
+
+        host = metrics.report()["http"]["a.com"]
+        # The head chunk that was read, not the Content-Length of the whole page
+        self.assertEqual((host["requests"], host["bytes"]), (1, len(head)))
+
+    def test_log_counter(self):
+        test_logger = logging.getLogger("fetchers.test")
+        handler = metrics.install_log_counter(test_logger)
+        self.addCleanup(test_logger.removeHandler, handler)
+
+        test_logger.error("boom")
+        test_logger.warning("hmm")
+
+        counters = metrics.report()["counters"]
+        self.assertEqual(counters["errors.fetchers.test"], 1)
+        self.assertEqual(counters["warnings.fetchers.test"], 1)
+
+    def test_write_reports(self):
+        with metrics.stage("fetch"):
+            pass
+        metrics.record_response("a.com", 304, 0, 0.1)
+        out = tempfile.mkdtemp()
+
+        metrics.write_json(os.path.join(out, "report.json"))
+        metrics.write_prometheus(os.path.join(out, "digest.prom"))
+
+        with open(os.path.join(out, "report.json")) as f:
+            self.assertIn("fetch", json.load(f)["stages"])
+        with open(os.path.join(out, "digest.prom")) as f:
+            prom = f.read()
+        self.assertIn('digest_stage_calls{stage="fetch"} 1', prom)
+        self.assertIn('digest_http_requests{host="a.com",status="304"} 1', prom)
+        self.assertFalse(os.path.exists(os.path.join(out, "digest.prom.tmp")))
+
+if __name__ == '__main__':
+    unittest.main()
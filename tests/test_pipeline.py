@@ -0,0 +1,87 @@
+import time
+import sqlite3
+import asyncio
+import unittest
+from unittest.mock import patch
+import emailer
+import pipeline
+from fetchers import store
+
+# Stand-in fetchers, loaded by pipeline.load_fetcher as "tests.test_pipeline"
+def fetch_fast(deadline=None, skip_delivered=False):
+    return [{"title": "Fast", "link": "http://fast.com"}]
+
+def fetch_slow(deadline=None, skip_delivered=False):
+    time.sleep(0.3)
+    return [{"title": "Slow", "link": "http://slow.com"}]
+
+async def fetch_fast_async(engine=None, **kwargs):
+    return fetch_fast(**kwargs)
+
+async def fetch_slow_async(engine=None, **kwargs):
+    await asyncio.sleep(0.3)
+    return [{"title": "Slow", "link": "http://slow.com"}]
+
+JOBS = [
+    ("rss", "tests.test_pipeline", "fetch_slow", {"deadline": None, "skip_delivered": False}),
+    ("news", "tests.test_pipeline", "fetch_fast", {"deadline": None, "skip_delivered": False}),
+]
+
+class TestFetchAll(unittest.TestCase):
+
+    def on_section(self, section_name, items):
+        self.seen.append((section_name, time.perf_counter() - self.start))
+        # The callback decides which items are kept
+        return items[:0] if section_name == "rss" else items
+
+    def check(self, results):
+        # Sections are handed over as they complete, not after the slowest fetch
+        self.assertEqual([name for name, _ in self.seen], ["news", "rss"])
+        self.assertLess(self.seen[0][1], 0.2)
+        self.assertEqual(results["news"][0]["title"], "Fast")
+        self.assertEqual(results["rss"], [])
+
+    def test_threaded_calls_on_section_as_fetches_complete(self):
+        self.seen, self.start = [], time.perf_counter()
+        self.check(pipeline.fetch_all_threaded(JOBS, on_section=self.on_section))
+
+    def test_async_calls_on_section_as_fetches_complete(self):
+        self.seen, self.start = [], time.perf_counter()
+        self.check(asyncio.run(pipeline.fetch_all_async(JOBS, on_section=self.on_section)))
+
+class TestSectionHandler(unittest.TestCase):
+
+    def test_skip_delivered_setting(self):
+        item_store = store.ItemStore(sqlite3.connect(":memory:", check_same_thread=False))
+        items = [{"title": "Sent", "link": "http://a.com/sent"}, {"title": "New", "link": "http://a.com/new"}]
+        item_store.record("news", items[:1])
+        item_store.mark_delivered(items[:1])
+
+        self.assertEqual(pipeline.make_section_handler(item_store)("news", items), items[1:])
+        self.assertEqual(pipeline.make_section_handler(item_store, skip_delivered=False)("news", items), items)
+
+class TestDeliver(unittest.TestCase):
+
+    @patch('dedup.cache.get_metadata_cache', return_value=None)
+    def test_marks_only_sections_someone_received(self, _):
+        item_store = store.ItemStore(sqlite3.connect(":memory:", check_same_thread=False))
+        results = {
+            "news": [{"title": "Story", "link": "http://news.com/1"}],
+            "ai_papers": [{"title": "Paper", "link": "http://arxiv.org/abs/1"}],
+        }
+        duplicates = [{"title": "Story again", "link": "http://news.com/1?utm_source=rss"},
+                      {"title": "Paper again", "link": "http://arxiv.org/abs/1#v2"}]
+        for key, items in results.items():
+            item_store.record(key, items)
+        item_store.record("rss", duplicates)
+
+        with patch.object(emailer, 'send_batch', side_effect=lambda sections, recipients, **kwargs: recipients):
+            sent = pipeline.deliver(emailer, {}, results, duplicates, [{"email": "a@example.com", "sections": ["news"]}], item_store)
+
+        self.assertEqual(pipeline.sent_sections(results, sent), ["news"])
+        self.assertTrue(item_store.is_delivered("http://news.com/1"))
+        # Nobody received the papers, so they stay available for a later digest
+        self.assertFalse(item_store.is_delivered("http://arxiv.org/abs/1"))
+
+if __name__ == '__main__':
+    unittest.main()
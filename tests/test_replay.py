@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from fetchers import http_client
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import replay
+
+class OriginHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f"page {self.path}".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestRecordReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(http_client.close_session)
+        self.fixtures = tempfile.mkdtemp()
+
+    def start(self, server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_record_then_replay(self):
+        origin = self.start(ThreadingHTTPServer(("127.0.0.1", 0), OriginHandler))
+        url = f"http://127.0.0.1:{origin.server_address[1]}/feed?x=1"
+
+        store = replay.FixtureStore(self.fixtures)
+        replay.install(replay.RecordingAdapter(store, **replay._adapter_kwargs()))
+        self.assertEqual(http_client.get(url).text, "page /feed?x=1")
+        store.save()
+        origin.shutdown()
+        http_client.close_session()
+
+        server = self.start(replay.ReplayServer(replay.FixtureStore(self.fixtures)))
+        replay.install(replay.ReplayAdapter(server.base_url, **replay._adapter_kwargs()))
+
+        resp = http_client.get(url)
+        self.assertEqual((resp.status_code, resp.text, resp.url), (200, "page /feed?x=1", url))
+        self.assertEqual(resp.headers["ETag"], '"v1"')
+        self.assertEqual(http_client.get(url, headers={"If-None-Match": '"v1"'}).status_code, 304)
+        self.assertEqual(http_client.get(url + "&missing=1").status_code, 404)
+
+        host = f"127.0.0.1:{origin.server_address[1]}"
+        self.assertEqual((server.requests[host], server.errors[host]), (3, 1))
+
+    def test_injected_errors(self):
+        store = replay.FixtureStore(self.fixtures)
+        store.add("http://example.com/a", 200, {"Content-Type": "text/plain"}, b"a")
+        server = self.start(replay.ReplayServer(store, error_rate=1.0))
+
+        adapter = replay.ReplayAdapter(server.base_url)
+        replay.install(adapter)
+
+        self.assertEqual(http_client.get("http://example.com/a").status_code, 503)
+
+if __name__ == '__main__':
+    unittest.main()
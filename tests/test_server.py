@@ -0,0 +1,97 @@
+import json
+import threading
+import unittest
+import http.client
+from types import SimpleNamespace
+from unittest.mock import patch
+import emailer
+import server
+from fetchers import registry
+from fetchers.items import NewsItem
+
+def make_daemon():
+    return SimpleNamespace(
+        config={},
+        fetched_at={"news": 1000.0},
+        results={
+            "news": [NewsItem(story_id=1, title="HN Story", link="http://news.com/a", score=42, popularity=1.0, keyword="AI")],
+            "rss": [{"title": "Blog Post", "link": "http://blog.com/p", "source": "Blog", "published": "2023-10-27"}],
+        },
+    )
+
+class TestDigestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.daemon = make_daemon()
+        self.server = server.DigestServer(server.DigestView(self.daemon, emailer), port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.conn = http.client.HTTPConnection(*self.server.server_address, timeout=5)
+        self.addCleanup(self.conn.close)
+
+    def get(self, path, headers=None):
+        self.conn.request("GET", path, headers=headers or {})
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_digest_endpoints(self):
+        response, body = self.get("/digest.html")
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"HN Story", body)
+        self.assertIn("max-age=", response.getheader("Cache-Control"))
+
+        response, body = self.get("/digest.html?sections=news")
+        self.assertIn(f"<h2>{registry.find_section('news').title}</h2>".encode(), body)
+        self.assertNotIn(f"<h2>{registry.find_section('rss').title}</h2>".encode(), body)
+
+        response, body = self.get("/digest.json?sections=news")
+        data = json.loads(body)
+        self.assertEqual([s["key"] for s in data["sections"]], ["news"])
+        self.assertEqual(data["sections"][0]["items"][0]["comments"], "https://news.ycombinator.com/item?id=1")
+
+        response, body = self.get("/sections/rss.json")
+        self.assertEqual(json.loads(body)["items"][0]["title"], "Blog Post")
+        response, body = self.get("/sections/rss.html")
+        self.assertIn(b"Blog Post", body)
+
+        self.daemon.results["rss"] = [{"title": "<script>alert(1)</script>", "link": "http://blog.com/x", "source": "Blog", "published": "2023-10-28"}]
+        self.daemon.fetched_at["rss"] = 2000.0
+        for path in ("/sections/rss.html", "/digest.html"):
+            response, body = self.get(path)
+            self.assertIn(b"&lt;script&gt;alert(1)&lt;/script&gt;", body)
+            self.assertNotIn(b"<script>", body)
+
+        response, _ = self.get("/sections/nope.json")
+        self.assertEqual(response.status, 404)
+        response, _ = self.get("/other")
+        self.assertEqual(response.status, 404)
+
+    def test_etag_revalidation(self):
+        response, _ = self.get("/digest.json")
+        etag = response.getheader("ETag")
+
+        response, body = self.get("/digest.json", {"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+
+        # A refresh with new items changes the ETag
+        self.daemon.results["rss"] = [{"title": "Newer Post", "link": "http://blog.com/n", "source": "Blog"}]
+        self.daemon.fetched_at["rss"] = 2000.0
+        response, body = self.get("/digest.json", {"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+        self.assertNotEqual(response.getheader("ETag"), etag)
+        self.assertIn(b"Newer Post", body)
+
+    def test_rendered_once_per_refresh(self):
+        with patch('server.pipeline.remove_duplicates', wraps=server.pipeline.remove_duplicates) as mock_dedup, \
+             patch.object(emailer, 'render_digest', wraps=emailer.render_digest) as mock_render:
+            for _ in range(5):
+                self.get("/digest.html")
+            self.get("/digest.html?sections=rss")
+
+        mock_dedup.assert_called_once()
+        self.assertEqual(mock_render.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
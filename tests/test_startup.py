@@ -0,0 +1,46 @@
+import os
+import sys
+import subprocess
+import unittest
+import pipeline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous enough for a cold CI runner; importing main eagerly took ~250ms here, lazily ~90ms
+IMPORT_BUDGET_SECONDS = 0.5
+HEAVY_MODULES = ["requests", "feedparser", "jinja2", "dateutil", "emailer", "fetchers.http_client"]
+
+def import_times(module):
+    """Runs `python -X importtime -c "import <module>"` and returns {module: cumulative seconds}."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_main_is_lazy_and_within_budget(self):
+        times = import_times("main")
+
+        for heavy in HEAVY_MODULES:
+            self.assertNotIn(heavy, times, f"{heavy} should only be imported when a run needs it")
+        self.assertLess(times["main"], IMPORT_BUDGET_SECONDS)
+
+    def test_build_jobs_selects_sections(self):
+        config = {"sources": {"youtube": {"enabled": False}}}
+
+        jobs = pipeline.build_jobs(config, sections=["ai_papers", "ai_videos", "news"])
+
+        self.assertEqual([job[0] for job in jobs], ["arxiv", "news"])
+        self.assertEqual(list(jobs[0][3]["sections"]), ["ai_papers"])
+        self.assertEqual([job[0] for job in pipeline.build_jobs(config)], ["arxiv", "news", "rss", "eng_blogs"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import sqlite3
+import unittest
+from unittest.mock import patch
+from fetchers import store
+
+class TestItemStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = store.ItemStore(sqlite3.connect(":memory:", check_same_thread=False), max_items=2, delivered_ttl=100)
+
+    def test_normalize_link(self):
+        self.assertEqual(
+            store.normalize_link("HTTPS://www.Example.com/post/?utm_source=rss&b=2&a=1#comments"),
+            "https://example.com/post?a=1&b=2"
+        )
+        self.assertEqual(store.normalize_link("https://example.com/"), store.normalize_link("https://example.com"))
+
+    def test_undelivered_and_mark_delivered(self):
+        items = [{"link": "http://a.com/1", "title": "One"}, {"link": "http://a.com/2", "title": "Two"}]
+        self.store.record("news", items)
+
+        self.assertEqual(self.store.undelivered(items), items)
+
+        self.store.mark_delivered(items[:1])
+
+        self.assertTrue(self.store.is_delivered("http://a.com/1?utm_medium=email"))
+        self.assertEqual(self.store.undelivered(items), items[1:])
+
+    @patch('fetchers.store.time.time')
+    def test_retention_per_source(self, mock_time):
+        for i in range(4):
+            mock_time.return_value = i
+            self.store.record("news", [{"link": f"http://a.com/{i}"}])
+        self.store.record("rss", [{"link": "http://b.com/1"}])
+
+        rows = self.store.conn.execute("SELECT source, link FROM items ORDER BY source, first_seen").fetchall()
+        self.assertEqual(rows, [("news", "http://a.com/2"), ("news", "http://a.com/3"), ("rss", "http://b.com/1")])
+
+    @patch('fetchers.store.time.time')
+    def test_delivered_items_outlive_retention(self, mock_time):
+        mock_time.return_value = 0
+        self.store.record("news", [{"link": "http://a.com/sent"}])
+        self.store.mark_delivered([{"link": "http://a.com/sent"}])
+
+        # Many newer stories later, the delivered one is still in topstories
+        for i in range(5):
+            mock_time.return_value = 10 * (i + 1)
+            self.store.record("news", [{"link": f"http://a.com/{i}"}, {"link": "http://a.com/sent"}])
+        self.assertTrue(self.store.is_delivered("http://a.com/sent"))
+
+        # Forgotten once it has been out of every fetch for delivered_ttl
+        mock_time.return_value = 200
+        self.store.record("news", [{"link": "http://a.com/new"}])
+        self.assertFalse(self.store.is_delivered("http://a.com/sent"))
+
+if __name__ == '__main__':
+    unittest.main()